@@ -0,0 +1,136 @@
+"""Benchmark the firmware detection decoder against plain json.loads.
+
+Usage: python bench_decoder.py [--records N] [--repeat R]
+
+Lines mirror what output_wifi_detection_json, output_ble_detection_json and
+the Raven path in src/main.cpp print, so no hardware is needed. The same
+records are also encoded as SERIAL_BINARY_OUTPUT frames to compare wire size
+and decode cost.
+"""
+import argparse
+import json
+import random
+import sys
+import time
+import tracemalloc
+
+from decoder import JSON_BACKEND, DETECTION_FIELDS, decode_detection, decode_detection_frame
+from framing import encode_frame, packb
+
+
+def sample_lines(count, seed=1):
+    rng = random.Random(seed)
+    lines = []
+    for i in range(count):
+        mac = ':'.join(f"{rng.randrange(256):02x}" for _ in range(6))
+        rssi = rng.randint(-95, -30)
+        strength = "STRONG" if rssi > -50 else ("MEDIUM" if rssi > -70 else "WEAK")
+        millis = 1000 + i * 37
+        kind = i % 3
+        if kind == 0:
+            doc = {
+                "timestamp": millis, "detection_time": f"{millis / 1000.0:.3f}s",
+                "protocol": "wifi", "detection_method": "probe_request",
+                "alert_level": "HIGH", "device_category": "FLOCK_SAFETY",
+                "ssid": "Flock-A1B2C3", "ssid_length": 12, "rssi": rssi,
+                "signal_strength": strength, "channel": rng.randint(1, 13),
+                "mac_address": mac, "mac_prefix": mac[:8], "vendor_oui": mac[:8],
+                "matched_ssid_pattern": "flock", "ssid_match_confidence": "HIGH",
+                "detection_criteria": "SSID_ONLY", "threat_score": 85,
+                "frame_type": "PROBE_REQUEST",
+                "frame_description": "Device actively scanning for networks"
+            }
+        elif kind == 1:
+            doc = {
+                "timestamp": millis, "detection_time": f"{millis / 1000.0:.3f}s",
+                "protocol": "bluetooth_le", "detection_method": "mac_prefix",
+                "alert_level": "HIGH", "device_category": "FLOCK_SAFETY",
+                "mac_address": mac, "rssi": rssi, "signal_strength": strength,
+                "device_name": "FS Ext Battery", "device_name_length": 14,
+                "has_device_name": True, "mac_prefix": mac[:8], "vendor_oui": mac[:8],
+                "matched_mac_pattern": "58:8e:81", "mac_match_confidence": "HIGH",
+                "detection_criteria": "MAC_ONLY", "threat_score": 85,
+                "advertisement_type": "BLE_ADVERTISEMENT",
+                "advertisement_description": "Bluetooth Low Energy device advertisement",
+                "primary_indicator": "MAC_ADDRESS",
+                "detection_reason": "MAC address matches known Flock Safety prefix"
+            }
+        else:
+            doc = {
+                "protocol": "bluetooth_le", "detection_method": "raven_service_uuid",
+                "device_type": "RAVEN_GUNSHOT_DETECTOR",
+                "manufacturer": "SoundThinking/ShotSpotter", "mac_address": mac,
+                "rssi": rssi, "signal_strength": strength,
+                "raven_service_uuid": "00003100-0000-1000-8000-00805f9b34fb",
+                "raven_service_description": "GPS Location Service (Lat/Lon/Alt)",
+                "raven_firmware_version": "1.3.x (Latest)",
+                "threat_level": "CRITICAL", "threat_score": 100,
+                "service_uuids": ["0000180a-0000-1000-8000-00805f9b34fb",
+                                  "00003100-0000-1000-8000-00805f9b34fb"]
+            }
+        lines.append(json.dumps(doc))
+    return lines
+
+
+def binary_frames(lines):
+    """The same records as SERIAL_BINARY_OUTPUT frames (descriptive fields omitted)"""
+    frames = []
+    for line in lines:
+        doc = {key: value for key, value in json.loads(line).items() if key in DETECTION_FIELDS}
+        frames.append(encode_frame(packb(doc)))
+    return frames
+
+
+def legacy_decode(line):
+    """The previous path: generic json.loads keeping every field"""
+    data = json.loads(line)
+    return data if 'detection_method' in data else None
+
+
+def time_decoder(decode, lines, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for line in lines:
+            decode(line)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def memory_per_record(decode, lines):
+    tracemalloc.start()
+    records = [decode(line) for line in lines]
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    # Subtract the list holding the records
+    return (current - sys.getsizeof(records)) / len(records)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the firmware detection decoder')
+    parser.add_argument('--records', type=int, default=20000, help='Number of sample lines (default: 20000)')
+    parser.add_argument('--repeat', type=int, default=5, help='Timing repetitions, best is reported (default: 5)')
+    args = parser.parse_args()
+
+    lines = sample_lines(args.records)
+    frames = binary_frames(lines)
+    # Payloads as StreamFramer hands them to the decoder
+    payloads = [frame[3:-2] for frame in frames]
+    json_bytes = sum(map(len, lines)) / len(lines) + 2  # println adds CR LF
+    frame_bytes = sum(map(len, frames)) / len(frames)
+    print(f"{len(lines)} records, fast backend: {JSON_BACKEND}")
+    print(f"wire size: JSON line {json_bytes:.0f} bytes, binary frame {frame_bytes:.0f} bytes "
+          f"({115200 / 10 / json_bytes:.0f} vs {115200 / 10 / frame_bytes:.0f} records/s at 115200 baud)")
+    print(f"{'decoder':<22}{'us/line':>10}{'lines/s':>12}{'bytes/record':>15}")
+
+    for name, decode, inputs in (('json.loads (legacy)', legacy_decode, lines),
+                                 ('decode_detection', decode_detection, lines),
+                                 ('decode_detection_frame', decode_detection_frame, payloads)):
+        elapsed = time_decoder(decode, inputs, args.repeat)
+        per_line = elapsed / len(inputs)
+        memory = memory_per_record(decode, inputs)
+        print(f"{name:<22}{per_line * 1e6:>10.2f}{1 / per_line:>12.0f}{memory:>15.0f}")
+
+
+if __name__ == '__main__':
+    main()
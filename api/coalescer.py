@@ -0,0 +1,84 @@
+import logging
+import threading
+import time
+
+log = logging.getLogger('flockyou.coalescer')
+
+# Fields a repeat sighting changes that the dashboard shows; only these are sent in batched updates
+DEFAULT_UPDATE_FIELDS = (
+    'detection_count', 'last_rssi', 'last_seen', 'gps',
+    'last_channel', 'last_ssid', 'last_device_name', 'last_source_device'
+)
+
+
+class UpdateCoalescer:
+    """Merges repeat-sighting updates per key and emits one batch per window.
+
+    Each batch entry carries the record's id and mac_address plus only the
+    fields that changed since that key was last sent, so the dashboard's work
+    scales with the number of devices rather than the packet rate.
+    """
+
+    def __init__(self, emit, window=0.25, fields=DEFAULT_UPDATE_FIELDS):
+        self.emit = emit
+        self.window = window
+        self.fields = fields
+        self.lock = threading.Lock()
+        self.pending = {}    # key -> latest record snapshot waiting to be sent
+        self.last_sent = {}  # key -> field values from the last emitted batch
+        self.running = False
+        self.thread = None
+
+    def push(self, key, record):
+        """Queue the current state of record under key"""
+        snapshot = {'id': record.get('id'), 'mac_address': record.get('mac_address')}
+        for field in self.fields:
+            snapshot[field] = record.get(field)
+        with self.lock:
+            self.pending[key] = snapshot
+
+    def flush(self):
+        """Emit everything queued since the last flush as one batch"""
+        with self.lock:
+            if not self.pending:
+                return 0
+            pending, self.pending = self.pending, {}
+
+            batch = []
+            for key, snapshot in pending.items():
+                previous = self.last_sent.get(key, {})
+                update = {'id': snapshot['id'], 'mac_address': snapshot['mac_address']}
+                for field in self.fields:
+                    if field not in previous or previous[field] != snapshot[field]:
+                        update[field] = snapshot[field]
+                self.last_sent[key] = snapshot
+                if len(update) > 2:
+                    batch.append(update)
+
+        if batch:
+            self.emit(batch)
+        return len(batch)
+
+    def reset(self):
+        """Drop queued updates and change tracking (e.g. when detections are cleared)"""
+        with self.lock:
+            self.pending.clear()
+            self.last_sent.clear()
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+
+    def _run(self):
+        while self.running:
+            time.sleep(self.window)
+            try:
+                self.flush()
+            except Exception as e:
+                log.error("Error flushing coalesced updates: %s", e)
@@ -0,0 +1,233 @@
+import threading
+import uuid
+from collections import Counter, OrderedDict
+
+BLE_PROTOCOLS = ('bluetooth_le', 'bluetooth_classic')
+
+
+def _stats_key(record):
+    """Attributes of a record that the counters are bucketed by"""
+    first_seen = record.get('first_seen') or record.get('server_timestamp') or ''
+    hour = int(first_seen[11:13]) if first_seen[11:13].isdigit() else None
+    return record.get('protocol'), record.get('detection_method'), bool(record.get('gps')), hour
+
+
+class DetectionStore:
+    """Detection list with hash indexes by MAC address and ID.
+
+    The underlying list is the same object the API serializes, so indexes
+    only map keys to list positions. When a journal is given, list mutations
+    go through it so the on-disk history stays in step with the indexes.
+    Per-protocol, per-method, per-hour and has-GPS counters are maintained
+    on every mutation so statistics never rescan the list.
+
+    Every mutation also bumps a version number and records which position
+    changed, so clients can page by ID or fetch only what changed since a
+    version they have already seen.
+    """
+
+    def __init__(self, records=None, journal=None):
+        self.records = records if records is not None else []
+        self.journal = journal
+        self.lock = threading.RLock()
+        self.by_mac = {}
+        self.by_id = {}
+        self.by_protocol = Counter()
+        self.by_method = Counter()
+        self.by_hour = Counter()
+        self.with_gps = 0
+        self.epoch = uuid.uuid4().hex[:8]  # Distinguishes versions across server restarts
+        self.version = 0
+        self.reset_version = 0  # Version of the last clear/reset; older cursors must resync
+        self.changed = OrderedDict()  # position -> version of its last change, oldest first
+        self.reindex()
+
+    def __len__(self):
+        return len(self.records)
+
+    def __iter__(self):
+        return iter(self.records)
+
+    def reset(self, records):
+        """Adopt a new backing list (e.g. after loading from disk)"""
+        with self.lock:
+            self.records = records
+            self.reindex()
+
+    def reindex(self):
+        with self.lock:
+            self.by_mac = {}
+            self.by_id = {}
+            self._reset_counters()
+            self.version += 1
+            self.reset_version = self.version
+            self.changed = OrderedDict()
+            for position, record in enumerate(self.records):
+                self._index(position, record)
+                self._count(_stats_key(record), 1)
+                self._touch(position)
+
+    def _touch(self, position):
+        self.version += 1
+        self.changed[position] = self.version
+        self.changed.move_to_end(position)
+
+    def _reset_counters(self):
+        self.by_protocol = Counter()
+        self.by_method = Counter()
+        self.by_hour = Counter()
+        self.with_gps = 0
+
+    def _count(self, key, delta):
+        protocol, detection_method, has_gps, hour = key
+        self.by_protocol[protocol] += delta
+        self.by_method[detection_method] += delta
+        if hour is not None:
+            self.by_hour[hour] += delta
+        if has_gps:
+            self.with_gps += delta
+
+    def _index(self, position, record):
+        # Later entries win, so a MAC seen in several sessions maps to its newest record
+        mac_address = record.get('mac_address')
+        if mac_address:
+            self.by_mac[mac_address] = position
+        detection_id = record.get('id')
+        if detection_id is not None:
+            self.by_id[detection_id] = position
+
+    def position_of_mac(self, mac_address):
+        return self.by_mac.get(mac_address)
+
+    def position_of_id(self, detection_id):
+        return self.by_id.get(detection_id)
+
+    def get_by_mac(self, mac_address):
+        position = self.by_mac.get(mac_address)
+        return self.records[position] if position is not None else None
+
+    def get_by_id(self, detection_id):
+        position = self.by_id.get(detection_id)
+        return self.records[position] if position is not None else None
+
+    def append(self, record):
+        """Append a record and index it"""
+        with self.lock:
+            if self.journal:
+                self.journal.append(self.records, record)
+            else:
+                self.records.append(record)
+            self._index(len(self.records) - 1, record)
+            self._count(_stats_key(record), 1)
+            self._touch(len(self.records) - 1)
+
+    def update(self, position, changes):
+        """Merge changes into the record at position"""
+        with self.lock:
+            old_key = _stats_key(self.records[position])
+            if self.journal:
+                self.journal.update(self.records, position, changes)
+            else:
+                self.records[position].update(changes)
+            self._index(position, self.records[position])
+            new_key = _stats_key(self.records[position])
+            if new_key != old_key:
+                self._count(old_key, -1)
+                self._count(new_key, 1)
+            self._touch(position)
+
+    def clear(self):
+        with self.lock:
+            self.records.clear()
+            self.by_mac.clear()
+            self.by_id.clear()
+            self._reset_counters()
+            self.version += 1
+            self.reset_version = self.version
+            self.changed.clear()
+
+    def assign_unique_ids(self, next_id):
+        """Renumber records whose ID is missing or shared with a later record.
+
+        Older histories reset IDs on every clear and copied session IDs onto
+        earlier records, so the same ID can appear many times; paging by ID
+        would then jump to the newest copy and skip everything in between.
+        The newest record keeps each ID. Changes go through update(), so they
+        are journalled. Returns (next free ID, number of records renumbered).
+        """
+        with self.lock:
+            used = [record.get('id') for record in self.records]
+            next_id = max([next_id] + [i + 1 for i in used if isinstance(i, int)])
+            seen = set()
+            renumbered = 0
+            for position in range(len(self.records) - 1, -1, -1):
+                detection_id = used[position]
+                if detection_id is None or detection_id in seen:
+                    self.update(position, {'id': next_id})
+                    next_id += 1
+                    renumbered += 1
+                else:
+                    seen.add(detection_id)
+            return next_id, renumbered
+
+    def page(self, after_id=None, limit=None, predicate=None):
+        """Return (records, has_more) in list order, starting after the record with after_id.
+
+        Raises KeyError if after_id is not in the store.
+        """
+        with self.lock:
+            start = 0
+            if after_id is not None:
+                start = self.by_id[after_id] + 1
+
+            results = []
+            position = start
+            while position < len(self.records) and (limit is None or len(results) < limit):
+                record = self.records[position]
+                if predicate is None or predicate(record):
+                    results.append(record)
+                position += 1
+            return results, position < len(self.records)
+
+    def changed_since(self, since, limit=None, predicate=None):
+        """Return (records, seq, has_more) for records changed after version since.
+
+        Records come back in the order they changed; seq is the version to
+        pass as since next time. Returns None if the store was cleared or
+        reset after since, in which case the caller must resync in full.
+        """
+        with self.lock:
+            if since < self.reset_version:
+                return None
+
+            changes = []
+            for position, version in reversed(self.changed.items()):
+                if version <= since:
+                    break
+                changes.append((position, version))
+            changes.reverse()
+
+            results = []
+            seq = self.version
+            for i, (position, version) in enumerate(changes):
+                if limit is not None and len(results) >= limit:
+                    # Resume after the last change we actually returned
+                    seq = changes[i - 1][1]
+                    return results, seq, True
+                record = self.records[position]
+                if predicate is None or predicate(record):
+                    results.append(record)
+            return results, seq, False
+
+    def stats(self):
+        """Counts by protocol, detection method, hour of first sighting and GPS"""
+        with self.lock:
+            return {
+                'total': len(self.records),
+                'wifi': self.by_protocol['wifi'],
+                'ble': sum(self.by_protocol[protocol] for protocol in BLE_PROTOCOLS),
+                'gps': self.with_gps,
+                'by_protocol': {str(k): v for k, v in self.by_protocol.items() if v},
+                'by_method': {str(k): v for k, v in self.by_method.items() if v},
+                'by_hour': {f"{k:02d}": v for k, v in sorted(self.by_hour.items()) if v}
+            }
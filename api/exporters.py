@@ -0,0 +1,272 @@
+import csv
+import io
+import zipfile
+from datetime import datetime
+from xml.sax.saxutils import escape
+
+# Bytes of output buffered before a chunk is yielded to the client
+EXPORT_CHUNK_SIZE = 64 * 1024
+
+CSV_FIELDNAMES = [
+    'timestamp', 'detection_time', 'server_timestamp', 'protocol', 'detection_method',
+    'ssid', 'device_name', 'mac_address', 'manufacturer', 'alias', 'rssi', 'last_rssi',
+    'signal_strength', 'channel', 'last_channel', 'detection_count',
+    'latitude', 'longitude', 'altitude', 'gps_timestamp', 'satellites', 'fix_quality', 'gps_time_diff', 'gps_match_quality', 'timestamp_source',
+    'source_device', 'last_source_device'
+]
+
+
+def _parse_time_arg(value):
+    """Parse an ISO 8601 or epoch-seconds query value into a comparable ISO string"""
+    try:
+        seconds = float(value)
+    except ValueError:
+        dt = datetime.fromisoformat(value.replace('Z', '+00:00'))
+        if dt.tzinfo is not None:
+            # Stored timestamps are naive local time
+            dt = dt.astimezone().replace(tzinfo=None)
+        return dt.isoformat()
+    try:
+        return datetime.fromtimestamp(seconds).isoformat()
+    except (ValueError, OverflowError, OSError):
+        # inf, nan or an epoch outside what the platform can represent
+        raise ValueError(f"Timestamp out of range: {value}")
+
+
+def parse_export_filters(args):
+    """Build export filters from request query args.
+
+    Supported: start, end (ISO 8601 or epoch seconds), detection_method,
+    protocol and has_gps (true/false). Raises ValueError on bad values.
+    """
+    filters = {}
+    for key in ('start', 'end'):
+        value = args.get(key)
+        if value:
+            try:
+                filters[key] = _parse_time_arg(value)
+            except ValueError:
+                raise ValueError(f"Invalid {key} time: {value}")
+    for key in ('detection_method', 'protocol'):
+        value = args.get(key)
+        if value and value != 'all':
+            filters[key] = value
+    has_gps = args.get('has_gps')
+    if has_gps:
+        if has_gps.lower() in ('1', 'true', 'yes'):
+            filters['has_gps'] = True
+        elif has_gps.lower() in ('0', 'false', 'no'):
+            filters['has_gps'] = False
+        else:
+            raise ValueError(f"Invalid has_gps value: {has_gps}")
+    return filters
+
+
+def filter_detections(detections, filters):
+    """Lazily yield the detections matching filters"""
+    start = filters.get('start')
+    end = filters.get('end')
+    detection_method = filters.get('detection_method')
+    protocol = filters.get('protocol')
+    has_gps = filters.get('has_gps')
+
+    # Index-based iteration picks up records appended during a long export and
+    # stops cleanly if the list is cleared underneath it
+    i = 0
+    while i < len(detections):
+        try:
+            detection = detections[i]
+        except IndexError:
+            break
+        i += 1
+        if detection_method and detection.get('detection_method') != detection_method:
+            continue
+        if protocol and detection.get('protocol') != protocol:
+            continue
+        if has_gps is not None and bool(detection.get('gps')) != has_gps:
+            continue
+        if start or end:
+            # A detection matches when its first..last seen interval overlaps the range
+            first_seen = detection.get('first_seen') or detection.get('server_timestamp') or ''
+            last_seen = detection.get('last_seen') or first_seen
+            if start and last_seen < start:
+                continue
+            if end and first_seen > end:
+                continue
+        yield detection
+
+
+def detection_csv_row(detection):
+    gps_data = detection.get('gps') or {}
+    return {
+        'timestamp': detection.get('timestamp'),
+        'detection_time': detection.get('detection_time'),
+        'server_timestamp': detection.get('server_timestamp'),
+        'protocol': detection.get('protocol'),
+        'detection_method': detection.get('detection_method'),
+        'ssid': detection.get('ssid', ''),
+        'device_name': detection.get('device_name', ''),
+        'mac_address': detection.get('mac_address'),
+        'manufacturer': detection.get('manufacturer', 'Unknown'),
+        'alias': detection.get('alias', ''),
+        'rssi': detection.get('rssi'),
+        'last_rssi': detection.get('last_rssi'),
+        'signal_strength': detection.get('signal_strength'),
+        'channel': detection.get('channel'),
+        'last_channel': detection.get('last_channel'),
+        'detection_count': detection.get('detection_count', 1),
+        'latitude': gps_data.get('latitude'),
+        'longitude': gps_data.get('longitude'),
+        'altitude': gps_data.get('altitude'),
+        'gps_timestamp': gps_data.get('timestamp'),
+        'satellites': gps_data.get('satellites'),
+        'fix_quality': gps_data.get('fix_quality'),
+        'gps_time_diff': gps_data.get('time_diff'),
+        'gps_match_quality': gps_data.get('match_quality'),
+        'timestamp_source': detection.get('timestamp_source', 'unknown'),
+        'source_device': detection.get('source_device', ''),
+        'last_source_device': detection.get('last_source_device', '')
+    }
+
+
+def iter_csv(detections):
+    """Yield CSV text in chunks of roughly EXPORT_CHUNK_SIZE"""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=CSV_FIELDNAMES)
+    writer.writeheader()
+
+    for detection in detections:
+        writer.writerow(detection_csv_row(detection))
+        if buffer.tell() >= EXPORT_CHUNK_SIZE:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def _gps_accuracy_label(gps):
+    time_diff = gps.get('time_diff')
+    if time_diff is None:
+        return " (? Unknown accuracy)"
+    if time_diff < 5:
+        return f" (✓ Precise: {time_diff:.1f}s)"
+    if time_diff < 15:
+        return f" (~ Good: {time_diff:.1f}s)"
+    return f" (⚠ Approximate: {time_diff:.1f}s)"
+
+
+def detection_placemark(detection, number):
+    """Render one detection as a KML Placemark, or None if it has no coordinates"""
+    gps = detection.get('gps') or {}
+    if not (gps.get('latitude') and gps.get('longitude')):
+        return None
+
+    # Use alias if available, otherwise use detection number
+    placemark_name = escape(detection.get('alias') or f"Detection {number}")
+
+    # Build device info
+    device_info = ""
+    if detection.get('ssid'):
+        device_info += f"<b>SSID:</b> {detection.get('ssid')}<br/>"
+    if detection.get('device_name'):
+        device_info += f"<b>Device Name:</b> {detection.get('device_name')}<br/>"
+
+    rssi_info = detection.get('last_rssi') or detection.get('rssi', 'N/A')
+    channel_info = detection.get('last_channel') or detection.get('channel', 'N/A')
+
+    return f"""
+    <Placemark>
+        <name>{placemark_name}</name>
+        <description>
+            <![CDATA[
+            <b>Protocol:</b> {detection.get('protocol')}<br/>
+            <b>Detection Method:</b> {detection.get('detection_method')}<br/>
+            {device_info}
+            <b>MAC Address:</b> {detection.get('mac_address')}<br/>
+            <b>Manufacturer:</b> {detection.get('manufacturer', 'Unknown')}<br/>
+            <b>Alias:</b> {detection.get('alias', 'None')}<br/>
+            <b>RSSI:</b> {rssi_info} dBm<br/>
+            <b>Signal Strength:</b> {detection.get('signal_strength', 'N/A')}<br/>
+            <b>Channel:</b> {channel_info}<br/>
+            <b>Detection Count:</b> {detection.get('detection_count', 1)}<br/>
+            <b>Detection Time:</b> {detection.get('detection_time', 'N/A')}<br/>
+            <b>Server Timestamp:</b> {detection.get('server_timestamp', 'N/A')}<br/>
+            <hr/>
+            <b>GPS Coordinates:</b> {gps.get('latitude'):.6f}, {gps.get('longitude'):.6f}{_gps_accuracy_label(gps)}<br/>
+            <b>GPS Altitude:</b> {gps.get('altitude', 'N/A')} m<br/>
+            <b>GPS Satellites:</b> {gps.get('satellites', 'N/A')}<br/>
+            <b>GPS Fix Quality:</b> {gps.get('fix_quality', 'N/A')}<br/>
+            <b>GPS Match Quality:</b> {gps.get('match_quality', 'N/A')}<br/>
+            <b>GPS Timestamp:</b> {gps.get('timestamp', 'N/A')}<br/>
+            <b>Timestamp Source:</b> {detection.get('timestamp_source', 'Unknown').upper()}
+            ]]>
+        </description>
+        <Point>
+            <coordinates>{gps.get('longitude')},{gps.get('latitude')},{gps.get('altitude', 0)}</coordinates>
+        </Point>
+    </Placemark>
+"""
+
+
+def iter_kml(detections, document_name, description):
+    """Yield a KML document in chunks, one placemark at a time"""
+    parts = [f"""<?xml version="1.0" encoding="UTF-8"?>
+<kml xmlns="http://www.opengis.net/kml/2.2">
+<Document>
+    <name>{escape(document_name)}</name>
+    <description>{escape(description)}</description>
+"""]
+    size = len(parts[0])
+
+    for number, detection in enumerate(detections, start=1):
+        placemark = detection_placemark(detection, number)
+        if placemark is None:
+            continue
+        parts.append(placemark)
+        size += len(placemark)
+        if size >= EXPORT_CHUNK_SIZE:
+            yield ''.join(parts)
+            parts = []
+            size = 0
+
+    parts.append("""
+</Document>
+</kml>""")
+    yield ''.join(parts)
+
+
+class _ChunkSink:
+    """Write-only file object that collects bytes for a streaming response"""
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def iter_kmz(kml_chunks, arcname='doc.kml'):
+    """Compress KML chunks into a KMZ archive on the fly"""
+    sink = _ChunkSink()
+    # The sink cannot seek, so zipfile writes sizes in data descriptors after each entry
+    with zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_DEFLATED) as kmz:
+        with kmz.open(arcname, 'w', force_zip64=True) as entry:
+            for chunk in kml_chunks:
+                entry.write(chunk.encode('utf-8'))
+                data = sink.drain()
+                if data:
+                    yield data
+    data = sink.drain()
+    if data:
+        yield data
@@ -1,76 +1,121 @@
-from flask import Flask, render_template, request, jsonify, send_file
+from flask import Flask, Response, render_template, request, jsonify, stream_with_context
 import json
-import csv
 import os
 from datetime import datetime
 import time
 from flask_socketio import SocketIO, emit, join_room, leave_room
 import threading
-import serial
-import serial.tools.list_ports
 import queue
 import uuid
-import pickle
+import zlib
+import logging
+import gzip
+import hashlib
 from pathlib import Path
+from log_config import configure_logging
+from journal import DetectionJournal
+from detection_store import DetectionStore
+from coalescer import UpdateCoalescer
+from gps_history import GPSHistory
+from oui_index import OUIIndex, compile_oui_index, index_is_stale, parse_oui_text, write_oui_index
+from ingest import SerialIngest
+from terminal import TerminalFanout
+from sniffers import SnifferRegistry
+from serial_io import SerialIOLoop, SerialSupervisor
+from framing import StreamFramer
+from nmea import NMEAParser
+from ports import PortInventory
+from decoder import decode_detection, decode_detection_frame
+from exporters import parse_export_filters, filter_detections, iter_csv, iter_kml, iter_kmz
+
+# Logging goes through a background queue; LOG_PROFILE is verbose, default or quiet
+LOG_PROFILE = os.environ.get('LOG_PROFILE', 'default')
+log_profile = configure_logging(LOG_PROFILE)
+log = logging.getLogger('flockyou')
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'flockyou_dev_key_2024')
-socketio = SocketIO(app, cors_allowed_origins="*", async_mode='threading', logger=True, engineio_logger=True)
+socketio = SocketIO(app, cors_allowed_origins="*", async_mode='threading',
+                    logger=log_profile['socketio_logger'], engineio_logger=log_profile['socketio_logger'])
 
 # Global variables
 detections = []
 cumulative_detections = []
 session_start_time = datetime.now()
 gps_data = None
-gps_history = []  # Buffer of recent GPS readings for temporal matching
-MAX_GPS_HISTORY = 100  # Keep last 100 GPS readings
+MAX_GPS_HISTORY = 3600  # Keep last 3600 GPS readings (lookups are O(log n))
 GPS_MATCH_THRESHOLD = 30  # Max seconds between detection and GPS reading
-serial_connection = None
-gps_enabled = False
-flock_device_connected = False
-flock_device_port = None
-flock_serial_connection = None
+GPS_INTERPOLATION_MAX_GAP = 10  # Max seconds between two fixes to interpolate between them
+gps_history = GPSHistory(MAX_GPS_HISTORY)  # Ring buffer of recent GPS readings for temporal matching
+gps_port = None  # Port of the supervised GPS receiver
+gps_enabled = False  # True while the GPS port is open
+GPS_UPDATE_RATE = float(os.environ.get('GPS_UPDATE_RATE', '1'))  # Max gps_update events per second; 0 sends every fix
+gps_last_emit = 0.0
 oui_database = {}
-serial_data_buffer = []
-reconnect_attempts = {'flock': 0, 'gps': 0}
-max_reconnect_attempts = 5
-reconnect_delay = 3  # seconds
-connection_lock = threading.Lock()
+max_reconnect_attempts = 5  # Consecutive failures before the dashboard is told reconnecting is not working
+detection_lock = threading.Lock()  # Serialises store updates from concurrent sniffers
 serial_queue = queue.Queue()
-next_detection_id = 1  # Unique ID counter
+next_detection_id = 1  # Unique ID counter (continues from the cumulative history so IDs work as cursors)
 settings = {'gps_port': '', 'flock_port': '', 'filter': 'all'}
+DETECTION_UPDATE_WINDOW = float(os.environ.get('DETECTION_UPDATE_WINDOW', '0.25'))  # Seconds; 0 emits every update immediately
+SERIAL_TERMINAL_BACKLOG = 1000  # Raw Flock device lines kept for terminal clients that join later
+SERIAL_TERMINAL_INTERVAL = 0.1  # Seconds between batched terminal frames
 
 # Data storage paths
 DATA_DIR = Path('data')
 CUMULATIVE_DATA_FILE = DATA_DIR / 'cumulative_detections.pkl'
+CUMULATIVE_JOURNAL_FILE = DATA_DIR / 'cumulative_detections.journal'
 SETTINGS_FILE = DATA_DIR / 'settings.json'
+OUI_TEXT_FILE = 'oui.txt'
+OUI_INDEX_FILE = 'oui.idx'  # Binary index compiled from oui.txt
 
 # Ensure data directory exists
 DATA_DIR.mkdir(exist_ok=True)
 
+# Cumulative detections are persisted as a snapshot plus an append-only journal
+cumulative_journal = DetectionJournal(CUMULATIVE_DATA_FILE, CUMULATIVE_JOURNAL_FILE)
+
+# MAC/ID indexes over the session and cumulative lists
+session_store = DetectionStore(detections)
+cumulative_store = DetectionStore(cumulative_detections, journal=cumulative_journal)
+
+# Repeat sightings are merged per MAC and sent as one batch per window
+detection_update_coalescer = UpdateCoalescer(
+    lambda batch: safe_socket_emit('detections_batch_updated', batch),
+    window=DETECTION_UPDATE_WINDOW
+)
+
+# Raw lines for the serial terminal: ring buffer backlog, batched frames only while someone has it open
+serial_terminal = TerminalFanout(
+    lambda lines: safe_socket_emit('serial_data_batch', lines, room='serial_terminal'),
+    capacity=SERIAL_TERMINAL_BACKLOG,
+    interval=SERIAL_TERMINAL_INTERVAL,
+    render=lambda item: render_binary_frame(*item)
+)
+
 # Persistent storage functions
 def load_cumulative_detections():
-    """Load cumulative detections from disk"""
-    global cumulative_detections
+    """Load cumulative detections from the snapshot and replay the journal"""
+    global cumulative_detections, next_detection_id
     try:
-        if CUMULATIVE_DATA_FILE.exists():
-            with open(CUMULATIVE_DATA_FILE, 'rb') as f:
-                cumulative_detections = pickle.load(f)
-            print(f"Loaded {len(cumulative_detections)} cumulative detections")
-        else:
-            cumulative_detections = []
+        cumulative_detections = cumulative_journal.load()
+        cumulative_store.reset(cumulative_detections)
+        next_detection_id, renumbered = cumulative_store.assign_unique_ids(next_detection_id)
+        if renumbered:
+            log.info("Gave %d cumulative detections with duplicate IDs new IDs", renumbered)
+        log.info("Loaded %d cumulative detections (%d from journal)", len(cumulative_detections), cumulative_journal.pending)
     except Exception as e:
-        print(f"Error loading cumulative detections: {e}")
+        log.error("Error loading cumulative detections: %s", e)
         cumulative_detections = []
+        cumulative_store.reset(cumulative_detections)
 
 def save_cumulative_detections():
-    """Save cumulative detections to disk"""
+    """Compact cumulative detections into a full snapshot on disk"""
     try:
-        with open(CUMULATIVE_DATA_FILE, 'wb') as f:
-            pickle.dump(cumulative_detections, f)
-        print(f"Saved {len(cumulative_detections)} cumulative detections")
+        count = cumulative_journal.compact(cumulative_detections)
+        log.info("Saved %d cumulative detections", count)
     except Exception as e:
-        print(f"Error saving cumulative detections: {e}")
+        log.error("Error saving cumulative detections: %s", e)
 
 def load_settings():
     """Load settings from disk"""
@@ -79,38 +124,31 @@ def load_settings():
         if SETTINGS_FILE.exists():
             with open(SETTINGS_FILE, 'r') as f:
                 settings.update(json.load(f))
-            print(f"Loaded settings: {settings}")
+            log.info("Loaded settings: %s", settings)
     except Exception as e:
-        print(f"Error loading settings: {e}")
+        log.error("Error loading settings: %s", e)
 
 def save_settings():
     """Save settings to disk"""
     try:
         with open(SETTINGS_FILE, 'w') as f:
             json.dump(settings, f, indent=2)
-        print(f"Saved settings: {settings}")
+        log.info("Saved settings: %s", settings)
     except Exception as e:
-        print(f"Error saving settings: {e}")
+        log.error("Error saving settings: %s", e)
 
 # Load OUI database
 def load_oui_database():
-    """Load the IEEE OUI database for manufacturer lookups"""
+    """Memory-map the IEEE OUI index, compiling it from oui.txt first if needed"""
     global oui_database
     try:
-        with open('oui.txt', 'r', encoding='utf-8', errors='ignore') as f:
-            for line in f:
-                line = line.strip()
-                if line and not line.startswith('#') and '(hex)' in line:
-                    # Parse OUI line format: "28-6F-B9   (hex)                Nokia Shanghai Bell Co., Ltd."
-                    parts = line.split('(hex)')
-                    if len(parts) == 2:
-                        mac_prefix = parts[0].strip().replace('-', '').replace(' ', '').upper()
-                        manufacturer = parts[1].strip()
-                        if mac_prefix and manufacturer and len(mac_prefix) == 6:
-                            oui_database[mac_prefix] = manufacturer
-        print(f"Loaded {len(oui_database)} OUI entries")
+        if os.path.exists(OUI_TEXT_FILE) and index_is_stale(OUI_TEXT_FILE, OUI_INDEX_FILE):
+            count = compile_oui_index(OUI_TEXT_FILE, OUI_INDEX_FILE)
+            log.info("Compiled %d OUI entries into %s", count, OUI_INDEX_FILE)
+        oui_database = OUIIndex(OUI_INDEX_FILE)
+        log.info("Loaded %d OUI entries", len(oui_database))
     except Exception as e:
-        print(f"Error loading OUI database: {e}")
+        log.error("Error loading OUI database: %s", e)
 
 def lookup_manufacturer(mac_address):
     """Look up manufacturer information for a MAC address"""
@@ -124,9 +162,13 @@ def lookup_manufacturer(mac_address):
         return oui_database.get(oui, "Unknown Manufacturer")
     return "Unknown Manufacturer"
 
-# GPS Dongle Configuration
+# Serial Configuration
 GPS_BAUDRATE = 9600
-GPS_TIMEOUT = 1
+FLOCK_BAUDRATE = 115200
+SERIAL_OPEN_TIMEOUT = 3  # Seconds a connect request waits for the port to open
+
+# One asyncio loop thread supervises every serial port (GPS and all sniffers)
+serial_io = SerialIOLoop()
 
 class GPSData:
     def __init__(self):
@@ -137,64 +179,6 @@ class GPSData:
         self.fix_quality = 0
         self.satellites = 0
 
-def parse_nmea_sentence(sentence):
-    """Parse NMEA GPS sentence with improved accuracy"""
-    if not sentence.startswith('$'):
-        return None
-    
-    parts = sentence.strip().split(',')
-    if len(parts) < 1:
-        return None
-    
-    sentence_type = parts[0]
-    
-    if sentence_type in ['$GPGGA', '$GNGGA']:  # Global Positioning System Fix Data (GPS + GLONASS)
-        if len(parts) >= 15:
-            try:
-                time_str = parts[1]
-                lat_raw = parts[2]
-                lat_dir = parts[3]
-                lon_raw = parts[4]
-                lon_dir = parts[5]
-                fix_quality = int(parts[6]) if parts[6] else 0
-                satellites = int(parts[7]) if parts[7] else 0
-                hdop = float(parts[8]) if parts[8] else 0  # Horizontal Dilution of Precision
-                altitude = float(parts[9]) if parts[9] else 0
-                
-                # Skip if no fix
-                if fix_quality == 0 or not lat_raw or not lon_raw:
-                    return None
-                
-                # Convert NMEA format (DDMM.MMMM) to decimal degrees with high precision
-                lat_degrees = int(lat_raw[:2])
-                lat_minutes = float(lat_raw[2:])
-                lat = lat_degrees + (lat_minutes / 60.0)
-                
-                lon_degrees = int(lon_raw[:3])
-                lon_minutes = float(lon_raw[3:])
-                lon = lon_degrees + (lon_minutes / 60.0)
-                
-                # Apply direction
-                if lat_dir == 'S':
-                    lat = -lat
-                if lon_dir == 'W':
-                    lon = -lon
-                
-                return {
-                    'latitude': round(lat, 8),  # 8 decimal places for ~1.1mm accuracy
-                    'longitude': round(lon, 8),
-                    'altitude': round(altitude, 3),
-                    'fix_quality': fix_quality,
-                    'satellites': satellites,
-                    'hdop': hdop,
-                    'timestamp': time_str
-                }
-            except (ValueError, IndexError) as e:
-                print(f"GPS parsing error: {e}")
-                return None
-    
-    return None
-
 def safe_socket_emit(event, data, room=None):
     """Safely emit socket events with error handling"""
     try:
@@ -203,96 +187,217 @@ def safe_socket_emit(event, data, room=None):
         else:
             socketio.emit(event, data)
     except Exception as e:
-        print(f"Socket emit error for {event}: {e}")
+        log.error("Socket emit error for %s: %s", event, e)
+
+gps_framer = StreamFramer()
+gps_parser = NMEAParser()
 
-def gps_reader():
-    """Background thread for reading GPS data"""
-    global gps_data, serial_connection, gps_enabled
+def handle_gps_data(chunk, received_at):
+    """Split bytes from the GPS port into NMEA sentences (runs on the serial I/O loop)"""
+    for line in gps_framer.feed(chunk):
+        if isinstance(line, str):
+            handle_gps_line(line, received_at)
+
+def handle_gps_line(line, received_at):
+    """Parse one NMEA sentence, record the fix and update clients at no more than GPS_UPDATE_RATE"""
+    global gps_data, gps_last_emit
     
-    while gps_enabled:
-        if serial_connection and serial_connection.is_open:
-            try:
-                line = serial_connection.readline().decode('utf-8', errors='ignore')
-                if line:
-                    # Send raw GPS data to serial terminal
-                    safe_socket_emit('serial_data', f"GPS: {line.strip()}", room='serial_terminal')
-                    
-                    parsed = parse_nmea_sentence(line)
-                    if parsed:
-                        gps_data = parsed
-                        
-                        # Add to GPS history with timestamp for temporal matching
-                        if parsed.get('fix_quality') > 0:
-                            gps_entry = parsed.copy()
-                            gps_entry['system_timestamp'] = time.time()
-                            gps_history.append(gps_entry)
-                            
-                            # Keep only recent GPS readings
-                            if len(gps_history) > MAX_GPS_HISTORY:
-                                gps_history.pop(0)
-                        
-                        safe_socket_emit('gps_update', parsed)
-                        
-                        # Also send parsed GPS data to terminal
-                        if parsed.get('fix_quality') > 0:
-                            gps_info = f"GPS Fix: {parsed.get('latitude', 'N/A')}, {parsed.get('longitude', 'N/A')} - {parsed.get('satellites', 0)} satellites"
-                            safe_socket_emit('serial_data', gps_info, room='serial_terminal')
-            except Exception as e:
-                print(f"GPS read error: {e}")
-                with connection_lock:
-                    gps_enabled = False
-                safe_socket_emit('gps_disconnected', {})
-                break
-        time.sleep(0.1)
+    # Send raw GPS data to serial terminal (skipped entirely when nobody has it open)
+    if serial_terminal.active:
+        serial_terminal.publish(f"GPS: {line}", backlog=False)
+    
+    parsed = gps_parser.feed(line)
+    if not parsed:
+        return
+    
+    previous = gps_data
+    gps_data = parsed
+    
+    # Every fix goes into the history used for matching, however fast the receiver reports
+    if parsed['fix_quality'] > 0:
+        gps_entry = parsed.copy()
+        gps_entry['system_timestamp'] = received_at
+        gps_history.append(gps_entry)
+    
+    # Clients get at most GPS_UPDATE_RATE updates per second, but gaining or losing a fix is sent at once
+    fix_changed = previous is None or (previous['fix_quality'] > 0) != (parsed['fix_quality'] > 0)
+    if not fix_changed and GPS_UPDATE_RATE > 0 and received_at - gps_last_emit < 1.0 / GPS_UPDATE_RATE:
+        return
+    gps_last_emit = received_at
+    safe_socket_emit('gps_update', parsed)
+    
+    # Also send parsed GPS data to terminal
+    if parsed['fix_quality'] > 0 and serial_terminal.active:
+        gps_info = f"GPS Fix: {parsed['latitude']}, {parsed['longitude']} - {parsed['satellites']} satellites"
+        if parsed['speed_kmh'] is not None:
+            gps_info += f", {parsed['speed_kmh']} km/h"
+        serial_terminal.publish(gps_info, backlog=False)
+
+def on_gps_connect(supervisor, reconnected):
+    global gps_enabled, gps_framer, gps_parser
+    gps_framer = StreamFramer()
+    gps_parser = NMEAParser()
+    gps_enabled = True
+    if reconnected:
+        log.info("Successfully reconnected to GPS device on %s", supervisor.port)
+        safe_socket_emit('gps_reconnected', {'port': supervisor.port})
+
+def on_gps_disconnect(supervisor, error):
+    global gps_enabled
+    gps_enabled = False
+    log.warning("GPS connection lost on %s: %s", supervisor.port, error)
+    safe_socket_emit('gps_disconnected', {})
+
+def on_serial_give_up(device, supervisor):
+    log.error("Max reconnection attempts reached for %s device on %s, still retrying", device, supervisor.port)
+    safe_socket_emit('reconnect_failed', {'device': device, 'port': supervisor.port})
+
+def attach_gps(port):
+    """Hand the GPS port to a supervisor on the serial I/O loop"""
+    global gps_port
+    gps_port = port
+    return serial_io.add(SerialSupervisor(
+        port, GPS_BAUDRATE,
+        on_data=handle_gps_data,
+        on_connect=on_gps_connect,
+        on_disconnect=on_gps_disconnect,
+        on_give_up=lambda supervisor: on_serial_give_up('gps', supervisor),
+        give_up_after=max_reconnect_attempts
+    ))
 
-def flock_reader():
-    """Background thread for reading Flock device data"""
-    global flock_serial_connection, flock_device_connected, serial_data_buffer
+def detach_gps():
+    global gps_port, gps_enabled
+    if gps_port:
+        serial_io.remove(gps_port)
+    gps_port = None
+    gps_enabled = False
+
+def render_binary_frame(prefix, frame):
+    """Terminal line for a binary frame: the JSON it stands for"""
+    data = decode_detection_frame(frame)
+    return prefix + (json.dumps(data) if data is not None else f"<binary frame, {len(frame)} bytes>")
+
+def process_flock_line(line, received_at, source=None):
+    """Parse stage: feed the terminal and decode a detection from one Flock device line or binary frame
+    
+    source is the port of the sniffer the line came from; detections are tagged with it.
+    """
+    # With several sniffers attached, terminal lines say which one they came from
+    prefix = f"[{source}] " if source and len(flock_devices.connected()) > 1 else ''
+    
+    if isinstance(line, bytes):
+        try:
+            data = decode_detection_frame(line)
+        except ValueError as e:
+            log.debug("Undecodable binary frame from Flock device %s: %s", source, e)
+            return None
+        # Kept as the raw frame; it is only rendered as JSON if a terminal shows it
+        serial_terminal.publish((prefix, line))
+    else:
+        # Keep for the terminal backlog and forward to open terminals in the next batch
+        serial_terminal.publish(prefix + line if prefix else line)
+        
+        # Try to parse as detection data (schema-aware, keeps only the fields we use)
+        try:
+            data = decode_detection(line)
+        except ValueError:
+            # Not JSON, just log it
+            log.debug("Flock device %s (non-JSON): %s", source, line)
+            return None
+        
+        if data is None:
+            log.debug("JSON data without detection_method: %s", line)
     
-    with app.app_context():
-        while flock_device_connected:
-            if flock_serial_connection and flock_serial_connection.is_open:
-                try:
-                    line = flock_serial_connection.readline().decode('utf-8', errors='ignore')
-                    if line:
-                        line = line.strip()
-                        if line:
-                            # Store in buffer for terminal
-                            serial_data_buffer.append(line)
-                            if len(serial_data_buffer) > 1000:  # Keep last 1000 lines
-                                serial_data_buffer.pop(0)
-                            
-                            # Forward to all serial terminal clients
-                            safe_socket_emit('serial_data', line, room='serial_terminal')
-                            print(f"Serial data sent to terminal: {line}")
-                            
-                            # Try to parse as detection data
-                            try:
-                                data = json.loads(line)
-                                if 'detection_method' in data:
-                                    # This is a detection, add it
-                                    add_detection_from_serial(data)
-                                else:
-                                    print(f"JSON data without detection_method: {data}")
-                            except json.JSONDecodeError:
-                                # Not JSON, just log it
-                                print(f"Flock device (non-JSON): {line}")
-                                
-                except Exception as e:
-                    print(f"Flock device read error: {e}")
-                    with connection_lock:
-                        flock_device_connected = False
-                    safe_socket_emit('flock_disconnected', {})
-                    # Trigger reconnection immediately
-                    attempt_reconnect_flock()
-                    break
-            time.sleep(0.1)
+    if data is not None and source:
+        data['source_device'] = source
+    return data
 
-def find_best_gps_match(detection_timestamp):
-    """Find the GPS reading closest in time to the detection timestamp"""
-    global gps_history
+# Serial I/O loop -> parse worker -> enrich worker, with bounded queues between them, shared by every sniffer
+flock_ingest = SerialIngest(
+    'Flock devices',
+    process_flock_line,
+    lambda data, received_at: add_detection_from_serial(data, received_at),
+    context=app.app_context
+)
+
+# Attached sniffers by port; all of them feed the same detection stores
+flock_devices = SnifferRegistry()
+
+def on_flock_connect(supervisor, reconnected):
+    # Drop any partial line left over from before the port dropped
+    flock_ingest.reset_source(supervisor.port)
+    if reconnected:
+        log.info("Successfully reconnected to Flock device on %s", supervisor.port)
+        safe_socket_emit('flock_reconnected', {'port': supervisor.port})
+
+def on_flock_disconnect(supervisor, error):
+    log.warning("Flock You device connection lost on %s: %s", supervisor.port, error)
+    safe_socket_emit('flock_disconnected', {'port': supervisor.port})
+
+def attach_flock_device(port):
+    """Hand a sniffer's port to a supervisor on the serial I/O loop"""
+    device = flock_devices.get_or_create(port)
+    device.enabled = True
+    device.supervisor = serial_io.add(SerialSupervisor(
+        port, FLOCK_BAUDRATE,
+        on_data=lambda chunk, received_at: flock_ingest.feed(port, chunk, received_at),
+        on_connect=on_flock_connect,
+        on_disconnect=on_flock_disconnect,
+        on_give_up=lambda supervisor: on_serial_give_up('flock', supervisor),
+        give_up_after=max_reconnect_attempts
+    ))
+    return device
+
+def detach_flock_device(device):
+    device.enabled = False
+    serial_io.remove(device.port)
+
+def reconnect_known_port(info):
+    """Reopen a supervised device as soon as its port reappears, even under a new path"""
+    port = info['device']
+    supervisor = serial_io.get(port)
+    if supervisor is not None:
+        if not supervisor.connected:
+            log.info("%s is back, reconnecting now", port)
+            supervisor.retry_now()
+        return
     
-    if not gps_history:
+    # Same USB device re-enumerated on another path (e.g. ttyUSB0 -> ttyUSB1)
+    serial_number = info.get('serial_number')
+    if not serial_number:
+        return
+    for old in serial_io.all():
+        if old.connected or port_inventory.serial_number(old.port) != serial_number:
+            continue
+        log.info("Device on %s is back as %s, moving its connection", old.port, port)
+        if old.port == gps_port:
+            detach_gps()
+            attach_gps(port)
+        else:
+            device = flock_devices.get(old.port)
+            if device is not None and device.enabled:
+                detach_flock_device(device)
+                attach_flock_device(port)
+        return
+
+def on_port_change(event, info):
+    if event == 'added':
+        reconnect_known_port(info)
+    safe_socket_emit('ports_changed', {'event': event, 'port': info})
+
+# Serial ports present on the system, kept current by hotplug events and probed to tell GPS from sniffers
+port_inventory = PortInventory(
+    on_change=on_port_change,
+    in_use=lambda: {supervisor.port for supervisor in serial_io.all()}
+)
+
+def list_ports(preferred_kind):
+    """Cached port list with ports that look like preferred_kind first"""
+    return sorted(port_inventory.list(), key=lambda port: (port['kind'] != preferred_kind, port['device']))
+
+def find_best_gps_match(detection_timestamp):
+    """Find the GPS position for the detection timestamp, interpolating or extrapolating from fixes when possible"""
+    if not len(gps_history):
         return None
     
     try:
@@ -308,22 +413,18 @@ def find_best_gps_match(detection_timestamp):
         else:
             detection_time = detection_timestamp
         
-        best_match = None
-        min_time_diff = float('inf')
-        
-        for gps_entry in gps_history:
-            gps_time = gps_entry['system_timestamp']
-            time_diff = abs(detection_time - gps_time)
-            
-            if time_diff < min_time_diff and time_diff <= GPS_MATCH_THRESHOLD:
-                min_time_diff = time_diff
-                best_match = gps_entry
-        
-        return best_match
+        return gps_history.match(detection_time, GPS_MATCH_THRESHOLD, GPS_INTERPOLATION_MAX_GAP)
     except Exception as e:
-        print(f"Error finding GPS match: {e}")
+        log.warning("Error finding GPS match: %s", e)
         return None
 
+def gps_match_quality(fix):
+    if fix.get('interpolated'):
+        return 'interpolated'
+    if fix.get('extrapolated'):
+        return 'extrapolated'
+    return 'temporal'
+
 def validate_gps_data(gps_data):
     """Validate GPS data integrity"""
     if not gps_data:
@@ -348,12 +449,16 @@ def validate_gps_data(gps_data):
     
     return True, "Valid GPS data"
 
-def add_detection_from_serial(data):
-    """Add detection from serial data - counts detections per MAC address"""
-    global detections, cumulative_detections, gps_data, next_detection_id
+def add_detection_from_serial(data, received_at=None):
+    """Add detection from serial data - counts detections per MAC address
     
-    # Add server timestamp first (system time when detection was processed)
-    system_time = time.time()
+    received_at is the system time the line arrived on the serial port; GPS
+    matching uses it so time spent queued does not skew the position.
+    """
+    global detections, cumulative_detections, gps_data
+    
+    # Add server timestamp first (system time when the detection arrived)
+    system_time = received_at or time.time()
     data['server_timestamp'] = datetime.fromtimestamp(system_time).isoformat()
     
     # Try to find the best GPS match for this detection's timestamp
@@ -373,16 +478,16 @@ def add_detection_from_serial(data):
                 'satellites': best_gps.get('satellites'),
                 'fix_quality': best_gps.get('fix_quality'),
                 'time_diff': time_diff,
-                'match_quality': 'temporal'
+                'match_quality': gps_match_quality(best_gps)
             }
             # Prefer GPS timestamp when available and accurate
             if time_diff < 5:  # Very close temporal match
                 preferred_timestamp = best_gps.get('timestamp')
-                print(f"✓ Using GPS timestamp for MAC {data.get('mac_address', 'unknown')}: {time_diff:.2f}s difference")
+                log.debug("✓ Using GPS timestamp for MAC %s: %.2fs difference", data.get('mac_address', 'unknown'), time_diff)
             else:
-                print(f"✓ GPS temporal match for MAC {data.get('mac_address', 'unknown')}: {time_diff:.2f}s difference")
+                log.debug("✓ GPS temporal match for MAC %s: %.2fs difference", data.get('mac_address', 'unknown'), time_diff)
         else:
-            print(f"⚠ Invalid GPS data for temporal match: {validation_msg}")
+            log.warning("⚠ Invalid GPS data for temporal match: %s", validation_msg)
             best_gps = None
     
     # Fallback to current GPS if no good temporal match
@@ -401,27 +506,27 @@ def add_detection_from_serial(data):
             }
             # Use current GPS timestamp if available
             preferred_timestamp = gps_data.get('timestamp')
-            print(f"○ Using current GPS timestamp for MAC {data.get('mac_address', 'unknown')} (no temporal match)")
+            log.debug("○ Using current GPS timestamp for MAC %s (no temporal match)", data.get('mac_address', 'unknown'))
         else:
-            print(f"⚠ Current GPS data invalid: {validation_msg}")
+            log.warning("⚠ Current GPS data invalid: %s", validation_msg)
     
     # Set timestamps - prefer GPS timestamp when available
     if preferred_timestamp:
         data['timestamp'] = preferred_timestamp
         data['detection_time'] = preferred_timestamp
         data['timestamp_source'] = 'gps'
-        print(f"📍 Using GPS timestamp as primary timestamp for {data.get('mac_address', 'unknown')}")
+        log.debug("📍 Using GPS timestamp as primary timestamp for %s", data.get('mac_address', 'unknown'))
     else:
         # Fallback to system timestamps
         system_dt = datetime.fromtimestamp(system_time)
         data['timestamp'] = system_dt.isoformat()
         data['detection_time'] = system_dt.strftime('%Y-%m-%d %H:%M:%S')
         data['timestamp_source'] = 'system'
-        print(f"🕐 Using system timestamp for {data.get('mac_address', 'unknown')} (no GPS available)")
+        log.debug("🕐 Using system timestamp for %s (no GPS available)", data.get('mac_address', 'unknown'))
     
     # Log if no GPS could be assigned
     if not data.get('gps'):
-        print(f"✗ No valid GPS data available for MAC {data.get('mac_address', 'unknown')}")
+        log.debug("✗ No valid GPS data available for MAC %s", data.get('mac_address', 'unknown'))
     
     # Add manufacturer information
     if 'mac_address' in data:
@@ -429,203 +534,73 @@ def add_detection_from_serial(data):
     
     # Check if we already have a detection for this MAC address
     mac_address = data.get('mac_address')
-    existing_detection = None
+    with detection_lock:
+        _store_detection(data, mac_address)
+
+def _assign_detection_id(data):
+    """Give a new record the next detection ID (caller holds detection_lock)"""
+    global next_detection_id
+    data['id'] = next_detection_id
+    next_detection_id += 1
+
+def _store_detection(data, mac_address):
+    """Merge a sighting into the session and cumulative stores (caller holds detection_lock)"""
     
-    if mac_address:
-        for detection in detections:
-            if detection.get('mac_address') == mac_address:
-                existing_detection = detection
-                break
+    existing_detection = session_store.get_by_mac(mac_address) if mac_address else None
     
     if existing_detection:
         # Update existing detection with new data and increment count
-        existing_detection['detection_count'] = existing_detection.get('detection_count', 1) + 1
-        existing_detection['last_seen'] = datetime.now().isoformat()
-        existing_detection['last_rssi'] = data.get('rssi', existing_detection.get('last_rssi'))
-        existing_detection['last_channel'] = data.get('channel', existing_detection.get('last_channel'))
-        existing_detection['last_frequency'] = data.get('frequency', existing_detection.get('last_frequency'))
-        existing_detection['last_ssid'] = data.get('ssid', existing_detection.get('last_ssid'))
-        existing_detection['last_device_name'] = data.get('device_name', existing_detection.get('last_device_name'))
+        changes = {
+            'detection_count': existing_detection.get('detection_count', 1) + 1,
+            'last_seen': datetime.now().isoformat(),
+            'last_rssi': data.get('rssi', existing_detection.get('last_rssi')),
+            'last_channel': data.get('channel', existing_detection.get('last_channel')),
+            'last_frequency': data.get('frequency', existing_detection.get('last_frequency')),
+            'last_ssid': data.get('ssid', existing_detection.get('last_ssid')),
+            'last_device_name': data.get('device_name', existing_detection.get('last_device_name')),
+            'last_source_device': data.get('source_device', existing_detection.get('last_source_device'))
+        }
         
         # Preserve detection_method if not already set
         if not existing_detection.get('detection_method') and data.get('detection_method'):
-            existing_detection['detection_method'] = data.get('detection_method')
+            changes['detection_method'] = data.get('detection_method')
         
         # Update GPS if new data is available
         if data.get('gps'):
-            existing_detection['gps'] = data['gps']
+            changes['gps'] = data['gps']
+        
+        # Apply through the store so its counters see the change
+        session_store.update(session_store.position_of_mac(mac_address), changes)
         
         # Update cumulative detections
-        for cum_detection in cumulative_detections:
-            if cum_detection.get('mac_address') == mac_address:
-                cum_detection.update(existing_detection)
-                break
-        save_cumulative_detections()
+        cumulative_position = cumulative_store.position_of_mac(mac_address)
+        if cumulative_position is not None:
+            cumulative_store.update(cumulative_position, existing_detection)
         
-        # Emit updated detection
-        safe_socket_emit('detection_updated', existing_detection)
-        print(f"Updated detection: MAC {mac_address}, Count: {existing_detection['detection_count']}, Method: {existing_detection.get('detection_method')}")
+        # Emit updated detection (coalesced per MAC unless the window is disabled)
+        if DETECTION_UPDATE_WINDOW > 0:
+            detection_update_coalescer.push(mac_address, existing_detection)
+        else:
+            safe_socket_emit('detection_updated', existing_detection)
+        log.debug("Updated detection: MAC %s, Count: %s, Method: %s", mac_address, existing_detection['detection_count'], existing_detection.get('detection_method'))
     else:
         # Create new detection
-        data['id'] = next_detection_id
-        next_detection_id += 1
+        _assign_detection_id(data)
         data['alias'] = ''  # Empty alias by default
         data['detection_count'] = 1
         data['first_seen'] = datetime.now().isoformat()
         data['last_seen'] = datetime.now().isoformat()
+        if data.get('source_device'):
+            data['last_source_device'] = data['source_device']
         
-        detections.append(data)
+        session_store.append(data)
         
         # Add to cumulative detections
-        cumulative_detections.append(data.copy())
-        save_cumulative_detections()
+        cumulative_store.append(data.copy())
         
         # Emit to connected clients
         safe_socket_emit('new_detection', data)
-        print(f"New detection added: ID {data['id']}, Method: {data.get('detection_method')}, MAC: {mac_address}")
-
-def connection_monitor():
-    """Background thread for monitoring device connections"""
-    global gps_enabled, flock_device_connected, serial_connection, reconnect_attempts
-    
-    with app.app_context():
-        while True:
-            # Check GPS connection
-            if gps_enabled:
-                try:
-                    if not serial_connection or not serial_connection.is_open:
-                        with connection_lock:
-                            gps_enabled = False
-                        safe_socket_emit('gps_disconnected', {})
-                        print("GPS connection lost")
-                        # Start reconnection attempts
-                        attempt_reconnect_gps()
-                    else:
-                        # Test if the connection is still valid
-                        serial_connection.in_waiting
-                except Exception as e:
-                    print(f"GPS connection test failed: {e}")
-                    with connection_lock:
-                        gps_enabled = False
-                    safe_socket_emit('gps_disconnected', {})
-                    attempt_reconnect_gps()
-            
-            # Check Flock You device connection
-            if flock_device_connected:
-                try:
-                    # Test if the connection is still valid
-                    if not flock_serial_connection or not flock_serial_connection.is_open:
-                        with connection_lock:
-                            flock_device_connected = False
-                        safe_socket_emit('flock_disconnected', {})
-                        print("Flock You device connection lost")
-                        # Start reconnection attempts
-                        attempt_reconnect_flock()
-                    else:
-                        # Try a simple read to test connection
-                        flock_serial_connection.in_waiting
-                except Exception as e:
-                    print(f"Flock device connection test failed: {e}")
-                    with connection_lock:
-                        flock_device_connected = False
-                    safe_socket_emit('flock_disconnected', {})
-                    # Start reconnection attempts
-                    attempt_reconnect_flock()
-            
-            time.sleep(2)  # Check every 2 seconds
-
-def attempt_reconnect_flock():
-    """Attempt to reconnect to Flock device"""
-    global flock_device_connected, reconnect_attempts, flock_serial_connection
-    
-    def reconnect_thread():
-        global flock_device_connected, reconnect_attempts, flock_serial_connection
-        
-        with app.app_context():
-            while not flock_device_connected and reconnect_attempts['flock'] < max_reconnect_attempts:
-                try:
-                    print(f"Attempting to reconnect to Flock device (attempt {reconnect_attempts['flock'] + 1}/{max_reconnect_attempts})")
-                    
-                    # Try to reconnect
-                    if flock_serial_connection:
-                        try:
-                            flock_serial_connection.close()
-                        except:
-                            pass
-                    
-                    # Wait a moment for the device to be ready
-                    time.sleep(1)
-                    
-                    flock_serial_connection = serial.Serial(flock_device_port, 115200, timeout=1)
-                    
-                    # Test the connection
-                    test_data = flock_serial_connection.readline()
-                    
-                    # If successful, update status
-                    with connection_lock:
-                        flock_device_connected = True
-                    reconnect_attempts['flock'] = 0
-                    print(f"Successfully reconnected to Flock device on {flock_device_port}")
-                    safe_socket_emit('flock_reconnected', {'port': flock_device_port})
-                    
-                    # Restart the reading thread
-                    flock_thread = threading.Thread(target=flock_reader, daemon=True)
-                    flock_thread.start()
-                    return
-                    
-                except Exception as e:
-                    print(f"Reconnection attempt failed: {e}")
-                    reconnect_attempts['flock'] += 1
-                    time.sleep(reconnect_delay)
-            
-            if reconnect_attempts['flock'] >= max_reconnect_attempts:
-                print("Max reconnection attempts reached for Flock device")
-                safe_socket_emit('reconnect_failed', {'device': 'flock'})
-                reconnect_attempts['flock'] = 0  # Reset for future attempts
-    
-    thread = threading.Thread(target=reconnect_thread, daemon=True)
-    thread.start()
-
-def attempt_reconnect_gps():
-    """Attempt to reconnect to GPS device"""
-    global gps_enabled, reconnect_attempts
-    
-    def reconnect_thread():
-        global gps_enabled, reconnect_attempts
-
-        with app.app_context():
-            while not gps_enabled and reconnect_attempts['gps'] < max_reconnect_attempts:
-                try:
-                    print(f"Attempting to reconnect to GPS device (attempt {reconnect_attempts['gps'] + 1}/{max_reconnect_attempts})")
-                    
-                    # Try to reconnect
-                    test_ser = serial.Serial(serial_connection.port, GPS_BAUDRATE, timeout=1)
-                    test_ser.close()
-                    
-                    # If successful, update status
-                    with connection_lock:
-                        gps_enabled = True
-                    reconnect_attempts['gps'] = 0
-                    print(f"Successfully reconnected to GPS device on {serial_connection.port}")
-                    safe_socket_emit('gps_reconnected', {'port': serial_connection.port})
-                    
-                    # Restart the reading thread
-                    gps_thread = threading.Thread(target=gps_reader, daemon=True)
-                    gps_thread.start()
-                    return
-                    
-                except Exception as e:
-                    print(f"GPS reconnection attempt failed: {e}")
-                    reconnect_attempts['gps'] += 1
-                    time.sleep(reconnect_delay)
-            
-            if reconnect_attempts['gps'] >= max_reconnect_attempts:
-                print("Max reconnection attempts reached for GPS device")
-                safe_socket_emit('reconnect_failed', {'device': 'gps'})
-                reconnect_attempts['gps'] = 0  # Reset for future attempts
-    
-    thread = threading.Thread(target=reconnect_thread, daemon=True)
-    thread.start()
+        log.info("New detection added: ID %s, Method: %s, MAC: %s", data['id'], data.get('detection_method'), mac_address)
 
 @app.route('/')
 def index():
@@ -633,22 +608,74 @@ def index():
 
 @app.route('/api/detections', methods=['GET'])
 def get_detections():
-    """Get all detections with optional filtering"""
+    """Get detections with optional filtering, cursor pagination and incremental sync.
+    
+    Without paging parameters the full (filtered) list is returned as before.
+    With limit/after_id and/or since, the response is an object carrying the
+    page plus the cursor and sequence number to continue from. Responses carry
+    an ETag so unchanged polls get a 304.
+    """
     filter_type = request.args.get('filter', 'all')
     data_type = request.args.get('type', 'session')
     
     # Choose data source
-    if data_type == 'cumulative':
-        source_data = cumulative_detections
-    else:
-        source_data = detections
-    
-    # Apply filter
-    if filter_type == 'all':
-        return jsonify(source_data)
+    store = cumulative_store if data_type == 'cumulative' else session_store
+    
+    etag = f"{store.epoch}-{store.version}-{zlib.crc32(request.query_string):08x}"
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+        response.set_etag(etag)
+        return response
+    
+    # Non-integer values are treated as absent
+    limit = request.args.get('limit', type=int)
+    after_id = request.args.get('after_id', type=int)
+    since = request.args.get('since', type=int)
+    if limit is not None and limit < 1:
+        return jsonify({'status': 'error', 'message': 'limit must be at least 1'}), 400
+    
+    predicate = None
+    if filter_type != 'all':
+        predicate = lambda d: d.get('detection_method') == filter_type
+    
+    if limit is None and after_id is None and since is None:
+        # Apply filter
+        if predicate is None:
+            response = jsonify(store.records)
+        else:
+            response = jsonify([d for d in store.records if predicate(d)])
+        response.set_etag(etag)
+        return response
+    
+    reset = False
+    changes = None
+    if since is not None and request.args.get('epoch', store.epoch) == store.epoch:
+        changes = store.changed_since(since, limit=limit, predicate=predicate)
+    
+    if changes is not None:
+        page, seq, has_more = changes
+        next_after_id = None
     else:
-        filtered = [d for d in source_data if d.get('detection_method') == filter_type]
-        return jsonify(filtered)
+        # Full (paged) listing: either plain pagination or a resync after a clear/restart
+        reset = since is not None
+        seq = store.version
+        try:
+            page, has_more = store.page(after_id=after_id, limit=limit, predicate=predicate)
+        except KeyError:
+            return jsonify({'status': 'error', 'message': f'Unknown after_id: {after_id}'}), 404
+        next_after_id = page[-1].get('id') if page and has_more else None
+    
+    response = jsonify({
+        'detections': page,
+        'count': len(page),
+        'has_more': has_more,
+        'next_after_id': next_after_id,
+        'seq': seq,
+        'epoch': store.epoch,
+        'reset': reset
+    })
+    response.set_etag(etag)
+    return response
 
 @app.route('/api/detections', methods=['POST'])
 def add_detection():
@@ -674,133 +701,110 @@ def add_detection():
     # Add server timestamp
     data['server_timestamp'] = datetime.now().isoformat()
     
-    detections.append(data)
+    # IDs come from the same counter as serial detections so after_id paging can resume from any record
+    with detection_lock:
+        _assign_detection_id(data)
+        session_store.append(data)
     
     # Emit to connected clients
     socketio.emit('new_detection', data)
     
-    return jsonify({'status': 'success', 'id': len(detections)})
+    return jsonify({'status': 'success', 'id': data['id']})
 
 @app.route('/api/gps/connect', methods=['POST'])
 def connect_gps():
     """Connect to GPS dongle"""
-    global serial_connection, gps_enabled
-    
     data = request.json
     port = data.get('port')
+    if not port:
+        return jsonify({'status': 'error', 'message': 'No port specified'}), 400
     
-    try:
-        if serial_connection:
-            serial_connection.close()
-        
-        serial_connection = serial.Serial(port, GPS_BAUDRATE, timeout=GPS_TIMEOUT)
-        with connection_lock:
-            gps_enabled = True
-        
-        # Start GPS reading thread
-        gps_thread = threading.Thread(target=gps_reader, daemon=True)
-        gps_thread.start()
-        
-        return jsonify({'status': 'success', 'message': f'Connected to {port}'})
-    except Exception as e:
-        return jsonify({'status': 'error', 'message': str(e)}), 400
+    detach_gps()
+    supervisor = attach_gps(port)
+    if not supervisor.first_attempt.wait(SERIAL_OPEN_TIMEOUT) or not supervisor.connected:
+        message = supervisor.last_error or f'Timed out opening {port}'
+        detach_gps()
+        return jsonify({'status': 'error', 'message': message}), 400
+    
+    return jsonify({'status': 'success', 'message': f'Connected to {port}'})
 
 @app.route('/api/gps/disconnect', methods=['POST'])
 def disconnect_gps():
     """Disconnect GPS dongle"""
-    global serial_connection, gps_enabled
-    
-    with connection_lock:
-        gps_enabled = False
-    if serial_connection:
-        serial_connection.close()
-        serial_connection = None
-    
+    detach_gps()
     return jsonify({'status': 'success', 'message': 'GPS disconnected'})
 
 @app.route('/api/flock/connect', methods=['POST'])
 def connect_flock():
-    """Connect to Flock You device"""
-    global flock_device_connected, flock_device_port, flock_serial_connection
-    
+    """Attach a Flock You sniffer; already attached sniffers keep running"""
     data = request.json
     port = data.get('port')
+    if not port:
+        return jsonify({'status': 'error', 'message': 'No port specified'}), 400
     
-    try:
-        # Create persistent connection to the port
-        flock_serial_connection = serial.Serial(port, 115200, timeout=1)
-        with connection_lock:
-            flock_device_connected = True
-        flock_device_port = port
-        
-        # Start reading thread
-        flock_thread = threading.Thread(target=flock_reader, daemon=True)
-        flock_thread.start()
-        
-        return jsonify({'status': 'success', 'message': f'Connected to Flock You device on {port}'})
-    except Exception as e:
-        return jsonify({'status': 'error', 'message': str(e)}), 400
+    device = flock_devices.get(port)
+    if device and device.connected:
+        return jsonify({'status': 'success', 'message': f'Flock You device on {port} is already connected'})
+    
+    device = attach_flock_device(port)
+    supervisor = device.supervisor
+    if not supervisor.first_attempt.wait(SERIAL_OPEN_TIMEOUT) or not supervisor.connected:
+        message = supervisor.last_error or f'Timed out opening {port}'
+        detach_flock_device(device)
+        return jsonify({'status': 'error', 'message': message}), 400
+    
+    return jsonify({'status': 'success', 'message': f'Connected to Flock You device on {port}'})
 
 @app.route('/api/flock/disconnect', methods=['POST'])
 def disconnect_flock():
-    """Disconnect Flock You device"""
-    global flock_device_connected, flock_device_port, flock_serial_connection
+    """Detach the sniffer on the given port, or every sniffer when no port is given"""
+    data = request.get_json(silent=True) or {}
+    port = data.get('port')
     
-    with connection_lock:
-        flock_device_connected = False
-    flock_device_port = None
+    if port:
+        device = flock_devices.get(port)
+        devices = [device] if device else []
+    else:
+        devices = flock_devices.all()
     
-    if flock_serial_connection and flock_serial_connection.is_open:
-        flock_serial_connection.close()
-        flock_serial_connection = None
+    for device in devices:
+        detach_flock_device(device)
     
     return jsonify({'status': 'success', 'message': 'Flock You device disconnected'})
 
 @app.route('/api/status', methods=['GET'])
 def get_status():
-    """Get connection status of both devices"""
+    """Get connection status of the GPS and every attached sniffer"""
+    connected = flock_devices.connected()
     return jsonify({
         'gps_connected': gps_enabled,
-        'gps_port': serial_connection.port if serial_connection else None,
-        'flock_connected': flock_device_connected,
-        'flock_port': flock_device_port
+        'gps_port': gps_port,
+        'flock_connected': bool(connected),
+        'flock_port': connected[0].port if connected else None,
+        'flock_devices': [device.snapshot() for device in flock_devices.enabled()]
+    })
+
+@app.route('/api/ingest/stats', methods=['GET'])
+def get_ingest_stats():
+    """Get serial ingest throughput, queue depth and dropped-line counters, plus per-port supervisor state"""
+    return jsonify({
+        'flock': flock_ingest.snapshot(),
+        'ports': {supervisor.port: supervisor.snapshot() for supervisor in serial_io.all()}
     })
 
 @app.route('/api/gps/ports', methods=['GET'])
 def get_gps_ports():
-    """Get available serial ports for GPS"""
-    ports = []
-    for port in serial.tools.list_ports.comports():
-        port_info = {
-            'device': port.device,
-            'description': port.description,
-            'manufacturer': port.manufacturer if port.manufacturer else 'Unknown',
-            'product': port.product if port.product else 'Unknown',
-            'vid': port.vid,
-            'pid': port.pid
-        }
-        ports.append(port_info)
-    return jsonify(ports)
+    """Get available serial ports for GPS (from the port inventory; likely GPS receivers first)"""
+    return jsonify(list_ports('gps'))
 
 @app.route('/api/flock/ports', methods=['GET'])
 def get_flock_ports():
-    """Get available serial ports for Flock You device"""
-    ports = []
-    for port in serial.tools.list_ports.comports():
-        port_info = {
-            'device': port.device,
-            'description': port.description,
-            'manufacturer': port.manufacturer if port.manufacturer else 'Unknown',
-            'product': port.product if port.product else 'Unknown',
-            'vid': port.vid,
-            'pid': port.pid
-        }
-        ports.append(port_info)
-    return jsonify(ports)
+    """Get available serial ports for Flock You device (from the port inventory; likely sniffers first)"""
+    return jsonify(list_ports('flock'))
 
 @app.route('/api/export/csv', methods=['GET'])
 def export_csv():
-    """Export session detections as CSV"""
+    """Stream detections as CSV, optionally filtered by time range, method, protocol and GPS"""
     export_type = request.args.get('type', 'session')
     
     if export_type == 'cumulative':
@@ -813,163 +817,87 @@ def export_csv():
     if not data_to_export:
         return jsonify({'status': 'error', 'message': 'No detections to export'}), 400
     
+    try:
+        filters = parse_export_filters(request.args)
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    
     filename = f"{filename_prefix}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
-    filepath = os.path.join('exports', filename)
-    
-    os.makedirs('exports', exist_ok=True)
-    
-    with open(filepath, 'w', newline='', encoding='utf-8') as csvfile:
-        fieldnames = [
-            'timestamp', 'detection_time', 'server_timestamp', 'protocol', 'detection_method',
-            'ssid', 'device_name', 'mac_address', 'manufacturer', 'alias', 'rssi', 'last_rssi', 
-            'signal_strength', 'channel', 'last_channel', 'detection_count',
-            'latitude', 'longitude', 'altitude', 'gps_timestamp', 'satellites', 'fix_quality', 'gps_time_diff', 'gps_match_quality', 'timestamp_source'
-        ]
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-        writer.writeheader()
-        
-        for detection in data_to_export:
-            gps_data = detection.get('gps', {})
-            row = {
-                'timestamp': detection.get('timestamp'),
-                'detection_time': detection.get('detection_time'),
-                'server_timestamp': detection.get('server_timestamp'),
-                'protocol': detection.get('protocol'),
-                'detection_method': detection.get('detection_method'),
-                'ssid': detection.get('ssid', ''),
-                'device_name': detection.get('device_name', ''),
-                'mac_address': detection.get('mac_address'),
-                'manufacturer': detection.get('manufacturer', 'Unknown'),
-                'alias': detection.get('alias', ''),
-                'rssi': detection.get('rssi'),
-                'last_rssi': detection.get('last_rssi'),
-                'signal_strength': detection.get('signal_strength'),
-                'channel': detection.get('channel'),
-                'last_channel': detection.get('last_channel'),
-                'detection_count': detection.get('detection_count', 1),
-                'latitude': gps_data.get('latitude'),
-                'longitude': gps_data.get('longitude'),
-                'altitude': gps_data.get('altitude'),
-                'gps_timestamp': gps_data.get('timestamp'),
-                'satellites': gps_data.get('satellites'),
-                'fix_quality': gps_data.get('fix_quality'),
-                'gps_time_diff': gps_data.get('time_diff'),
-                'gps_match_quality': gps_data.get('match_quality'),
-                'timestamp_source': detection.get('timestamp_source', 'unknown')
-            }
-            writer.writerow(row)
     
-    return send_file(filepath, as_attachment=True, download_name=filename)
+    return Response(
+        stream_with_context(iter_csv(filter_detections(data_to_export, filters))),
+        mimetype='text/csv',
+        headers={'Content-Disposition': f'attachment; filename="{filename}"'}
+    )
 
-@app.route('/api/export/kml', methods=['GET'])
-def export_kml():
-    """Export detections as KML"""
+def _kml_export_source():
+    """Resolve the data, filename prefix and document name for a KML/KMZ export"""
     export_type = request.args.get('type', 'session')
     
     if export_type == 'cumulative':
-        data_to_export = cumulative_detections
-        filename_prefix = "flockyou_cumulative"
-        document_name = "Flock You Cumulative Detections"
+        return cumulative_detections, "flockyou_cumulative", "Flock You Cumulative Detections"
+    return (
+        detections,
+        f"flockyou_session_{session_start_time.strftime('%Y%m%d_%H%M%S')}",
+        f"Flock You Session Detections - {session_start_time.strftime('%Y-%m-%d %H:%M:%S')}"
+    )
+
+def _kml_export_chunks(data_to_export, document_name, filters):
+    if filters:
+        description = "Surveillance device detections with GPS coordinates (filtered)"
     else:
-        data_to_export = detections
-        filename_prefix = f"flockyou_session_{session_start_time.strftime('%Y%m%d_%H%M%S')}"
-        document_name = f"Flock You Session Detections - {session_start_time.strftime('%Y-%m-%d %H:%M:%S')}"
+        description = f"Surveillance device detections with GPS coordinates ({len(data_to_export)} detections)"
+    return iter_kml(filter_detections(data_to_export, filters), document_name, description)
+
+@app.route('/api/export/kml', methods=['GET'])
+def export_kml():
+    """Stream detections as KML"""
+    data_to_export, filename_prefix, document_name = _kml_export_source()
     
     if not data_to_export:
         return jsonify({'status': 'error', 'message': 'No detections to export'}), 400
     
+    try:
+        filters = parse_export_filters(request.args)
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    
     filename = f"{filename_prefix}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.kml"
-    filepath = os.path.join('exports', filename)
-    
-    os.makedirs('exports', exist_ok=True)
-    
-    kml_content = f"""<?xml version="1.0" encoding="UTF-8"?>
-<kml xmlns="http://www.opengis.net/kml/2.2">
-<Document>
-    <name>{document_name}</name>
-    <description>Surveillance device detections with GPS coordinates ({len(data_to_export)} detections)</description>
-"""
-    
-    for i, detection in enumerate(data_to_export):
-        gps = detection.get('gps', {})
-        if gps.get('latitude') and gps.get('longitude'):
-            # Use alias if available, otherwise use detection number
-            placemark_name = detection.get('alias') or f"Detection {i+1}"
-            
-            # GPS accuracy indicator
-            gps_accuracy = ""
-            if gps.get('time_diff') is not None:
-                time_diff = gps.get('time_diff')
-                if time_diff < 5:
-                    gps_accuracy = f" (✓ Precise: {time_diff:.1f}s)"
-                elif time_diff < 15:
-                    gps_accuracy = f" (~ Good: {time_diff:.1f}s)"
-                else:
-                    gps_accuracy = f" (⚠ Approximate: {time_diff:.1f}s)"
-            else:
-                gps_accuracy = " (? Unknown accuracy)"
-            
-            # Build device info
-            device_info = ""
-            if detection.get('ssid'):
-                device_info += f"<b>SSID:</b> {detection.get('ssid')}<br/>"
-            if detection.get('device_name'):
-                device_info += f"<b>Device Name:</b> {detection.get('device_name')}<br/>"
-            
-            # RSSI info
-            rssi_info = detection.get('last_rssi') or detection.get('rssi', 'N/A')
-            
-            # Channel info
-            channel_info = detection.get('last_channel') or detection.get('channel', 'N/A')
-            
-            kml_content += f"""
-    <Placemark>
-        <name>{placemark_name}</name>
-        <description>
-            <![CDATA[
-            <b>Protocol:</b> {detection.get('protocol')}<br/>
-            <b>Detection Method:</b> {detection.get('detection_method')}<br/>
-            {device_info}
-            <b>MAC Address:</b> {detection.get('mac_address')}<br/>
-            <b>Manufacturer:</b> {detection.get('manufacturer', 'Unknown')}<br/>
-            <b>Alias:</b> {detection.get('alias', 'None')}<br/>
-            <b>RSSI:</b> {rssi_info} dBm<br/>
-            <b>Signal Strength:</b> {detection.get('signal_strength', 'N/A')}<br/>
-            <b>Channel:</b> {channel_info}<br/>
-            <b>Detection Count:</b> {detection.get('detection_count', 1)}<br/>
-            <b>Detection Time:</b> {detection.get('detection_time', 'N/A')}<br/>
-            <b>Server Timestamp:</b> {detection.get('server_timestamp', 'N/A')}<br/>
-            <hr/>
-            <b>GPS Coordinates:</b> {gps.get('latitude'):.6f}, {gps.get('longitude'):.6f}{gps_accuracy}<br/>
-            <b>GPS Altitude:</b> {gps.get('altitude', 'N/A')} m<br/>
-            <b>GPS Satellites:</b> {gps.get('satellites', 'N/A')}<br/>
-            <b>GPS Fix Quality:</b> {gps.get('fix_quality', 'N/A')}<br/>
-            <b>GPS Match Quality:</b> {gps.get('match_quality', 'N/A')}<br/>
-            <b>GPS Timestamp:</b> {gps.get('timestamp', 'N/A')}<br/>
-            <b>Timestamp Source:</b> {detection.get('timestamp_source', 'Unknown').upper()}
-            ]]>
-        </description>
-        <Point>
-            <coordinates>{gps.get('longitude')},{gps.get('latitude')},{gps.get('altitude', 0)}</coordinates>
-        </Point>
-    </Placemark>
-"""
-    
-    kml_content += """
-</Document>
-</kml>"""
-    
-    with open(filepath, 'w', encoding='utf-8') as f:
-        f.write(kml_content)
-    
-    return send_file(filepath, as_attachment=True, download_name=filename)
+    
+    return Response(
+        stream_with_context(_kml_export_chunks(data_to_export, document_name, filters)),
+        mimetype='application/vnd.google-earth.kml+xml',
+        headers={'Content-Disposition': f'attachment; filename="{filename}"'}
+    )
+
+@app.route('/api/export/kmz', methods=['GET'])
+def export_kmz():
+    """Stream detections as a KMZ (zipped KML) archive built on the fly"""
+    data_to_export, filename_prefix, document_name = _kml_export_source()
+    
+    if not data_to_export:
+        return jsonify({'status': 'error', 'message': 'No detections to export'}), 400
+    
+    try:
+        filters = parse_export_filters(request.args)
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    
+    filename = f"{filename_prefix}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.kmz"
+    
+    return Response(
+        stream_with_context(iter_kmz(_kml_export_chunks(data_to_export, document_name, filters))),
+        mimetype='application/vnd.google-earth.kmz',
+        headers={'Content-Disposition': f'attachment; filename="{filename}"'}
+    )
 
 @app.route('/api/clear', methods=['POST'])
 def clear_detections():
     """Clear session detections"""
-    global detections, next_detection_id, session_start_time
-    detections.clear()
-    next_detection_id = 1  # Reset ID counter
+    global detections, session_start_time
+    with detection_lock:
+        session_store.clear()
+        detection_update_coalescer.reset()
     session_start_time = datetime.now()  # Reset session start time
     safe_socket_emit('detections_cleared', {})
     return jsonify({'status': 'success', 'message': 'Session detections cleared'})
@@ -1021,12 +949,13 @@ def update_detection_alias():
         return jsonify({'status': 'error', 'message': 'Detection ID required'}), 400
     
     # Find and update the detection
-    for detection in detections:
-        if detection.get('id') == detection_id:
-            detection['alias'] = alias
-            # Emit update to all clients
-            safe_socket_emit('detection_updated', detection)
-            return jsonify({'status': 'success', 'message': 'Alias updated'})
+    position = session_store.position_of_id(detection_id)
+    if position is not None:
+        session_store.update(position, {'alias': alias})
+        detection = session_store.records[position]
+        # Emit update to all clients
+        safe_socket_emit('detection_updated', detection)
+        return jsonify({'status': 'success', 'message': 'Alias updated'})
     
     return jsonify({'status': 'error', 'message': 'Detection not found'}), 404
 
@@ -1046,21 +975,12 @@ def update_settings():
 
 @app.route('/api/stats', methods=['GET'])
 def get_stats():
-    """Get detection statistics"""
+    """Get detection statistics from the incrementally maintained counters"""
+    session_stats = session_store.stats()
+    session_stats['start_time'] = session_start_time.isoformat()
     return jsonify({
-        'session': {
-            'total': len(detections),
-            'wifi': len([d for d in detections if d.get('protocol') == 'wifi']),
-            'ble': len([d for d in detections if d.get('protocol') in ['bluetooth_le', 'bluetooth_classic']]),
-            'gps': len([d for d in detections if d.get('gps')]),
-            'start_time': session_start_time.isoformat()
-        },
-        'cumulative': {
-            'total': len(cumulative_detections),
-            'wifi': len([d for d in cumulative_detections if d.get('protocol') == 'wifi']),
-            'ble': len([d for d in cumulative_detections if d.get('protocol') in ['bluetooth_le', 'bluetooth_classic']]),
-            'gps': len([d for d in cumulative_detections if d.get('gps')])
-        }
+        'session': session_stats,
+        'cumulative': cumulative_store.stats()
     })
 
 @app.route('/api/oui/search', methods=['POST'])
@@ -1100,7 +1020,7 @@ def search_oui():
                 if len(results) >= 100:  # Increased limit
                     break
     
-    print(f"Search query: '{query}' -> '{clean_query}', found {len(results)} results")
+    log.debug("Search query: '%s' -> '%s', found %d results", query, clean_query, len(results))
     
     return jsonify({
         'status': 'success',
@@ -1108,25 +1028,65 @@ def search_oui():
         'count': len(results)
     })
 
+# Precomputed /api/oui/all body, rebuilt only when a different database is loaded
+oui_all_cache = {'database': None, 'etag': None, 'body': None}
+oui_all_cache_lock = threading.Lock()
+
+def get_oui_all_blob():
+    """Return (etag, gzip-compressed JSON) for the full OUI listing of the current database"""
+    database = oui_database
+    with oui_all_cache_lock:
+        if oui_all_cache['database'] is not database:
+            payload = json.dumps({
+                'status': 'success',
+                'results': [{'mac': mac, 'manufacturer': manufacturer} for mac, manufacturer in sorted(database.items())],
+                'count': len(database),
+                'total': len(database)
+            }, separators=(',', ':')).encode('utf-8')
+            oui_all_cache['etag'] = hashlib.sha1(payload).hexdigest()[:16]
+            oui_all_cache['body'] = gzip.compress(payload)
+            oui_all_cache['database'] = database
+        return oui_all_cache['etag'], oui_all_cache['body']
+
 @app.route('/api/oui/all')
 def get_all_oui():
-    """Get all OUI entries"""
-    global oui_database
-    
-    # Return all entries
-    results = []
-    for mac, manufacturer in oui_database.items():
-        results.append({
-            'mac': mac,
-            'manufacturer': manufacturer
+    """Get OUI entries in prefix order, paged with offset/limit or as one cached gzip blob"""
+    offset = request.args.get('offset', type=int)
+    limit = request.args.get('limit', type=int)
+    
+    if offset is not None or limit is not None:
+        database = oui_database
+        offset = max(offset or 0, 0)
+        limit = min(max(limit or 500, 1), 5000)
+        if isinstance(database, OUIIndex):
+            entries = database.items(offset, offset + limit)
+        else:
+            entries = sorted(database.items())[offset:offset + limit]
+        results = [{'mac': mac, 'manufacturer': manufacturer} for mac, manufacturer in entries]
+        next_offset = offset + len(results)
+        return jsonify({
+            'status': 'success',
+            'results': results,
+            'count': len(results),
+            'total': len(database),
+            'offset': offset,
+            'next_offset': next_offset if next_offset < len(database) else None
         })
     
-    return jsonify({
-        'status': 'success',
-        'results': results,
-        'count': len(results),
-        'total': len(oui_database)
-    })
+    etag, body = get_oui_all_blob()
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    elif 'gzip' in request.headers.get('Accept-Encoding', ''):
+        response = Response(body, mimetype='application/json')
+        response.headers['Content-Encoding'] = 'gzip'
+    else:
+        response = Response(gzip.decompress(body), mimetype='application/json')
+    response.set_etag(etag)
+    # Every variant carries the same ETag, so caches must key on Accept-Encoding too
+    response.headers['Vary'] = 'Accept-Encoding'
+    # Let browsers keep the blob but revalidate it, so a refreshed database shows up at once
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
 
 @app.route('/api/oui/refresh', methods=['POST'])
 def refresh_oui_database():
@@ -1139,7 +1099,7 @@ def refresh_oui_database():
         import os
         
         url = "https://standards-oui.ieee.org/oui/oui.txt"
-        print(f"Downloading OUI database from {url}...")
+        log.info("Downloading OUI database from %s...", url)
         
         req = urllib.request.Request(
             url,
@@ -1158,33 +1118,24 @@ def refresh_oui_database():
             with open(temp_path, 'wb') as out_file:
                 out_file.write(response.read())
                 
-        print(f"Downloaded file to {temp_path}, parsing...")
-        new_oui_database = {}
-        with open(temp_path, 'r', encoding='utf-8', errors='ignore') as f:
-            for line in f:
-                line = line.strip()
-                if line and not line.startswith('#') and '(hex)' in line:
-                    parts = line.split('(hex)')
-                    if len(parts) == 2:
-                        mac_prefix = parts[0].strip().replace('-', '').replace(' ', '').upper()
-                        manufacturer = parts[1].strip()
-                        if mac_prefix and manufacturer and len(mac_prefix) == 6:
-                            new_oui_database[mac_prefix] = manufacturer
-                            
-        print(f"Parsed {len(new_oui_database)} entries from downloaded file")
+        log.info("Downloaded file to %s, parsing...", temp_path)
+        new_oui_database = parse_oui_text(temp_path)
+        log.info("Parsed %d entries from downloaded file", len(new_oui_database))
         os.unlink(temp_path)
         
         if len(new_oui_database) < 1000:
             raise Exception(f"Downloaded database appears incomplete ({len(new_oui_database)} entries). File may be corrupted or format changed.")
 
-        oui_database = new_oui_database
-        
-        with open('oui.txt', 'w', encoding='utf-8') as f:
-            for mac, manufacturer in sorted(oui_database.items()):
+        with open(OUI_TEXT_FILE, 'w', encoding='utf-8') as f:
+            for mac, manufacturer in sorted(new_oui_database.items()):
                 formatted_mac = f"{mac[0:2]}-{mac[2:4]}-{mac[4:6]}"
                 f.write(f"{formatted_mac}   (hex)\t\t\t\t{manufacturer}\n")
+        
+        # Rebuild the binary index and swap it in
+        write_oui_index(new_oui_database, OUI_INDEX_FILE)
+        oui_database = OUIIndex(OUI_INDEX_FILE)
                 
-        print(f"Successfully refreshed OUI database with {len(oui_database)} entries")
+        log.info("Successfully refreshed OUI database with %d entries", len(oui_database))
         
         return jsonify({
             'status': 'success',
@@ -1205,9 +1156,7 @@ def refresh_oui_database():
             }), 500
         
     except Exception as e:
-        print(f"Error refreshing OUI database: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        log.exception("Error refreshing OUI database: %s", e)
         return jsonify({
             'status': 'error',
             'message': f'Failed to refresh database: {str(e)}'
@@ -1217,12 +1166,13 @@ def refresh_oui_database():
 # Socket.IO event handlers
 @socketio.on('connect')
 def handle_connect():
-    print(f"Client connected: {request.sid}")
+    log.info("Client connected: %s", request.sid)
 
 @socketio.on('disconnect')
 def handle_disconnect():
-    print(f"Client disconnected: {request.sid}")
+    log.info("Client disconnected: %s", request.sid)
     # Clean up any room memberships
+    serial_terminal.unsubscribe(request.sid)
     try:
         leave_room('serial_terminal')
     except:
@@ -1234,7 +1184,7 @@ def handle_heartbeat():
     try:
         emit('heartbeat_ack')
     except Exception as e:
-        print(f"Heartbeat response error: {e}")
+        log.warning("Heartbeat response error: %s", e)
 
 def send_heartbeat():
     """Send periodic heartbeat to all clients"""
@@ -1244,22 +1194,22 @@ def send_heartbeat():
                 safe_socket_emit('heartbeat', {})
                 time.sleep(30)  # Send heartbeat every 30 seconds
             except Exception as e:
-                print(f"Heartbeat error: {e}")
+                log.warning("Heartbeat error: %s", e)
                 time.sleep(5)
 
 @socketio.on('request_serial_terminal')
 def handle_serial_terminal_request(data):
     """Handle serial terminal connection request"""
-    global serial_data_buffer
     port = data.get('port')
     
-    print(f"Serial terminal request from {request.sid} for port: {port}")
+    log.info("Serial terminal request from %s for port: %s", request.sid, port)
     
     if not port:
         emit('serial_error', {'message': 'No port specified'})
         return
     
-    if not flock_device_connected or flock_device_port != port:
+    device = flock_devices.get(port)
+    if not device or not device.connected:
         emit('serial_error', {'message': 'Device not connected. Please connect to the Sniffer device first.'})
         return
     
@@ -1268,27 +1218,39 @@ def handle_serial_terminal_request(data):
         join_room('serial_terminal')
         emit('serial_connected')
         
-        # Send recent buffer data
-        buffer_count = len(serial_data_buffer)
-        print(f"Sending {min(50, buffer_count)} recent lines to terminal")
-        for line in serial_data_buffer[-50:]:  # Send last 50 lines
-            emit('serial_data', line)
+        # Send the last 50 buffered lines as one batch
+        recent = serial_terminal.subscribe(request.sid, recent=50)
+        log.debug("Sending %d recent lines to terminal", len(recent))
+        if recent:
+            emit('serial_data_batch', recent)
         
-        print(f"Serial terminal connected for client {request.sid}")
+        log.info("Serial terminal connected for client %s", request.sid)
         
     except Exception as e:
-        print(f"Serial terminal connection error: {e}")
+        log.error("Serial terminal connection error: %s", e)
         emit('serial_error', {'message': f'Failed to start terminal: {str(e)}'})
 
+@socketio.on('leave_serial_terminal')
+def handle_serial_terminal_leave():
+    """Stop streaming raw serial lines to a client that closed its terminal"""
+    serial_terminal.unsubscribe(request.sid)
+    leave_room('serial_terminal')
+
 if __name__ == '__main__':
     # Load data on startup
     load_oui_database()
     load_cumulative_detections()
     load_settings()
     
-    # Start connection monitor thread
-    monitor_thread = threading.Thread(target=connection_monitor, daemon=True)
-    monitor_thread.start()
+    # Fold the journal into the snapshot in the background
+    cumulative_journal.start_compactor(lambda: cumulative_detections)
+    
+    # Start batched detection update emitter
+    if DETECTION_UPDATE_WINDOW > 0:
+        detection_update_coalescer.start()
+    
+    # Watch for serial ports being plugged in and removed
+    port_inventory.start()
     
     # Start heartbeat thread
     heartbeat_thread = threading.Thread(target=send_heartbeat, daemon=True)
@@ -1303,9 +1265,7 @@ if __name__ == '__main__':
     except KeyboardInterrupt:
         print("\nShutting down server...")
         # Clean up connections
-        if flock_serial_connection and flock_serial_connection.is_open:
-            flock_serial_connection.close()
-        if serial_connection and serial_connection.is_open:
-            serial_connection.close()
+        serial_io.stop_all()
+        save_cumulative_detections()
         print("Server stopped.")
         
\ No newline at end of file
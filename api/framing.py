@@ -0,0 +1,270 @@
+"""Binary detection frames on the Flock device serial link.
+
+With SERIAL_BINARY_OUTPUT enabled the firmware (src/main.cpp) sends each
+detection as one frame instead of a JSON line:
+
+    0xFE | payload length (uint16 LE) | MessagePack map | CRC-16 (uint16 LE)
+
+The CRC is CRC-16/CCITT-FALSE over the payload. 0xFE never occurs in UTF-8
+text, so frames and text lines (JSON detections, boot and debug messages)
+can share the stream and are told apart by their first byte.
+
+Decode a recorded byte stream with: python framing.py capture.bin
+"""
+import binascii
+import struct
+import sys
+
+FRAME_MAGIC = 0xFE
+FRAME_HEADER_SIZE = 3   # magic + uint16 length
+FRAME_TRAILER_SIZE = 2  # uint16 CRC
+MAX_FRAME_PAYLOAD = 1024
+
+# Lines longer than this without a newline are treated as line noise and discarded
+MAX_LINE_BYTES = 8192
+
+
+def frame_crc(payload):
+    return binascii.crc_hqx(payload, 0xFFFF)
+
+
+def encode_frame(payload):
+    """Wrap a MessagePack payload in a frame header and CRC"""
+    if len(payload) > MAX_FRAME_PAYLOAD:
+        raise ValueError(f'frame payload too large ({len(payload)} bytes)')
+    return struct.pack('<BH', FRAME_MAGIC, len(payload)) + payload + struct.pack('<H', frame_crc(payload))
+
+
+class StreamFramer:
+    """Splits a serial byte stream into text lines and binary frame payloads.
+
+    feed() returns the complete items found so far: a str for each non-empty
+    text line and a bytes payload for each frame whose CRC checks out. A bad
+    frame is skipped one byte at a time until the stream resynchronises.
+    """
+
+    def __init__(self, max_line_bytes=MAX_LINE_BYTES):
+        self.max_line_bytes = max_line_bytes
+        self.buffer = b''
+        self.overlong_lines = 0
+        self.frame_errors = 0
+
+    def feed(self, chunk):
+        buf = self.buffer + chunk if self.buffer else chunk
+        items = []
+        pos = 0
+        size = len(buf)
+        while pos < size:
+            if buf[pos] == FRAME_MAGIC:
+                if size - pos < FRAME_HEADER_SIZE:
+                    break
+                length = buf[pos + 1] | (buf[pos + 2] << 8)
+                if length > MAX_FRAME_PAYLOAD:
+                    self.frame_errors += 1
+                    pos += 1
+                    continue
+                start = pos + FRAME_HEADER_SIZE
+                end = start + length + FRAME_TRAILER_SIZE
+                if end > size:
+                    break
+                payload = buf[start:start + length]
+                if frame_crc(payload) != (buf[end - 2] | (buf[end - 1] << 8)):
+                    self.frame_errors += 1
+                    pos += 1
+                    continue
+                items.append(payload)
+                pos = end
+                continue
+
+            # Text runs to the next newline, or is cut short by the start of a frame
+            newline = buf.find(b'\n', pos)
+            magic = buf.find(FRAME_MAGIC, pos, newline if newline != -1 else size)
+            if magic != -1:
+                end = next_pos = magic
+            elif newline != -1:
+                end, next_pos = newline, newline + 1
+            else:
+                if size - pos > self.max_line_bytes:
+                    self.overlong_lines += 1
+                    pos = size
+                break
+
+            line = buf[pos:end].decode('utf-8', errors='ignore').strip()
+            if line:
+                items.append(line)
+            pos = next_pos
+
+        self.buffer = buf[pos:]
+        return items
+
+
+def iter_stream(data, chunk_size=4096):
+    """Items from a recorded byte stream, fed in serial-read-sized chunks"""
+    framer = StreamFramer()
+    for offset in range(0, len(data), chunk_size):
+        yield from framer.feed(data[offset:offset + chunk_size])
+
+
+# Minimal MessagePack (the subset ArduinoJson's serializeMsgPack produces)
+
+def _unpack(data, pos):
+    code = data[pos]
+    pos += 1
+    if code <= 0x7f:
+        return code, pos
+    if code >= 0xe0:
+        return code - 0x100, pos
+    if 0xa0 <= code <= 0xbf:
+        end = pos + (code & 0x1f)
+        return data[pos:end].decode('utf-8'), end
+    if 0x90 <= code <= 0x9f:
+        return _unpack_array(data, pos, code & 0x0f)
+    if 0x80 <= code <= 0x8f:
+        return _unpack_map(data, pos, code & 0x0f)
+    if code == 0xc0:
+        return None, pos
+    if code == 0xc2:
+        return False, pos
+    if code == 0xc3:
+        return True, pos
+
+    fmt = _FIXED_FORMATS.get(code)
+    if fmt is not None:
+        end = pos + struct.calcsize(fmt)
+        if end > len(data):
+            raise ValueError('truncated MessagePack value')
+        return struct.unpack_from(fmt, data, pos)[0], end
+
+    sized = _SIZED_FORMATS.get(code)
+    if sized is None:
+        raise ValueError(f'unsupported MessagePack type 0x{code:02x}')
+    kind, fmt = sized
+    count = struct.unpack_from(fmt, data, pos)[0]
+    pos += struct.calcsize(fmt)
+    if kind == 'str':
+        return data[pos:pos + count].decode('utf-8'), pos + count
+    if kind == 'bin':
+        return bytes(data[pos:pos + count]), pos + count
+    if kind == 'array':
+        return _unpack_array(data, pos, count)
+    return _unpack_map(data, pos, count)
+
+
+def _unpack_array(data, pos, count):
+    items = []
+    for _ in range(count):
+        item, pos = _unpack(data, pos)
+        items.append(item)
+    return items, pos
+
+
+def _unpack_map(data, pos, count):
+    result = {}
+    for _ in range(count):
+        key, pos = _unpack(data, pos)
+        if type(key) is str:
+            # Field names repeat in every frame; share one copy
+            key = sys.intern(key)
+        result[key], pos = _unpack(data, pos)
+    return result, pos
+
+
+_FIXED_FORMATS = {
+    0xca: '>f', 0xcb: '>d',
+    0xcc: '>B', 0xcd: '>H', 0xce: '>I', 0xcf: '>Q',
+    0xd0: '>b', 0xd1: '>h', 0xd2: '>i', 0xd3: '>q'
+}
+
+_SIZED_FORMATS = {
+    0xd9: ('str', '>B'), 0xda: ('str', '>H'), 0xdb: ('str', '>I'),
+    0xc4: ('bin', '>B'), 0xc5: ('bin', '>H'), 0xc6: ('bin', '>I'),
+    0xdc: ('array', '>H'), 0xdd: ('array', '>I'),
+    0xde: ('map', '>H'), 0xdf: ('map', '>I')
+}
+
+
+_UNSIGNED_INT_FORMATS = ((0xcc, '>B'), (0xcd, '>H'), (0xce, '>I'), (0xcf, '>Q'))
+_SIGNED_INT_FORMATS = ((0xd0, '>b'), (0xd1, '>h'), (0xd2, '>i'), (0xd3, '>q'))
+
+
+def unpackb(data):
+    """Decode one MessagePack value; raises ValueError for malformed input"""
+    try:
+        value, end = _unpack(data, 0)
+    except (IndexError, TypeError, struct.error, UnicodeDecodeError) as e:
+        raise ValueError(f'malformed MessagePack: {e}')
+    if end != len(data):
+        raise ValueError('trailing bytes after MessagePack value')
+    return value
+
+
+def packb(value):
+    """Encode a value as MessagePack (for recordings and replay)"""
+    if value is None:
+        return b'\xc0'
+    if value is True:
+        return b'\xc3'
+    if value is False:
+        return b'\xc2'
+    if isinstance(value, int):
+        if 0 <= value <= 0x7f:
+            return bytes([value])
+        if -32 <= value < 0:
+            return bytes([value + 0x100])
+        for code, fmt in _SIGNED_INT_FORMATS if value < 0 else _UNSIGNED_INT_FORMATS:
+            try:
+                return bytes([code]) + struct.pack(fmt, value)
+            except struct.error:
+                continue
+        raise ValueError(f'integer out of range: {value}')
+    if isinstance(value, float):
+        return b'\xcb' + struct.pack('>d', value)
+    if isinstance(value, str):
+        raw = value.encode('utf-8')
+        if len(raw) <= 31:
+            return bytes([0xa0 | len(raw)]) + raw
+        return _sized_header(len(raw), 0xd9, 0xda, 0xdb) + raw
+    if isinstance(value, (bytes, bytearray)):
+        return _sized_header(len(value), 0xc4, 0xc5, 0xc6) + bytes(value)
+    if isinstance(value, (list, tuple)):
+        header = bytes([0x90 | len(value)]) if len(value) <= 15 else _sized_header(len(value), None, 0xdc, 0xdd)
+        return header + b''.join(packb(item) for item in value)
+    if isinstance(value, dict):
+        header = bytes([0x80 | len(value)]) if len(value) <= 15 else _sized_header(len(value), None, 0xde, 0xdf)
+        return header + b''.join(packb(k) + packb(v) for k, v in value.items())
+    raise TypeError(f'cannot pack {type(value).__name__}')
+
+
+def _sized_header(length, code8, code16, code32):
+    if code8 is not None and length <= 0xff:
+        return struct.pack('>BB', code8, length)
+    if length <= 0xffff:
+        return struct.pack('>BH', code16, length)
+    return struct.pack('>BI', code32, length)
+
+
+def main():
+    if len(sys.argv) != 2:
+        print('Usage: python framing.py <capture.bin>')
+        sys.exit(1)
+    with open(sys.argv[1], 'rb') as f:
+        data = f.read()
+
+    framer = StreamFramer()
+    lines = frames = 0
+    for item in framer.feed(data):
+        if isinstance(item, str):
+            lines += 1
+            print(f"line  {item}")
+        else:
+            frames += 1
+            try:
+                print(f"frame {unpackb(item)}")
+            except ValueError as e:
+                print(f"frame <undecodable: {e}>")
+    print(f"{lines} lines, {frames} frames, {framer.frame_errors} frame errors, "
+          f"{framer.overlong_lines} overlong lines, {len(framer.buffer)} trailing bytes")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,149 @@
+import math
+import threading
+
+EARTH_RADIUS_M = 6371000.0
+
+
+class GPSHistory:
+    """Fixed-capacity ring buffer of GPS fixes ordered by system timestamp.
+
+    Lookups binary-search the buffer for the fixes on either side of a
+    timestamp, so a larger capacity does not make matching slower.
+    """
+
+    def __init__(self, capacity=3600):
+        self.capacity = capacity
+        self.times = [0.0] * capacity
+        self.entries = [None] * capacity
+        self.start = 0  # Physical slot of the oldest fix
+        self.size = 0
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return self.size
+
+    def _slot(self, i):
+        return (self.start + i) % self.capacity
+
+    def append(self, entry):
+        """Add a fix; entry must carry a 'system_timestamp'"""
+        timestamp = entry['system_timestamp']
+        with self.lock:
+            if self.size and timestamp < self.times[self._slot(self.size - 1)]:
+                # The system clock went backwards; older fixes can no longer be ordered against new ones
+                self.start = 0
+                self.size = 0
+
+            if self.size < self.capacity:
+                slot = self._slot(self.size)
+                self.size += 1
+            else:
+                slot = self.start
+                self.start = (self.start + 1) % self.capacity
+
+            self.times[slot] = timestamp
+            self.entries[slot] = entry
+
+    def clear(self):
+        with self.lock:
+            self.start = 0
+            self.size = 0
+
+    def latest(self):
+        with self.lock:
+            if not self.size:
+                return None
+            return self.entries[self._slot(self.size - 1)]
+
+    def bracket(self, timestamp):
+        """Return the fixes at or before and after timestamp (either may be None)"""
+        with self.lock:
+            lo, hi = 0, self.size
+            while lo < hi:
+                mid = (lo + hi) // 2
+                if self.times[self._slot(mid)] <= timestamp:
+                    lo = mid + 1
+                else:
+                    hi = mid
+            before = self.entries[self._slot(lo - 1)] if lo > 0 else None
+            after = self.entries[self._slot(lo)] if lo < self.size else None
+            return before, after
+
+    def match(self, timestamp, threshold, max_gap=10):
+        """Find the best position for timestamp.
+
+        When fixes exist on both sides within threshold and no more than
+        max_gap seconds apart, latitude, longitude and altitude are linearly
+        interpolated and the result is flagged 'interpolated'. A live
+        detection usually arrives before the next fix exists, so when the
+        latest fix is behind timestamp (by no more than max_gap) and carries
+        speed and course, the position is projected forward from it and
+        flagged 'extrapolated'. Otherwise the nearest fix within threshold is
+        returned, or None.
+        """
+        before, after = self.bracket(timestamp)
+        before_diff = timestamp - before['system_timestamp'] if before else None
+        after_diff = after['system_timestamp'] - timestamp if after else None
+
+        if before and after and before_diff <= threshold and after_diff <= threshold:
+            gap = after['system_timestamp'] - before['system_timestamp']
+            if 0 < gap <= max_gap:
+                return interpolate_fix(before, after, before_diff / gap)
+
+        if before and after is None and 0 < before_diff <= min(threshold, max_gap):
+            if before.get('speed_kmh') is not None and before.get('course') is not None:
+                return extrapolate_fix(before, before_diff)
+
+        candidates = []
+        if before and before_diff <= threshold:
+            candidates.append((before_diff, before))
+        if after and after_diff <= threshold:
+            candidates.append((after_diff, after))
+        if not candidates:
+            return None
+        return min(candidates, key=lambda candidate: candidate[0])[1]
+
+
+def interpolate_fix(before, after, fraction):
+    """Linearly interpolate position between two fixes (fraction 0 = before, 1 = after)"""
+    nearest = before if fraction <= 0.5 else after
+    result = nearest.copy()
+
+    lon_delta = after['longitude'] - before['longitude']
+    # Take the short way around when the track crosses the antimeridian
+    if lon_delta > 180:
+        lon_delta -= 360
+    elif lon_delta < -180:
+        lon_delta += 360
+    longitude = before['longitude'] + fraction * lon_delta
+    if longitude > 180:
+        longitude -= 360
+    elif longitude < -180:
+        longitude += 360
+
+    result['latitude'] = round(before['latitude'] + fraction * (after['latitude'] - before['latitude']), 8)
+    result['longitude'] = round(longitude, 8)
+    if before.get('altitude') is not None and after.get('altitude') is not None:
+        result['altitude'] = round(before['altitude'] + fraction * (after['altitude'] - before['altitude']), 3)
+    result['interpolated'] = True
+    return result
+
+
+def extrapolate_fix(fix, seconds):
+    """Project a fix forward along its course at its speed for seconds"""
+    result = fix.copy()
+    distance = fix['speed_kmh'] / 3.6 * seconds
+    course = math.radians(fix['course'])
+    latitude = fix['latitude'] + math.degrees(distance * math.cos(course) / EARTH_RADIUS_M)
+    # Meridians converge towards the poles; keep the cosine away from zero
+    cos_lat = max(math.cos(math.radians(fix['latitude'])), 1e-6)
+    longitude = fix['longitude'] + math.degrees(distance * math.sin(course) / (EARTH_RADIUS_M * cos_lat))
+    if longitude > 180:
+        longitude -= 360
+    elif longitude < -180:
+        longitude += 360
+
+    result['latitude'] = round(max(-90.0, min(90.0, latitude)), 8)
+    result['longitude'] = round(longitude, 8)
+    result['extrapolated'] = True
+    return result
@@ -0,0 +1,138 @@
+import contextlib
+import logging
+import queue
+import threading
+import time
+
+from framing import StreamFramer
+
+log = logging.getLogger('flockyou.ingest')
+
+
+class SerialIngest:
+    """Serial ingest pipeline: port reads -> parse worker -> enrich worker.
+
+    feed() only splits raw bytes into lines and frames, so the serial I/O
+    loop keeps up with the link rate. Parsing and enrichment run on their
+    own threads behind bounded queues shared by every source; when a queue
+    is full the newest item is dropped and counted rather than stalling the
+    reads and overflowing the device's buffer.
+    """
+
+    def __init__(self, name, parse_line, handle_record, line_queue_size=4096,
+                 record_queue_size=4096, context=None):
+        self.name = name
+        self.parse_line = parse_line        # (line, received_at, source) -> record or None
+        self.handle_record = handle_record  # (record, received_at) -> None
+        self.context = context or contextlib.nullcontext
+        self.lines = queue.Queue(maxsize=line_queue_size)
+        self.records = queue.Queue(maxsize=record_queue_size)
+        self.lock = threading.Lock()
+        self.workers = []
+        self.framers = {}  # source -> StreamFramer holding that port's partial line or frame
+        self.stats = {
+            'lines_read': 0,
+            'lines_dropped': 0,
+            'overlong_lines': 0,
+            'frames_read': 0,
+            'frame_errors': 0,
+            'records_parsed': 0,
+            'records_dropped': 0,
+            'records_processed': 0,
+            'parse_errors': 0,
+            'process_errors': 0,
+            'line_queue_peak': 0,
+            'record_queue_peak': 0,
+            'last_drop_time': None
+        }
+
+    def _count(self, key, amount=1):
+        with self.lock:
+            self.stats[key] += amount
+
+    def _offer(self, target, item, dropped_key, peak_key):
+        try:
+            target.put_nowait(item)
+        except queue.Full:
+            with self.lock:
+                self.stats[dropped_key] += 1
+                self.stats['last_drop_time'] = time.time()
+            return False
+        depth = target.qsize()
+        with self.lock:
+            if depth > self.stats[peak_key]:
+                self.stats[peak_key] = depth
+        return True
+
+    def start_workers(self):
+        """Start the parse and enrich workers (idempotent)"""
+        with self.lock:
+            if self.workers:
+                return
+            self.workers = [
+                threading.Thread(target=self._parse_worker, name=f"{self.name}-parse", daemon=True),
+                threading.Thread(target=self._enrich_worker, name=f"{self.name}-enrich", daemon=True)
+            ]
+        for worker in self.workers:
+            worker.start()
+
+    def submit_line(self, line, received_at=None, source=None):
+        """Queue a text line (str) or binary frame payload (bytes) for parsing without blocking"""
+        self._count('lines_read' if isinstance(line, str) else 'frames_read')
+        return self._offer(self.lines, (line, received_at or time.time(), source), 'lines_dropped', 'line_queue_peak')
+
+    def feed(self, source, chunk, received_at):
+        """Split bytes read from source into lines and frames and queue them.
+
+        Called from the serial I/O loop, so it never blocks.
+        """
+        self.start_workers()
+        framer = self.framers.get(source)
+        if framer is None:
+            framer = self.framers[source] = StreamFramer()
+        overlong, frame_errors = framer.overlong_lines, framer.frame_errors
+        for item in framer.feed(chunk):
+            self.submit_line(item, received_at, source)
+        if framer.overlong_lines != overlong or framer.frame_errors != frame_errors:
+            with self.lock:
+                self.stats['overlong_lines'] += framer.overlong_lines - overlong
+                self.stats['frame_errors'] += framer.frame_errors - frame_errors
+
+    def reset_source(self, source):
+        """Forget any partial line from source (e.g. after its port reconnects)"""
+        self.framers.pop(source, None)
+
+    def _parse_worker(self):
+        with self.context():
+            while True:
+                line, received_at, source = self.lines.get()
+                try:
+                    record = self.parse_line(line, received_at, source)
+                except Exception as e:
+                    self._count('parse_errors')
+                    log.error("%s parse error: %s", self.name, e)
+                    continue
+                if record is not None:
+                    self._count('records_parsed')
+                    self._offer(self.records, (record, received_at), 'records_dropped', 'record_queue_peak')
+
+    def _enrich_worker(self):
+        with self.context():
+            while True:
+                record, received_at = self.records.get()
+                try:
+                    self.handle_record(record, received_at)
+                    self._count('records_processed')
+                except Exception as e:
+                    self._count('process_errors')
+                    log.error("%s processing error: %s", self.name, e)
+
+    def snapshot(self):
+        """Counters plus current queue depths"""
+        with self.lock:
+            stats = dict(self.stats)
+        stats['line_queue_depth'] = self.lines.qsize()
+        stats['line_queue_capacity'] = self.lines.maxsize
+        stats['record_queue_depth'] = self.records.qsize()
+        stats['record_queue_capacity'] = self.records.maxsize
+        return stats
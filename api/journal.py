@@ -0,0 +1,178 @@
+import logging
+import os
+import pickle
+import threading
+import time
+
+log = logging.getLogger('flockyou.journal')
+
+# Journal record kinds
+RECORD_INSERT = 'i'
+RECORD_UPDATE = 'u'
+
+SNAPSHOT_VERSION = 1
+
+
+class DetectionJournal:
+    """Snapshot plus append-only journal backing the cumulative detection list.
+
+    Every insert or update appends one small pickled record to the journal, so
+    the cost of a sighting does not depend on how much history is stored. A
+    background compactor periodically folds the journal into a fresh snapshot.
+    """
+
+    def __init__(self, snapshot_path, journal_path, compact_threshold=5000):
+        self.snapshot_path = snapshot_path
+        self.journal_path = journal_path
+        self.compacting_path = journal_path.with_name(journal_path.name + '.compacting')
+        self.compact_threshold = compact_threshold
+        self.lock = threading.RLock()
+        self.compact_lock = threading.Lock()
+        self.seq = 0
+        self.pending = 0  # Journal records written since the last snapshot
+        self._journal_file = None
+        self._compactor_thread = None
+
+    def load(self):
+        """Load the snapshot and replay any journal records written after it"""
+        records = []
+        snapshot_seq = 0
+
+        if self.snapshot_path.exists():
+            with open(self.snapshot_path, 'rb') as f:
+                snapshot = pickle.load(f)
+            if isinstance(snapshot, list):
+                # Legacy format: a bare pickled list of detections
+                records = snapshot
+            else:
+                records = snapshot.get('detections', [])
+                snapshot_seq = snapshot.get('seq', 0)
+
+        self.seq = snapshot_seq
+        self.pending = 0
+        for path in (self.compacting_path, self.journal_path):
+            self._replay(path, records, snapshot_seq)
+
+        return records
+
+    def _replay(self, path, records, snapshot_seq):
+        if not path.exists():
+            return
+
+        damaged_at = None
+        with open(path, 'rb') as f:
+            while True:
+                offset = f.tell()
+                try:
+                    kind, seq, index, record = pickle.load(f)
+                except EOFError:
+                    if f.tell() != offset:
+                        damaged_at = offset  # Partial record at the very end
+                    break
+                except Exception as e:
+                    # A torn write at the tail of the journal is expected after a crash
+                    log.warning("Stopped journal replay of %s at a damaged record: %s", path.name, e)
+                    damaged_at = offset
+                    break
+
+                self.seq = max(self.seq, seq)
+                if seq <= snapshot_seq:
+                    continue
+
+                self.pending += 1
+                if kind == RECORD_INSERT:
+                    records.append(record)
+                elif kind == RECORD_UPDATE and 0 <= index < len(records):
+                    records[index] = record
+
+        if damaged_at is not None:
+            # Cut the damage off, or records appended after it would be unreadable next time
+            log.warning("Truncating %s to %d bytes to drop a damaged record", path.name, damaged_at)
+            os.truncate(path, damaged_at)
+
+    def _write(self, kind, index, record):
+        if self._journal_file is None:
+            self._journal_file = open(self.journal_path, 'ab')
+        self.seq += 1
+        self._journal_file.write(pickle.dumps((kind, self.seq, index, record), protocol=pickle.HIGHEST_PROTOCOL))
+        self._journal_file.flush()
+        self.pending += 1
+
+    def append(self, records, detection):
+        """Append a detection to records and journal the insert"""
+        with self.lock:
+            records.append(detection)
+            try:
+                self._write(RECORD_INSERT, len(records) - 1, dict(detection))
+            except Exception as e:
+                log.error("Error writing detection journal: %s", e)
+
+    def update(self, records, index, changes):
+        """Merge changes into records[index] and journal the new record"""
+        with self.lock:
+            records[index].update(changes)
+            try:
+                self._write(RECORD_UPDATE, index, dict(records[index]))
+            except Exception as e:
+                log.error("Error writing detection journal: %s", e)
+
+    def compact(self, records):
+        """Write a full snapshot of records and discard the journal it covers"""
+        # One compaction at a time: a second one would rotate the journal over
+        # the .compacting file before the first snapshot had replaced it
+        with self.compact_lock:
+            return self._compact(records)
+
+    def _compact(self, records):
+        with self.lock:
+            seq = self.seq
+            items = list(records)
+            # Rotate the journal so new records keep flowing while the snapshot is written
+            if self._journal_file is not None:
+                self._journal_file.close()
+                self._journal_file = None
+            if self.journal_path.exists():
+                os.replace(self.journal_path, self.compacting_path)
+            self.pending = 0
+
+        # Copied outside the append lock. A record updated meanwhile may be newer
+        # than seq, which is harmless: its update record replays the full record.
+        snapshot = {
+            'version': SNAPSHOT_VERSION,
+            'seq': seq,
+            'detections': [dict(d) for d in items]
+        }
+
+        tmp_path = self.snapshot_path.with_name(self.snapshot_path.name + '.tmp')
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.snapshot_path)
+
+        if self.compacting_path.exists():
+            self.compacting_path.unlink()
+
+        return len(snapshot['detections'])
+
+    def start_compactor(self, get_records, interval=30):
+        """Start a background thread that compacts once enough records are pending"""
+        def compactor():
+            while True:
+                time.sleep(interval)
+                if self.pending < self.compact_threshold:
+                    continue
+                try:
+                    count = self.compact(get_records())
+                    log.info("Compacted detection journal into snapshot (%d detections)", count)
+                except Exception as e:
+                    log.error("Error compacting detection journal: %s", e)
+
+        self._compactor_thread = threading.Thread(target=compactor, daemon=True)
+        self._compactor_thread.start()
+
+    def close(self):
+        with self.lock:
+            if self._journal_file is not None:
+                self._journal_file.close()
+                self._journal_file = None
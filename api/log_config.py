@@ -0,0 +1,120 @@
+import atexit
+import logging
+import logging.handlers
+import queue
+import sys
+import threading
+import time
+
+# Logging profiles selectable with the LOG_PROFILE environment variable
+LOG_PROFILES = {
+    # Everything, including per-line serial and GPS matching chatter, unthrottled
+    'verbose': {'level': logging.DEBUG, 'rate_limit': None, 'socketio_logger': True},
+    # Connection events, new detections and problems, each message type throttled
+    'default': {'level': logging.INFO, 'rate_limit': (1.0, 5), 'socketio_logger': False},
+    # Warnings and errors only, for unattended deployments
+    'quiet': {'level': logging.WARNING, 'rate_limit': (5.0, 3), 'socketio_logger': False}
+}
+
+_listener = None
+
+
+class RateLimitFilter(logging.Filter):
+    """Token bucket per message type (logger name + unformatted message).
+
+    Each type may emit burst records, refilled at one per interval seconds.
+    Suppressed records are counted and the count is appended to the next
+    record of that type that gets through.
+    """
+
+    def __init__(self, interval=1.0, burst=5):
+        super().__init__()
+        self.interval = interval
+        self.burst = burst
+        self.lock = threading.Lock()
+        self.buckets = {}  # key -> [tokens, last refill time, suppressed count]
+
+    def filter(self, record):
+        if record.levelno >= logging.ERROR:
+            return True
+
+        key = (record.name, record.msg)
+        now = time.monotonic()
+        with self.lock:
+            bucket = self.buckets.get(key)
+            if bucket is None:
+                bucket = self.buckets[key] = [float(self.burst), now, 0]
+            else:
+                bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) / self.interval)
+                bucket[1] = now
+
+            if bucket[0] < 1:
+                bucket[2] += 1
+                return False
+
+            bucket[0] -= 1
+            suppressed, bucket[2] = bucket[2], 0
+
+        if suppressed:
+            record.msg = f"{record.msg} [{suppressed} similar suppressed]"
+        return True
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that leaves all formatting to the listener thread.
+
+    The stock prepare() formats the message on the calling thread so the
+    record can be pickled. These records never leave the process, so they
+    are queued untouched and the %-interpolation happens on the listener.
+    Arguments are therefore read when the record is written, not when it
+    was logged.
+    """
+
+    def prepare(self, record):
+        return record
+
+
+def _stop_listener():
+    # Flushes anything still queued at interpreter exit
+    if _listener is not None:
+        _listener.stop()
+
+
+def configure_logging(profile='default'):
+    """Route the 'flockyou' loggers through a queue to a background stdout writer.
+
+    Returns the profile settings that were applied.
+    """
+    global _listener
+
+    settings = LOG_PROFILES.get(profile)
+    if settings is None:
+        print(f"Unknown LOG_PROFILE '{profile}', using 'default'")
+        settings = LOG_PROFILES['default']
+
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)-7s %(name)s: %(message)s', '%H:%M:%S'))
+
+    # Callers only enqueue records; formatting and console I/O happen on the listener thread
+    log_queue = queue.SimpleQueue()
+    queue_handler = DeferredQueueHandler(log_queue)
+    if settings['rate_limit']:
+        interval, burst = settings['rate_limit']
+        queue_handler.addFilter(RateLimitFilter(interval, burst))
+
+    if _listener is not None:
+        _listener.stop()
+    else:
+        atexit.register(_stop_listener)
+    _listener = logging.handlers.QueueListener(log_queue, stream_handler)
+    _listener.start()
+
+    logger = logging.getLogger('flockyou')
+    logger.handlers[:] = [queue_handler]
+    logger.setLevel(settings['level'])
+    logger.propagate = False
+
+    # Keep Flask's per-request access log out of the hot path unless asked for
+    logging.getLogger('werkzeug').setLevel(logging.INFO if settings['level'] <= logging.DEBUG else logging.ERROR)
+
+    return settings
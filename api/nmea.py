@@ -0,0 +1,185 @@
+"""NMEA 0183 sentence parsing for the GPS receiver.
+
+Only the sentences the server uses are decoded: GGA (position, fix quality,
+satellites, altitude), RMC (position, speed and course) and VTG (speed and
+course). The talker prefix is ignored, so GP, GN, GL, GA and BD sentences
+are all accepted. Sentences whose checksum is missing or wrong are rejected.
+
+Check a recorded NMEA log with: python nmea.py drive.nmea
+"""
+import sys
+
+KNOTS_TO_KMH = 1.852
+
+
+def checksum_ok(sentence):
+    """True if sentence ends in a *HH checksum matching the XOR of its body"""
+    star = sentence.rfind('*')
+    if star < 1 or len(sentence) < star + 3:
+        return False
+    try:
+        expected = int(sentence[star + 1:star + 3], 16)
+    except ValueError:
+        return False
+    checksum = 0
+    for byte in sentence[1:star].encode('ascii', errors='replace'):
+        checksum ^= byte
+    return checksum == expected
+
+
+def _coordinate(raw, direction, degree_digits):
+    """DDMM.MMMM (or DDDMM.MMMM) and a hemisphere to signed decimal degrees"""
+    if not raw:
+        return None
+    value = int(raw[:degree_digits]) + float(raw[degree_digits:]) / 60.0
+    return -value if direction in ('S', 'W') else value
+
+
+def _float(field):
+    return float(field) if field else None
+
+
+def _parse_gga(fields):
+    if len(fields) < 10:
+        return None
+    fix_quality = int(fields[6]) if fields[6] else 0
+    lat = _coordinate(fields[2], fields[3], 2)
+    lon = _coordinate(fields[4], fields[5], 3)
+    return {
+        'type': 'GGA',
+        'timestamp': fields[1],
+        'latitude': round(lat, 8) if lat is not None else None,  # 8 decimal places for ~1.1mm accuracy
+        'longitude': round(lon, 8) if lon is not None else None,
+        'fix_quality': fix_quality if lat is not None and lon is not None else 0,
+        'satellites': int(fields[7]) if fields[7] else 0,
+        'hdop': _float(fields[8]) or 0,  # Horizontal Dilution of Precision
+        'altitude': round(_float(fields[9]) or 0, 3)
+    }
+
+
+def _parse_rmc(fields):
+    if len(fields) < 10:
+        return None
+    valid = fields[2] == 'A'
+    lat = _coordinate(fields[3], fields[4], 2) if valid else None
+    lon = _coordinate(fields[5], fields[6], 3) if valid else None
+    knots = _float(fields[7])
+    return {
+        'type': 'RMC',
+        'timestamp': fields[1],
+        'date': fields[9],
+        'valid': valid and lat is not None and lon is not None,
+        'latitude': round(lat, 8) if lat is not None else None,
+        'longitude': round(lon, 8) if lon is not None else None,
+        'speed_kmh': round(knots * KNOTS_TO_KMH, 2) if knots is not None and valid else None,
+        'course': _float(fields[8]) if valid else None
+    }
+
+
+def _parse_vtg(fields):
+    if len(fields) < 8:
+        return None
+    # A mode indicator of N (NMEA 2.3+) means the values are not valid
+    if len(fields) > 9 and fields[9] == 'N':
+        return None
+    kmh = _float(fields[7])
+    if kmh is None and fields[5]:
+        kmh = float(fields[5]) * KNOTS_TO_KMH
+    return {
+        'type': 'VTG',
+        'speed_kmh': round(kmh, 2) if kmh is not None else None,
+        'course': _float(fields[1])
+    }
+
+
+_PARSERS = {'GGA': _parse_gga, 'RMC': _parse_rmc, 'VTG': _parse_vtg}
+
+
+def parse_sentence(sentence):
+    """Decode one GGA, RMC or VTG sentence into a dict with a 'type' key.
+
+    Returns None for other sentence types and for sentences that fail the
+    checksum or are malformed.
+    """
+    if len(sentence) < 9 or sentence[0] != '$':
+        return None
+    parser = _PARSERS.get(sentence[3:6])
+    if parser is None or not checksum_ok(sentence):
+        return None
+    try:
+        return parser(sentence[:sentence.rfind('*')].split(','))
+    except (ValueError, IndexError):
+        return None
+
+
+class NMEAParser:
+    """Combines sentences from one receiver into a running fix.
+
+    feed() returns the updated fix for each sentence that carries a position
+    (GGA, or RMC from receivers that do not send GGA) and None otherwise.
+    Speed and course from RMC and VTG are carried into the next fix.
+    """
+
+    def __init__(self):
+        self.speed_kmh = None
+        self.course = None
+        self.gga_seen = False
+        self.checksum_errors = 0
+        self.sentences = 0
+
+    def feed(self, sentence):
+        parsed = parse_sentence(sentence)
+        if parsed is None:
+            if sentence[3:6] in _PARSERS and not checksum_ok(sentence):
+                self.checksum_errors += 1
+            return None
+        self.sentences += 1
+
+        kind = parsed.pop('type')
+        if kind != 'GGA':
+            if parsed['speed_kmh'] is not None:
+                self.speed_kmh = parsed['speed_kmh']
+            if parsed['course'] is not None:
+                self.course = parsed['course']
+            if kind == 'VTG' or self.gga_seen:
+                return None
+            # RMC stands in for GGA; it has no satellite or altitude data
+            if not parsed['valid']:
+                return None
+            parsed = {
+                'timestamp': parsed['timestamp'],
+                'latitude': parsed['latitude'],
+                'longitude': parsed['longitude'],
+                'fix_quality': 1,
+                'satellites': 0,
+                'hdop': 0,
+                'altitude': 0
+            }
+        else:
+            self.gga_seen = True
+            if not parsed['fix_quality']:
+                self.speed_kmh = self.course = None
+
+        parsed['speed_kmh'] = self.speed_kmh
+        parsed['course'] = self.course
+        return parsed
+
+
+def main():
+    if len(sys.argv) != 2:
+        print('Usage: python nmea.py <log.nmea>')
+        sys.exit(1)
+
+    parser = NMEAParser()
+    fixes = 0
+    with open(sys.argv[1], 'r', errors='ignore') as f:
+        for line in f:
+            fix = parser.feed(line.strip())
+            if fix is not None:
+                fixes += 1
+                print(fix)
+    print(f"{parser.sentences} sentences decoded, {fixes} fixes, {parser.checksum_errors} checksum errors")
+
+
+if __name__ == '__main__':
+    main()
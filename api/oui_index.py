@@ -0,0 +1,188 @@
+"""Compact binary index of the IEEE OUI database.
+
+The index is compiled once from oui.txt and memory-mapped at startup, so
+there is no text parsing on boot and vendor names stay in the page cache
+instead of living as Python strings.
+
+File layout (little-endian):
+    header   magic b'OUIX', format version (uint32), entry count (uint32),
+             blob size (uint32)
+    keys     count x uint32, sorted 24-bit OUI values
+    offsets  count x uint32, byte offset of each vendor name in the blob
+    blob     UTF-8 vendor names, each terminated by '\\n' (duplicates shared)
+
+Run `python oui_index.py [oui.txt] [oui.idx]` to compile by hand.
+"""
+import mmap
+import os
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+
+INDEX_MAGIC = b'OUIX'
+INDEX_VERSION = 1
+HEADER = struct.Struct('<4sIII')
+
+
+def parse_oui_line(line):
+    """Parse an oui.txt line like "28-6F-B9   (hex)   Nokia Shanghai Bell Co., Ltd." into (prefix, vendor)"""
+    line = line.strip()
+    if line and not line.startswith('#') and '(hex)' in line:
+        parts = line.split('(hex)')
+        if len(parts) == 2:
+            mac_prefix = parts[0].strip().replace('-', '').replace(' ', '').upper()
+            manufacturer = parts[1].strip()
+            if mac_prefix and manufacturer and len(mac_prefix) == 6:
+                return mac_prefix, manufacturer
+    return None
+
+
+def parse_oui_text(path):
+    """Parse an oui.txt file into a {prefix: vendor} dict"""
+    entries = {}
+    with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+        for line in f:
+            parsed = parse_oui_line(line)
+            if parsed:
+                entries[parsed[0]] = parsed[1]
+    return entries
+
+
+def _little_endian_array(values):
+    data = array('I', values)
+    if sys.byteorder != 'little':
+        data.byteswap()
+    return data.tobytes()
+
+
+def write_oui_index(entries, index_path):
+    """Write a {prefix: vendor} mapping as a binary index (atomically)"""
+    keys = []
+    offsets = []
+    blob = bytearray()
+    name_offsets = {}
+
+    parsed = []
+    for prefix, manufacturer in entries.items():
+        try:
+            parsed.append((int(prefix, 16), manufacturer))
+        except ValueError:
+            continue
+
+    for key, manufacturer in sorted(parsed):
+        offset = name_offsets.get(manufacturer)
+        if offset is None:
+            offset = len(blob)
+            name_offsets[manufacturer] = offset
+            blob += manufacturer.replace('\n', ' ').encode('utf-8') + b'\n'
+        keys.append(key)
+        offsets.append(offset)
+
+    tmp_path = f"{index_path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(INDEX_MAGIC, INDEX_VERSION, len(keys), len(blob)))
+        f.write(_little_endian_array(keys))
+        f.write(_little_endian_array(offsets))
+        f.write(blob)
+    os.replace(tmp_path, index_path)
+    return len(keys)
+
+
+def compile_oui_index(text_path, index_path):
+    """Compile oui.txt into the binary index; returns the entry count"""
+    return write_oui_index(parse_oui_text(text_path), index_path)
+
+
+def index_is_stale(text_path, index_path):
+    """True when the index is missing or older than the text database"""
+    if not os.path.exists(index_path):
+        return True
+    return os.path.exists(text_path) and os.path.getmtime(text_path) > os.path.getmtime(index_path)
+
+
+class OUIIndex:
+    """Read-only, memory-mapped OUI index with dict-style lookups by 6-hex-digit prefix"""
+
+    def __init__(self, index_path):
+        self.path = index_path
+        with open(index_path, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, count, blob_size = HEADER.unpack_from(self._mm, 0)
+        if magic != INDEX_MAGIC or version != INDEX_VERSION:
+            raise ValueError(f"{index_path} is not a version {INDEX_VERSION} OUI index")
+
+        keys_start = HEADER.size
+        offsets_start = keys_start + 4 * count
+        self._blob_start = offsets_start + 4 * count
+        if self._blob_start + blob_size > len(self._mm):
+            raise ValueError(f"{index_path} is truncated")
+
+        self._count = count
+        if sys.byteorder == 'little':
+            view = memoryview(self._mm)
+            self._keys = view[keys_start:offsets_start].cast('I')
+            self._offsets = view[offsets_start:self._blob_start].cast('I')
+        else:
+            # Big-endian hosts get a byte-swapped in-memory copy of the tables
+            self._keys = array('I', self._mm[keys_start:offsets_start])
+            self._keys.byteswap()
+            self._offsets = array('I', self._mm[offsets_start:self._blob_start])
+            self._offsets.byteswap()
+
+    def __len__(self):
+        return self._count
+
+    def _position(self, key):
+        position = bisect_left(self._keys, key)
+        if position < self._count and self._keys[position] == key:
+            return position
+        return None
+
+    def _name_at(self, position):
+        start = self._blob_start + self._offsets[position]
+        end = self._mm.find(b'\n', start)
+        return self._mm[start:end].decode('utf-8', errors='replace')
+
+    def lookup(self, key):
+        """Vendor for a 24-bit integer OUI, or None"""
+        position = self._position(key)
+        return self._name_at(position) if position is not None else None
+
+    @staticmethod
+    def _key(prefix):
+        try:
+            return int(prefix[:6], 16) if len(prefix) >= 6 else None
+        except ValueError:
+            return None
+
+    def get(self, prefix, default=None):
+        key = self._key(prefix)
+        if key is None:
+            return default
+        manufacturer = self.lookup(key)
+        return manufacturer if manufacturer is not None else default
+
+    def __contains__(self, prefix):
+        key = self._key(prefix)
+        return key is not None and self._position(key) is not None
+
+    def __getitem__(self, prefix):
+        manufacturer = self.get(prefix)
+        if manufacturer is None:
+            raise KeyError(prefix)
+        return manufacturer
+
+    def items(self, start=0, stop=None):
+        """Yield (prefix, vendor) pairs in prefix order"""
+        stop = self._count if stop is None else min(stop, self._count)
+        for position in range(start, stop):
+            yield f"{self._keys[position]:06X}", self._name_at(position)
+
+
+if __name__ == '__main__':
+    text_path = sys.argv[1] if len(sys.argv) > 1 else 'oui.txt'
+    index_path = sys.argv[2] if len(sys.argv) > 2 else 'oui.idx'
+    count = compile_oui_index(text_path, index_path)
+    print(f"Compiled {count} OUI entries from {text_path} into {index_path}")
@@ -0,0 +1,281 @@
+"""Cached inventory of serial ports, kept current by hotplug events.
+
+On Linux the kernel announces tty devices coming and going on its uevent
+netlink socket, so the port list is rescanned only when something changes
+(plus a slow safety rescan). Elsewhere, or if the socket cannot be opened,
+the port list is polled. Listing ports never touches the hardware.
+
+Newly seen ports are probed in parallel and classified as a GPS receiver
+(checksummed NMEA at 9600 baud) or a Flock You sniffer (detection JSON or
+binary frames at 115200 baud). A sniffer that sends nothing while probed is
+only recognised by its USB vendor ID, if at all.
+"""
+import logging
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import serial
+import serial.tools.list_ports
+
+from decoder import decode_detection, decode_detection_frame
+from framing import StreamFramer
+from nmea import checksum_ok
+
+log = logging.getLogger('flockyou.ports')
+
+NETLINK_KOBJECT_UEVENT = 15
+
+# USB vendor IDs that identify a device without probing
+VENDOR_KINDS = {
+    0x303a: 'flock',  # Espressif native USB (ESP32-S3/C3)
+    0x1546: 'gps'     # u-blox
+}
+
+# Baud rates tried in order when probing: GPS receivers, then sniffers
+PROBE_BAUDRATES = (9600, 115200)
+
+
+def port_info(port):
+    return {
+        'device': port.device,
+        'description': port.description,
+        'manufacturer': port.manufacturer if port.manufacturer else 'Unknown',
+        'product': port.product if port.product else 'Unknown',
+        'vid': port.vid,
+        'pid': port.pid,
+        'serial_number': port.serial_number,
+        'kind': VENDOR_KINDS.get(port.vid)
+    }
+
+
+def classify(items):
+    """'gps' or 'flock' from items read off a port, or None if they prove nothing"""
+    for item in items:
+        if isinstance(item, bytes):
+            try:
+                if decode_detection_frame(item) is not None:
+                    return 'flock'
+            except ValueError:
+                pass
+        elif item.startswith('$') and checksum_ok(item):
+            return 'gps'
+        elif item.startswith('{'):
+            try:
+                if decode_detection(item) is not None:
+                    return 'flock'
+            except ValueError:
+                pass
+    return None
+
+
+def probe_port(device, duration=1.2, in_use=lambda: ()):
+    """Listen on a port at each candidate baud rate and return what it looks like
+
+    The port is opened exclusively, so one held by another process (gpsd,
+    flock_drive) with a lock fails at once and is left alone. The probe also
+    gives the port up as soon as in_use() says the server has taken it.
+    """
+    for baudrate in PROBE_BAUDRATES:
+        if device in in_use():
+            return None
+        connection = serial.Serial()
+        connection.port = device
+        connection.baudrate = baudrate
+        connection.timeout = 0.2
+        connection.exclusive = True
+        # Keep DTR/RTS low so opening the port does not reset an ESP32
+        connection.dtr = False
+        connection.rts = False
+        try:
+            connection.open()
+        except (serial.SerialException, OSError) as e:
+            log.debug("Cannot probe %s: %s", device, e)
+            return None
+
+        framer = StreamFramer()
+        deadline = time.time() + duration
+        try:
+            while time.time() < deadline:
+                if device in in_use():
+                    return None
+                chunk = connection.read(connection.in_waiting or 1)
+                found = classify(framer.feed(chunk)) if chunk else None
+                if found is not None:
+                    return found
+        except (serial.SerialException, OSError) as e:
+            log.debug("Probe of %s failed: %s", device, e)
+            return None
+        finally:
+            connection.close()
+    return None
+
+
+def open_uevent_socket():
+    """Kernel hotplug event socket, or None where netlink is unavailable"""
+    if not hasattr(socket, 'AF_NETLINK'):
+        return None
+    try:
+        sock = socket.socket(socket.AF_NETLINK, socket.SOCK_DGRAM, NETLINK_KOBJECT_UEVENT)
+        sock.bind((0, 1))  # Multicast group 1: kernel uevents
+        return sock
+    except OSError as e:
+        log.info("Hotplug events unavailable (%s), polling serial ports instead", e)
+        return None
+
+
+def parse_uevent(message):
+    """(action, /dev path) for a tty uevent, or None for any other device"""
+    fields = message.split(b'\0')
+    if b'SUBSYSTEM=tty' not in fields:
+        return None
+    action = device = None
+    for field in fields:
+        if field.startswith(b'ACTION='):
+            action = field[7:].decode('ascii', errors='ignore')
+        elif field.startswith(b'DEVNAME='):
+            device = field[8:].decode('ascii', errors='ignore')
+    if device and not device.startswith('/'):
+        device = '/dev/' + device
+    return action, device
+
+
+class PortInventory:
+    """Serial ports currently present, rescanned on hotplug events.
+
+    on_change(event, info) is called from the watcher thread for each port
+    'added', 'removed' or 'classified' once a probe has identified it. in_use
+    returns the ports the server already has open, which are never probed.
+    """
+
+    def __init__(self, on_change=None, in_use=None, probe=True, poll_interval=2.0,
+                 rescan_interval=60.0, probe_workers=4):
+        self.on_change = on_change
+        self.in_use = in_use or (lambda: ())
+        self.probe = probe
+        self.poll_interval = poll_interval
+        self.rescan_interval = rescan_interval
+        self.lock = threading.Lock()
+        self.ports = {}          # device -> port info
+        self.serial_numbers = {}  # device -> USB serial number, kept after the port goes away
+        self.scanned = False
+        self.mode = None         # 'netlink' or 'poll' once started
+        self.probes = ThreadPoolExecutor(max_workers=probe_workers, thread_name_prefix='port-probe') if probe else None
+        self.thread = None
+
+    def start(self):
+        if self.thread is not None:
+            return
+        self.rescan()
+        sock = open_uevent_socket()
+        self.mode = 'netlink' if sock is not None else 'poll'
+        self.thread = threading.Thread(target=self._watch, args=(sock,), name='port-watch', daemon=True)
+        self.thread.start()
+
+    def list(self):
+        if not self.scanned:
+            self.rescan()
+        with self.lock:
+            return [dict(info) for info in self.ports.values()]
+
+    def get(self, device):
+        with self.lock:
+            info = self.ports.get(device)
+            return dict(info) if info else None
+
+    def serial_number(self, device):
+        return self.serial_numbers.get(device)
+
+    def rescan(self, replugged=()):
+        """Compare the system's ports with the cache and report what changed
+
+        replugged names ports that hotplug events say were re-added, even if
+        they are back on the same path before the rescan saw them go.
+        """
+        current = {port.device: port_info(port) for port in serial.tools.list_ports.comports()}
+        with self.lock:
+            added = []
+            for device, info in current.items():
+                known = self.ports.get(device)
+                if known is not None and known['serial_number'] == info['serial_number'] and device not in replugged:
+                    # Same hardware still there; keep what probing found out
+                    info['kind'] = known['kind']
+                else:
+                    added.append(info)
+                if info['serial_number']:
+                    self.serial_numbers[device] = info['serial_number']
+            # A port whose serial number changed is a different device on a reused path
+            replaced = {info['device'] for info in added}
+            removed = [info for device, info in self.ports.items() if device not in current or device in replaced]
+            self.ports = current
+            self.scanned = True
+
+        for info in removed:
+            log.info("Serial port removed: %s", info['device'])
+            self._notify('removed', info)
+        for info in added:
+            log.info("Serial port added: %s (%s)", info['device'], info['description'])
+            self._notify('added', info)
+            if self.probe and info['kind'] is None:
+                self.probes.submit(self._probe, info['device'])
+        return added, removed
+
+    def _probe(self, device):
+        if device in self.in_use():
+            return
+        kind = probe_port(device, in_use=self.in_use)
+        if kind is None:
+            return
+        with self.lock:
+            info = self.ports.get(device)
+            if info is None:
+                return
+            info['kind'] = kind
+            info = dict(info)
+        log.info("Serial port %s looks like a %s device", device, kind)
+        self._notify('classified', info)
+
+    def _notify(self, event, info):
+        if self.on_change is None:
+            return
+        try:
+            self.on_change(event, dict(info))
+        except Exception as e:
+            log.error("Port change handler error for %s: %s", info['device'], e)
+
+    def _wait_for_hotplug(self, sock):
+        """Block until a tty device comes or goes (or the safety rescan is due)
+
+        Returns the ports added in the burst of events.
+        """
+        sock.settimeout(self.rescan_interval)
+        try:
+            event = parse_uevent(sock.recv(8192))
+            while event is None:
+                event = parse_uevent(sock.recv(8192))
+        except socket.timeout:
+            return set()
+        # A device often brings several nodes at once; take them all in one rescan
+        added = set()
+        sock.settimeout(0.1)
+        try:
+            while True:
+                if event is not None and event[0] == 'add' and event[1]:
+                    added.add(event[1])
+                event = parse_uevent(sock.recv(8192))
+        except socket.timeout:
+            pass
+        return added
+
+    def _watch(self, sock):
+        while True:
+            try:
+                if sock is not None:
+                    self.rescan(self._wait_for_hotplug(sock))
+                else:
+                    time.sleep(self.poll_interval)
+                    self.rescan()
+            except Exception as e:
+                log.error("Serial port watcher error: %s", e)
+                time.sleep(self.poll_interval)
@@ -0,0 +1,238 @@
+"""Replay recorded serial traffic into the ingest path and measure throughput.
+
+Usage: python replay_serial.py [--flock capture] [--gps nmea.txt] [--rate N]
+                               [--gps-rate N] [--records N] [--binary] [--sniffers N]
+
+Flock device and GPS traffic are written into pseudo-terminal pairs that the
+server's own serial supervisors read through pyserial, so the whole path from serial bytes to the new_detection emit is exercised
+without an ESP32 or a GPS dongle. A Flock capture may hold JSON lines, binary
+frames or both; without one, synthetic detections matching the firmware
+output are used. With --sniffers N the records are dealt round-robin across
+N simulated sniffers, each on its own pty and supervisor. Runs in a temporary directory so the real detection
+history is not touched.
+
+Reported: detections/sec, latency from the bytes being written to the
+matching new_detection emit, and ingest queue depths.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+import tty
+
+# The server logs every new detection at the default profile
+os.environ.setdefault('LOG_PROFILE', 'quiet')
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_decoder import binary_frames, sample_lines
+from decoder import decode_detection, decode_detection_frame
+from framing import encode_frame, iter_stream
+
+
+def nmea_sentence(body):
+    checksum = 0
+    for char in body:
+        checksum ^= ord(char)
+    return f"${body}*{checksum:02X}"
+
+
+def sample_nmea(count, rate, lat=37.7749, lon=-122.4194):
+    """GGA fixes along a straight track, one per 1/rate seconds"""
+    sentences = []
+    for i in range(count):
+        seconds = i / rate
+        hh, rem = divmod(int(seconds), 3600)
+        mm, ss = divmod(rem, 60)
+        centis = int((seconds % 1) * 100)
+        fix_lat = lat + i * 1e-5
+        fix_lon = abs(lon) + i * 1e-5
+        lat_field = f"{int(fix_lat):02d}{(fix_lat % 1) * 60:07.4f}"
+        lon_field = f"{int(fix_lon):03d}{(fix_lon % 1) * 60:07.4f}"
+        body = f"GPGGA,{hh % 24:02d}{mm:02d}{ss:02d}.{centis:02d},{lat_field},N,{lon_field},W,1,08,0.9,15.0,M,-25.0,M,,"
+        sentences.append(nmea_sentence(body))
+    return sentences
+
+
+def load_flock_records(path, records, binary):
+    """Serial records as (bytes to write, MAC or None)"""
+    if path:
+        with open(path, 'rb') as f:
+            items = list(iter_stream(f.read()))
+    elif binary:
+        items = [frame[3:-2] for frame in binary_frames(sample_lines(records))]
+    else:
+        items = sample_lines(records)
+
+    result = []
+    for item in items:
+        try:
+            data = decode_detection(item) if isinstance(item, str) else decode_detection_frame(item)
+        except ValueError:
+            data = None
+        mac = data.get('mac_address') if data else None
+        raw = item.encode('utf-8') + b'\r\n' if isinstance(item, str) else encode_frame(item)
+        result.append((raw, mac))
+    return result
+
+
+def load_gps_sentences(path, count, rate):
+    if path:
+        with open(path, 'r', errors='ignore') as f:
+            return [line.strip() for line in f if line.startswith('$')]
+    return sample_nmea(count, rate)
+
+
+def open_pty():
+    master, slave = os.openpty()
+    tty.setraw(slave)
+    return master, slave, os.ttyname(slave)
+
+
+def write_all(fd, data):
+    view = memoryview(data)
+    while view:
+        written = os.write(fd, view)
+        view = view[written:]
+
+
+def play(fd, records, rate, sent_at, batch=64):
+    """Write records at rate per second (0 = as fast as the reader drains them)"""
+    start = time.perf_counter()
+    if rate <= 0:
+        for offset in range(0, len(records), batch):
+            chunk = records[offset:offset + batch]
+            now = time.time()
+            for _, mac in chunk:
+                if mac is not None:
+                    sent_at.setdefault(mac, now)
+            write_all(fd, b''.join(raw for raw, _ in chunk))
+        return time.perf_counter() - start
+
+    for i, (raw, mac) in enumerate(records):
+        delay = start + i / rate - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        if mac is not None:
+            sent_at.setdefault(mac, time.time())
+        write_all(fd, raw)
+    return time.perf_counter() - start
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay serial traffic into the Flock You ingest path')
+    parser.add_argument('--flock', help='Recorded Flock device stream (JSON lines and/or binary frames)')
+    parser.add_argument('--gps', help='Recorded NMEA sentences, one per line')
+    parser.add_argument('--records', type=int, default=5000, help='Synthetic detections when no capture is given (default: 5000)')
+    parser.add_argument('--binary', action='store_true', help='Send synthetic detections as binary frames')
+    parser.add_argument('--sniffers', type=int, default=1, help='Simulated sniffers sharing the records (default: 1)')
+    parser.add_argument('--rate', type=float, default=0, help='Flock records per second per sniffer, 0 for maximum (default: 0)')
+    parser.add_argument('--gps-rate', type=float, default=10, help='NMEA sentences per second, 0 for maximum (default: 10)')
+    parser.add_argument('--idle-timeout', type=float, default=2.0, help='Seconds without progress before stopping (default: 2)')
+    args = parser.parse_args()
+
+    flock_records = load_flock_records(args.flock, args.records, args.binary)
+    if not flock_records:
+        print('No Flock records to replay')
+        sys.exit(1)
+    gps_sentences = load_gps_sentences(args.gps, args.records, args.gps_rate or 10)
+    gps_records = [(sentence.encode('ascii', errors='ignore') + b'\r\n', None) for sentence in gps_sentences]
+
+    # Keep the replayed detections out of the real data directory
+    workdir = tempfile.mkdtemp(prefix='flockyou-replay-')
+    os.chdir(workdir)
+    import flockyou as server
+
+    sent_at = {}
+    latencies = []
+    emitted = {'new_detection': 0, 'gps_update': 0}
+    original_emit = server.socketio.emit
+
+    def timed_emit(event, *emit_args, **emit_kwargs):
+        if event == 'new_detection':
+            mac = emit_args[0].get('mac_address') if emit_args else None
+            if mac in sent_at:
+                latencies.append(time.time() - sent_at[mac])
+        if event in emitted:
+            emitted[event] += 1
+        return original_emit(event, *emit_args, **emit_kwargs)
+
+    server.socketio.emit = timed_emit
+
+    ptys = [open_pty() for _ in range(max(1, args.sniffers))]
+    gps_master, gps_slave, gps_path = open_pty()
+
+    if server.DETECTION_UPDATE_WINDOW > 0:
+        server.detection_update_coalescer.start()
+    devices = [server.attach_flock_device(path) for _, _, path in ptys]
+    supervisors = [device.supervisor for device in devices] + [server.attach_gps(gps_path)]
+    for supervisor in supervisors:
+        if not supervisor.first_attempt.wait(server.SERIAL_OPEN_TIMEOUT) or not supervisor.connected:
+            print(f"Could not open {supervisor.port}: {supervisor.last_error}")
+            sys.exit(1)
+
+    print(f"Replaying {len(flock_records)} Flock records on {', '.join(device.port for device in devices)} "
+          f"({'max' if args.rate <= 0 else f'{args.rate:g}/s'}) and {len(gps_records)} NMEA sentences on {gps_path} "
+          f"({'max' if args.gps_rate <= 0 else f'{args.gps_rate:g}/s'})")
+
+    # GPS plays alongside and is not waited for
+    gps_thread = threading.Thread(target=play, args=(gps_master, gps_records, args.gps_rate, {}), daemon=True)
+    gps_thread.start()
+
+    start = time.time()
+    writers = []
+    write_times = []
+    for index, (master, _, _) in enumerate(ptys):
+        share = flock_records[index::len(ptys)]
+        writer = threading.Thread(target=lambda fd=master, records=share: write_times.append(play(fd, records, args.rate, sent_at)))
+        writer.start()
+        writers.append(writer)
+    for writer in writers:
+        writer.join()
+    write_time = max(write_times)
+
+    # Wait for the pipelines to drain
+    last_processed, last_progress = -1, time.time()
+    while time.time() - last_progress < args.idle_timeout:
+        stats = server.flock_ingest.snapshot()
+        if stats['records_processed'] != last_processed:
+            last_processed, last_progress = stats['records_processed'], time.time()
+        time.sleep(0.05)
+    elapsed = last_progress - start
+
+    server.serial_io.stop_all()
+    stats = server.flock_ingest.snapshot()
+
+    print(f"\nwrite time           {write_time:10.2f} s")
+    print(f"processing time      {elapsed:10.2f} s")
+    print(f"records processed    {stats['records_processed']:10d}  ({stats['records_processed'] / elapsed:.0f}/s)")
+    print(f"new detections       {emitted['new_detection']:10d}  ({emitted['new_detection'] / elapsed:.0f}/s)")
+    print(f"gps updates          {emitted['gps_update']:10d}")
+    print(f"lines / frames read  {stats['lines_read']:10d} / {stats['frames_read']}")
+    print(f"dropped              {stats['lines_dropped']:10d} lines, {stats['records_dropped']} records")
+    print(f"errors               {stats['parse_errors']:10d} parse, {stats['process_errors']} process, "
+          f"{stats['frame_errors']} frame")
+    print(f"line queue peak      {stats['line_queue_peak']:10d} / {stats['line_queue_capacity']}")
+    print(f"record queue peak    {stats['record_queue_peak']:10d} / {stats['record_queue_capacity']}")
+    if latencies:
+        print(f"latency ms           p50 {percentile(latencies, 0.5) * 1000:.1f}  "
+              f"p95 {percentile(latencies, 0.95) * 1000:.1f}  "
+              f"p99 {percentile(latencies, 0.99) * 1000:.1f}  max {max(latencies) * 1000:.1f}")
+
+    for master, slave, _ in ptys:
+        os.close(master)
+        os.close(slave)
+    os.close(gps_master)
+    os.close(gps_slave)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,252 @@
+import asyncio
+import logging
+import threading
+import time
+
+import serial
+
+log = logging.getLogger('flockyou.serial_io')
+
+
+class SerialSupervisor:
+    """Owns one serial port: opens it, reads it without blocking, reconnects with backoff.
+
+    Runs as a task on a SerialIOLoop. Reads are driven by the event loop's
+    readiness notification on the port's file descriptor, so an idle port
+    costs no wakeups. After a failure the port is reopened after
+    min_backoff, doubling up to max_backoff; it keeps trying until stopped.
+
+    Callbacks run on the I/O loop thread and must not block:
+      on_data(chunk, received_at)
+      on_connect(supervisor, reconnected)
+      on_disconnect(supervisor, error)
+      on_give_up(supervisor)  -- once, after give_up_after consecutive failures
+    """
+
+    def __init__(self, port, baudrate, on_data, on_connect=None, on_disconnect=None,
+                 on_give_up=None, min_backoff=0.5, max_backoff=30.0, give_up_after=5,
+                 open_port=None):
+        self.port = port
+        self.baudrate = baudrate
+        self.on_data = on_data
+        self.on_connect = on_connect
+        self.on_disconnect = on_disconnect
+        self.on_give_up = on_give_up
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+        self.give_up_after = give_up_after
+        self.open_port = open_port or (lambda: serial.Serial(self.port, self.baudrate, timeout=0))
+
+        self.connected = False
+        self.failures = 0  # Failed opens or dropped connections since data last arrived
+        self.connects = 0
+        self.bytes_read = 0
+        self.last_error = None
+        self.first_attempt = threading.Event()  # Set once the first open has succeeded or failed
+        self.stopped = False
+
+        self._loop = None
+        self._stop = None
+        self._wake = None
+        self._done = None
+
+    def backoff(self):
+        return min(self.max_backoff, self.min_backoff * 2 ** max(0, self.failures - 1))
+
+    async def run(self):
+        self._loop = asyncio.get_running_loop()
+        self._stop = asyncio.Event()
+        self._wake = asyncio.Event()
+        if self.stopped:
+            return
+
+        while not self._stop.is_set():
+            try:
+                connection = self.open_port()
+            except Exception as e:
+                self._failed(e)
+                self.first_attempt.set()
+                await self._sleep(self.backoff())
+                continue
+
+            self.connected = True
+            self.connects += 1
+            self.last_error = None
+            self.first_attempt.set()
+            self._notify(self.on_connect, self, self.connects > 1)
+
+            error = await self._pump(connection)
+
+            self.connected = False
+            try:
+                connection.close()
+            except Exception:
+                pass
+            if self._stop.is_set():
+                break
+
+            self._notify(self.on_disconnect, self, error)
+            self._failed(error)
+            await self._sleep(self.backoff())
+
+        self.connected = False
+
+    def stop(self):
+        """Close the port and end the supervisor (callable from any thread)"""
+        self.stopped = True
+        if self._loop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._request_stop)
+
+    def retry_now(self):
+        """Cut short a backoff delay and reopen the port at once (callable from any thread)"""
+        if self._loop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    def snapshot(self):
+        return {
+            'port': self.port,
+            'connected': self.connected,
+            'failures': self.failures,
+            'connects': self.connects,
+            'bytes_read': self.bytes_read,
+            'last_error': self.last_error,
+            'next_retry_delay': None if self.connected else self.backoff()
+        }
+
+    def _request_stop(self):
+        self._stop.set()
+        if self._done is not None and not self._done.done():
+            self._done.set_result(None)
+
+    def _failed(self, error):
+        self.failures += 1
+        self.last_error = str(error) if error else None
+        if self.failures == self.give_up_after:
+            self._notify(self.on_give_up, self)
+
+    def _received(self, chunk):
+        # Only a connection that delivers data counts as healthy, so a flapping port keeps backing off
+        self.failures = 0
+        self.bytes_read += len(chunk)
+        self._notify(self.on_data, chunk, time.time())
+
+    def _notify(self, callback, *args):
+        if callback is None:
+            return
+        try:
+            callback(*args)
+        except Exception as e:
+            log.error("Serial supervisor callback error on %s: %s", self.port, e)
+
+    async def _sleep(self, delay):
+        """Wait out a backoff delay unless stopped or woken by retry_now()"""
+        self._wake.clear()
+        waiters = [asyncio.ensure_future(self._stop.wait()), asyncio.ensure_future(self._wake.wait())]
+        try:
+            await asyncio.wait(waiters, timeout=delay, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for waiter in waiters:
+                waiter.cancel()
+
+    async def _pump(self, connection):
+        """Feed on_data until the port fails or the supervisor is stopped; returns the error, if any"""
+        self._done = done = self._loop.create_future()
+
+        def readable():
+            try:
+                # Non-blocking (timeout=0): takes whatever the driver has buffered
+                chunk = connection.read(connection.in_waiting or 1)
+            except Exception as e:
+                if not done.done():
+                    done.set_result(e)
+                return
+            if chunk:
+                self._received(chunk)
+
+        try:
+            fd = connection.fileno()
+            self._loop.add_reader(fd, readable)
+        except (AttributeError, NotImplementedError, ValueError):
+            # No pollable descriptor (e.g. Windows): fall back to timed reads on the default executor
+            return await self._pump_blocking(connection, done)
+
+        try:
+            return await done
+        finally:
+            self._loop.remove_reader(fd)
+            self._done = None
+
+    async def _pump_blocking(self, connection, done):
+        connection.timeout = 0.5
+        try:
+            while not done.done():
+                try:
+                    chunk = await self._loop.run_in_executor(None, connection.read, 4096)
+                except Exception as e:
+                    return e
+                if chunk:
+                    self._received(chunk)
+            return done.result()
+        finally:
+            self._done = None
+
+
+class SerialIOLoop:
+    """A single event loop thread hosting every serial port supervisor.
+
+    Thread count and idle wakeups stay constant however many ports are
+    attached or how often they reconnect.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.loop = None
+        self.thread = None
+        self.supervisors = {}  # port -> SerialSupervisor
+
+    def start(self):
+        with self.lock:
+            if self.thread is not None:
+                return
+            self.loop = asyncio.new_event_loop()
+            self.thread = threading.Thread(target=self.loop.run_forever, name='serial-io', daemon=True)
+            self.thread.start()
+
+    def add(self, supervisor):
+        """Start supervising a port; a port that is already supervised keeps its existing supervisor"""
+        self.start()
+        with self.lock:
+            existing = self.supervisors.get(supervisor.port)
+            if existing is not None:
+                return existing
+            self.supervisors[supervisor.port] = supervisor
+        asyncio.run_coroutine_threadsafe(self._run(supervisor), self.loop)
+        return supervisor
+
+    def remove(self, port):
+        with self.lock:
+            supervisor = self.supervisors.pop(port, None)
+        if supervisor is not None:
+            supervisor.stop()
+        return supervisor
+
+    def get(self, port):
+        return self.supervisors.get(port)
+
+    def all(self):
+        with self.lock:
+            return list(self.supervisors.values())
+
+    def stop_all(self):
+        for supervisor in self.all():
+            self.remove(supervisor.port)
+
+    async def _run(self, supervisor):
+        try:
+            await supervisor.run()
+        except Exception as e:
+            log.exception("Serial supervisor for %s crashed: %s", supervisor.port, e)
+        finally:
+            with self.lock:
+                if self.supervisors.get(supervisor.port) is supervisor:
+                    del self.supervisors[supervisor.port]
@@ -0,0 +1,57 @@
+import threading
+
+
+class SnifferDevice:
+    """One attached Flock You sniffer and the supervisor that owns its port.
+
+    enabled means the user asked for the device and its supervisor keeps
+    reconnecting; connected means the port is currently open and being read.
+    """
+
+    def __init__(self, port):
+        self.port = port
+        self.supervisor = None
+        self.enabled = False
+
+    @property
+    def connected(self):
+        return self.supervisor is not None and self.supervisor.connected
+
+    @property
+    def reconnect_attempts(self):
+        return self.supervisor.failures if self.supervisor is not None else 0
+
+    def snapshot(self):
+        return {
+            'port': self.port,
+            'connected': self.connected,
+            'reconnect_attempts': self.reconnect_attempts
+        }
+
+
+class SnifferRegistry:
+    """Sniffers by port"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.devices = {}
+
+    def get(self, port):
+        return self.devices.get(port)
+
+    def get_or_create(self, port):
+        with self.lock:
+            device = self.devices.get(port)
+            if device is None:
+                device = self.devices[port] = SnifferDevice(port)
+            return device
+
+    def all(self):
+        with self.lock:
+            return list(self.devices.values())
+
+    def connected(self):
+        return [device for device in self.all() if device.connected]
+
+    def enabled(self):
+        return [device for device in self.all() if device.enabled]
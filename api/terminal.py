@@ -0,0 +1,92 @@
+import logging
+import threading
+import time
+from collections import deque
+
+log = logging.getLogger('flockyou.terminal')
+
+
+class TerminalFanout:
+    """Raw serial terminal feed that only does work while someone is watching.
+
+    Lines are kept in a fixed-size ring buffer for clients that join later.
+    While the terminal room has subscribers, lines are collected and sent as
+    one batch per interval; with no subscribers publish() is just a deque
+    append and the flush thread sleeps until the next join.
+
+    Anything other than a string is stored as given and turned into a line
+    by render() only when it is actually sent, so sources whose display form
+    is costly to build (decoded binary frames) pay for it only while watched.
+    """
+
+    def __init__(self, emit, capacity=1000, interval=0.1, render=str):
+        self.emit = emit  # (lines) -> None, sends one batch to the terminal room
+        self.render = render
+        self.interval = interval
+        self.backlog = deque(maxlen=capacity)
+        self.lock = threading.Lock()
+        self.subscribers = set()
+        self.pending = []
+        self.wake = threading.Event()
+        self.thread = None
+
+    @property
+    def active(self):
+        return bool(self.subscribers)
+
+    def publish(self, line, backlog=True):
+        """Record a line (or an item for render) and queue it for subscribers, if there are any"""
+        if backlog:
+            self.backlog.append(line)
+        if not self.subscribers:
+            return
+        with self.lock:
+            self.pending.append(line)
+
+    def subscribe(self, sid, recent=50):
+        """Add a subscriber and return the most recent backlog lines for it"""
+        with self.lock:
+            self.subscribers.add(sid)
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, name='serial-terminal', daemon=True)
+                self.thread.start()
+            self.wake.set()
+        items = list(self.backlog)
+        return self._render_all(items[-recent:] if recent else items)
+
+    def unsubscribe(self, sid):
+        with self.lock:
+            self.subscribers.discard(sid)
+            if not self.subscribers:
+                self.pending = []
+                self.wake.clear()
+
+    def flush(self):
+        """Send everything queued since the last flush as one batch"""
+        with self.lock:
+            if not self.pending:
+                return 0
+            items, self.pending = self.pending, []
+        self.emit(self._render_all(items))
+        return len(items)
+
+    def _render_all(self, items):
+        lines = []
+        for item in items:
+            if isinstance(item, str):
+                lines.append(item)
+                continue
+            try:
+                lines.append(self.render(item))
+            except Exception as e:
+                log.debug("Cannot render serial terminal item: %s", e)
+        return lines
+
+    def _run(self):
+        while True:
+            self.wake.wait()
+            time.sleep(self.interval)
+            try:
+                self.flush()
+            except Exception as e:
+                log.error("Error sending serial terminal batch: %s", e)
@@ -0,0 +1,136 @@
+import threading
+import time
+from datetime import datetime
+
+class Sighting:
+    def __init__(self, detection, now):
+        self.first_seen = now
+        self.last_seen = now
+        self.count = 0
+        self.rssi_count = 0
+        self.rssi_max = None
+        self.rssi_sum = 0
+        self.best_gps = None
+        self.best_gps_rssi = None
+        self.forwarded_at = None
+        self.forwarded_rssi = None
+        self.forwarded_count = 0
+        self.detection = detection
+
+    def add(self, detection, rssi, now):
+        self.last_seen = now
+        self.count += 1
+        if rssi is not None:
+            self.rssi_count += 1
+            self.rssi_sum += rssi
+            if self.rssi_max is None or rssi > self.rssi_max:
+                self.rssi_max = rssi
+        # The strongest signal is taken as the position closest to the device;
+        # a fix without a signal reading only stands in until one with a reading arrives
+        if 'latitude' in detection and (self.best_gps is None or
+                                        (rssi is not None and (self.best_gps_rssi is None or rssi >= self.best_gps_rssi))):
+            self.best_gps = (detection['latitude'], detection['longitude'], detection.get('altitude'))
+            self.best_gps_rssi = rssi
+        self.detection = detection
+
+    @property
+    def unforwarded(self):
+        return self.count - self.forwarded_count
+
+    def summary(self):
+        summary = dict(self.detection)
+        summary['first_seen'] = datetime.fromtimestamp(self.first_seen).isoformat()
+        summary['last_seen'] = datetime.fromtimestamp(self.last_seen).isoformat()
+        summary['sighting_count'] = self.count
+        summary['rssi_max'] = self.rssi_max
+        summary['rssi_mean'] = round(self.rssi_sum / self.rssi_count, 1) if self.rssi_count else None
+        if self.best_gps is not None:
+            summary['latitude'], summary['longitude'], summary['altitude'] = self.best_gps
+        return summary
+
+def _rssi(detection):
+    # The WiFi scanners report 0 when the driver gives no signal reading
+    rssi = detection.get('rssi')
+    return rssi if rssi else None
+
+class SightingAggregator:
+    """Collapses repeated sightings of one MAC into occasional summaries.
+
+    A sighting is forwarded on first contact, when window seconds have passed
+    since the MAC was last forwarded, or when its RSSI has moved by at least
+    rssi_delta dB since then. add() returns the summary to report (also passed
+    to forward, if given) or None.
+
+    A MAC not seen for window seconds is finished: expire() returns a final
+    summary (flagged 'final') for each finished MAC with sightings not yet
+    reported, so the strongest fix and the full count of a drive-by are never
+    lost. Its next sighting counts as first contact again.
+    """
+
+    def __init__(self, forward=None, window=30.0, rssi_delta=10, clock=time.time):
+        self.forward = forward
+        self.window = window
+        self.rssi_delta = rssi_delta
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.sightings = {}  # mac -> Sighting
+        self.finished = []   # Final summaries waiting for expire()
+        self.samples = 0
+        self.forwarded = 0
+
+    def add(self, detection):
+        now = self.clock()
+        mac = detection['mac']
+        rssi = _rssi(detection)
+        with self.lock:
+            self.samples += 1
+            sighting = self.sightings.get(mac)
+            if sighting is None or now - sighting.last_seen > self.window:
+                if sighting is not None:
+                    self._finish(sighting)
+                sighting = self.sightings[mac] = Sighting(detection, now)
+            sighting.add(detection, rssi, now)
+
+            if not (sighting.forwarded_at is None
+                    or now - sighting.forwarded_at >= self.window
+                    or (rssi is not None and sighting.forwarded_rssi is not None
+                        and abs(rssi - sighting.forwarded_rssi) >= self.rssi_delta)):
+                return None
+            summary = self._forwarded(sighting, now, rssi)
+
+        if self.forward is not None:
+            self.forward(summary)
+        return summary
+
+    def expire(self, everything=False):
+        """Finish MACs not seen for a whole window (or all of them) and return their final summaries"""
+        cutoff = self.clock() - self.window
+        with self.lock:
+            stale = [mac for mac, sighting in self.sightings.items()
+                     if everything or sighting.last_seen < cutoff]
+            for mac in stale:
+                self._finish(self.sightings.pop(mac))
+            finished, self.finished = self.finished, []
+
+        if self.forward is not None:
+            for summary in finished:
+                self.forward(summary)
+        return finished
+
+    def stats(self):
+        with self.lock:
+            return {'tracked': len(self.sightings), 'samples': self.samples, 'forwarded': self.forwarded}
+
+    def _forwarded(self, sighting, now, rssi):
+        sighting.forwarded_at = now
+        if rssi is not None:
+            sighting.forwarded_rssi = rssi
+        sighting.forwarded_count = sighting.count
+        self.forwarded += 1
+        return sighting.summary()
+
+    def _finish(self, sighting):
+        if sighting.unforwarded:
+            summary = self._forwarded(sighting, sighting.last_seen, None)
+            summary['final'] = True
+            self.finished.append(summary)
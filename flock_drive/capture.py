@@ -0,0 +1,170 @@
+import ctypes
+import select
+import socket
+import struct
+
+# Linux raw capture of beacons and probe requests from a monitor mode interface.
+# A classic BPF filter attached to the socket drops every other frame in the
+# kernel, and only the fields the scanner needs are read from the bytes.
+
+ETH_P_ALL = 0x0003
+SO_ATTACH_FILTER = 26
+
+SUBTYPE_PROBE_REQUEST = 4
+SUBTYPE_BEACON = 8
+
+# Frame control byte of a management frame: subtype in the high nibble, type 0
+_FC_PROBE_REQUEST = SUBTYPE_PROBE_REQUEST << 4
+_FC_BEACON = SUBTYPE_BEACON << 4
+
+# Radiotap header length is little-endian, so it is assembled a byte at a time
+# before jumping over it to the 802.11 frame control byte.
+MGMT_FILTER = [
+    # code, jt, jf, k
+    (0x30, 0, 0, 3),             # ldb [3]          high byte of radiotap length
+    (0x64, 0, 0, 8),             # lsh #8
+    (0x07, 0, 0, 0),             # tax
+    (0x30, 0, 0, 2),             # ldb [2]          low byte
+    (0x4c, 0, 0, 0),             # or x
+    (0x07, 0, 0, 0),             # tax              x = radiotap length
+    (0x50, 0, 0, 0),             # ldb [x + 0]      frame control
+    (0x15, 1, 0, _FC_BEACON),    # jeq #beacon      -> accept
+    (0x15, 0, 1, _FC_PROBE_REQUEST),  # jeq #probe  -> accept, else drop
+    (0x06, 0, 0, 0xffff),        # ret #65535       accept
+    (0x06, 0, 0, 0),             # ret #0           drop
+]
+
+RADIOTAP_FLAGS_FCS = 0x10
+MGMT_HEADER_LEN = 24
+BEACON_FIXED_LEN = 12  # timestamp, interval, capabilities
+
+
+def attach_filter(sock, program=MGMT_FILTER):
+    code = b''.join(struct.pack('HBBI', *insn) for insn in program)
+    buf = ctypes.create_string_buffer(code, len(code))
+    fprog = struct.pack('HP', len(program), ctypes.addressof(buf))
+    sock.setsockopt(socket.SOL_SOCKET, SO_ATTACH_FILTER, fprog)
+
+
+def open_capture_socket(interface, rcvbuf=4 * 1024 * 1024):
+    """Raw socket on a monitor interface delivering only beacons and probe requests"""
+    sock = socket.socket(socket.AF_PACKET, socket.SOCK_RAW, socket.htons(ETH_P_ALL))
+    try:
+        attach_filter(sock)
+        try:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, rcvbuf)
+        except OSError:
+            pass
+        sock.bind((interface, 0))
+        sock.setblocking(False)
+    except Exception:
+        sock.close()
+        raise
+    return sock
+
+
+def parse_radiotap(frame):
+    """(header length, antenna signal dBm or 0, frame has FCS) from a radiotap header
+
+    Returns None if the header is shorter than it claims or than its fields need.
+    """
+    if len(frame) < 8:
+        return None
+    length = frame[2] | (frame[3] << 8)
+    if length < 8 or length > len(frame):
+        return None
+    present = int.from_bytes(frame[4:8], 'little')
+
+    # Skip any extended present bitmaps
+    offset = 8
+    word = present
+    while word & 0x80000000:
+        if offset + 4 > length:
+            return None
+        word = int.from_bytes(frame[offset:offset + 4], 'little')
+        offset += 4
+
+    flags = 0
+    rssi = 0
+    if present & 0x01:  # TSFT, u64 aligned to 8
+        offset = ((offset + 7) & ~7) + 8
+    if present & 0x02:  # Flags
+        if offset >= length:
+            return None
+        flags = frame[offset]
+        offset += 1
+    if present & 0x04:  # Rate
+        offset += 1
+    if present & 0x08:  # Channel, u16 frequency + u16 flags aligned to 2
+        offset = ((offset + 1) & ~1) + 4
+    if present & 0x10:  # FHSS
+        offset += 2
+    if present & 0x20:  # dBm antenna signal, s8
+        if offset >= length:
+            return None
+        rssi = frame[offset] - 256 if frame[offset] > 127 else frame[offset]
+    return length, rssi, bool(flags & RADIOTAP_FLAGS_FCS)
+
+
+def parse_mgmt_frame(frame):
+    """(addr2, ssid, rssi, subtype) for a beacon or probe request, else None
+
+    The order matches WiFiScanner._check_and_report, which capture_loop calls
+    with it.
+    """
+    radiotap = parse_radiotap(frame)
+    if radiotap is None:
+        return None
+    start, rssi, has_fcs = radiotap
+    end = len(frame) - 4 if has_fcs else len(frame)
+    if end - start < MGMT_HEADER_LEN:
+        return None
+
+    fc = frame[start]
+    if fc == _FC_BEACON:
+        subtype = SUBTYPE_BEACON
+        ie = start + MGMT_HEADER_LEN + BEACON_FIXED_LEN
+    elif fc == _FC_PROBE_REQUEST:
+        subtype = SUBTYPE_PROBE_REQUEST
+        ie = start + MGMT_HEADER_LEN
+    else:
+        return None
+
+    addr2 = frame[start + 10:start + 16].hex(':')
+
+    # SSID is normally the first element (ID 0)
+    ssid = ""
+    while ie + 2 <= end:
+        element_id = frame[ie]
+        element_len = frame[ie + 1]
+        if element_id == 0:
+            ssid = frame[ie + 2:min(ie + 2 + element_len, end)].decode('utf-8', errors='ignore')
+            break
+        ie += 2 + element_len
+    return addr2, ssid, rssi, subtype
+
+
+def read_batch(sock, buf, max_frames=256):
+    """Frames waiting on a non-blocking socket, up to max_frames"""
+    frames = []
+    view = memoryview(buf)
+    while len(frames) < max_frames:
+        try:
+            size = sock.recv_into(buf)
+        except BlockingIOError:
+            break
+        frames.append(bytes(view[:size]))
+    return frames
+
+
+def capture_loop(sock, handle, running, timeout=0.5, max_frames=256):
+    """Wait for frames, drain them in batches and call handle(addr2, ssid, rssi, subtype) for each"""
+    buf = bytearray(4096)
+    while running():
+        readable, _, _ = select.select([sock], [], [], timeout)
+        if not readable:
+            continue
+        for frame in read_batch(sock, buf, max_frames):
+            parsed = parse_mgmt_frame(frame)
+            if parsed is not None:
+                handle(*parsed)
@@ -0,0 +1,185 @@
+import subprocess
+import threading
+import time
+
+CHANNELS_24 = [1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11]
+CHANNELS_5 = [36, 40, 44, 48, 52, 56, 60, 64, 100, 104, 108, 112, 116,
+              120, 124, 128, 132, 136, 140, 144, 149, 153, 157, 161, 165]
+
+class IwController:
+    """Tunes a monitor mode interface with `iw`."""
+
+    def __init__(self, interface):
+        self.interface = interface
+
+    def set_channel(self, channel):
+        result = subprocess.run(['iw', 'dev', self.interface, 'set', 'channel', str(channel)],
+                                capture_output=True, text=True, timeout=2)
+        if result.returncode != 0:
+            raise OSError(result.stderr.strip() or f"iw exited with {result.returncode}")
+
+class ChannelStats:
+    def __init__(self, channel):
+        self.channel = channel
+        self.visits = 0
+        self.dwell_time = 0.0
+        self.frames = 0
+        self.hits = 0
+        self.last_hit = None
+        self.hit_rate = 0.0  # Moving average of hits per visit
+        self.failures = 0      # Consecutive failed tunes
+        self.retry_at = None   # Benched until this time after too many failures
+        self.disabled = False  # Channels cannot be changed at all
+
+    def snapshot(self):
+        return {
+            'channel': self.channel,
+            'band': '2.4' if self.channel <= 14 else '5',
+            'visits': self.visits,
+            'dwell_time': round(self.dwell_time, 2),
+            'frames': self.frames,
+            'hits': self.hits,
+            'last_hit': self.last_hit,
+            'hit_rate': round(self.hit_rate, 3),
+            'failures': self.failures,
+            'disabled': self.disabled or self.retry_at is not None
+        }
+
+class ChannelHopper:
+    """Cycles the monitor interface through 2.4 and 5 GHz channels.
+
+    Every channel is visited once per cycle for at least min_dwell seconds.
+    Channels where targets were seen recently get longer visits, up to
+    max_dwell, so a drive spends its time where the cameras are. The scanner
+    reports frames and hits through record_frame(), which are credited to the
+    channel currently tuned.
+
+    A channel that fails to tune is skipped for that cycle. After
+    max_failures failures in a row it is benched for cooldown seconds and
+    then tried again, so a transient EBUSY does not cost it for the session.
+
+    controller is anything with set_channel(channel) that raises OSError on
+    failure, so the scheduler can be driven without hardware.
+    """
+
+    def __init__(self, controller, channels=None, min_dwell=0.2, max_dwell=2.0,
+                 hit_gain=5.0, smoothing=0.3, max_failures=3, cooldown=30.0,
+                 clock=time.monotonic):
+        self.controller = controller
+        self.channels = list(channels or CHANNELS_24 + CHANNELS_5)
+        self.min_dwell = min_dwell
+        self.max_dwell = max_dwell
+        self.hit_gain = hit_gain
+        self.smoothing = smoothing
+        self.max_failures = max_failures
+        self.cooldown = cooldown
+        self.clock = clock
+        self.stats = {channel: ChannelStats(channel) for channel in self.channels}
+        self.lock = threading.Lock()
+        self.current = None
+        self.index = -1
+        self.visit_hits = 0
+        self.visit_start = None
+        self.running = False
+        self.wake = threading.Event()
+        self.thread = None
+
+    def dwell_for(self, channel):
+        stats = self.stats[channel]
+        return min(self.max_dwell, self.min_dwell * (1 + self.hit_gain * stats.hit_rate))
+
+    def record_frame(self, hit=False):
+        with self.lock:
+            if self.current is None:
+                return
+            stats = self.stats[self.current]
+            stats.frames += 1
+            if hit:
+                stats.hits += 1
+                stats.last_hit = time.time()
+                self.visit_hits += 1
+
+    def step(self):
+        """Close the current visit, tune the next usable channel and return how long to stay
+
+        If no channel could be tuned this time, returns how long to wait
+        before trying again; None means channels cannot be changed at all.
+        """
+        with self.lock:
+            self._finish_visit()
+        now = self.clock()
+        retry_at = None
+        for _ in range(len(self.channels)):
+            self.index = (self.index + 1) % len(self.channels)
+            channel = self.channels[self.index]
+            stats = self.stats[channel]
+            if stats.disabled:
+                continue
+            if stats.retry_at is not None and now < stats.retry_at:
+                retry_at = stats.retry_at if retry_at is None else min(retry_at, stats.retry_at)
+                continue
+            try:
+                self.controller.set_channel(channel)
+            except FileNotFoundError as e:
+                print(f"[WiFi] Cannot change channels: {e}")
+                for other in self.stats.values():
+                    other.disabled = True
+                return None
+            except (OSError, subprocess.SubprocessError) as e:
+                stats.failures += 1
+                if stats.failures >= self.max_failures:
+                    print(f"[WiFi] Channel {channel} failed {stats.failures} times in a row, "
+                          f"retrying in {self.cooldown:.0f}s: {e}")
+                    stats.retry_at = now + self.cooldown
+                else:
+                    print(f"[WiFi] Skipping channel {channel}: {e}")
+                    stats.retry_at = None
+                next_try = stats.retry_at if stats.retry_at is not None else now + self.min_dwell
+                retry_at = next_try if retry_at is None else min(retry_at, next_try)
+                continue
+            stats.failures = 0
+            stats.retry_at = None
+            with self.lock:
+                self.current = channel
+                self.visit_hits = 0
+                self.visit_start = self.clock()
+                stats.visits += 1
+            return self.dwell_for(channel)
+        if retry_at is None:
+            return None
+        return max(self.min_dwell, retry_at - now)
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                'current': self.current,
+                'channels': [self.stats[channel].snapshot() for channel in self.channels]
+            }
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        self.wake.set()
+
+    def _finish_visit(self):
+        if self.current is None:
+            return
+        stats = self.stats[self.current]
+        stats.dwell_time += self.clock() - self.visit_start
+        stats.hit_rate += self.smoothing * (self.visit_hits - stats.hit_rate)
+        self.current = None
+
+    def _run(self):
+        print(f"[WiFi] Channel hopping across {len(self.channels)} channels.")
+        while self.running:
+            dwell = self.step()
+            if dwell is None:
+                print("[WiFi] No usable channels. Channel hopping stopped.")
+                break
+            self.wake.wait(dwell)
+        with self.lock:
+            self._finish_visit()
@@ -5,16 +5,25 @@ import time
 from datetime import datetime
 
 class Logger:
-    def __init__(self, log_dir="logs"):
+    RAW_COLUMNS = ['Timestamp', 'Protocol', 'Type', 'MAC', 'Name/SSID', 'RSSI', 'Latitude', 'Longitude']
+
+    def __init__(self, log_dir="logs", raw_samples=False):
         self.log_dir = log_dir
         self.session_id = datetime.now().strftime("%Y%m%d_%H%M%S")
         self.csv_file = os.path.join(log_dir, f"flock_drive_{self.session_id}.csv")
         self.kml_file = os.path.join(log_dir, f"flock_drive_{self.session_id}.kml")
+        self.raw_file = os.path.join(log_dir, f"flock_drive_{self.session_id}_raw.csv") if raw_samples else None
+        self.raw_handle = None
 
         if not os.path.exists(log_dir):
             os.makedirs(log_dir)
 
         self._init_csv()
+        if self.raw_file:
+            # Kept open: raw samples arrive many times a second
+            self.raw_handle = open(self.raw_file, 'w', newline='')
+            self.raw_writer = csv.writer(self.raw_handle)
+            self.raw_writer.writerow(self.RAW_COLUMNS)
 
     def _init_csv(self):
         with open(self.csv_file, 'w', newline='') as f:
@@ -22,7 +31,7 @@ class Logger:
             writer.writerow([
                 'Timestamp', 'Protocol', 'Type', 'MAC', 'Name/SSID',
                 'RSSI', 'Threat_Score', 'Latitude', 'Longitude', 'Altitude',
-                'Description'
+                'Description', 'First_Seen', 'Sightings', 'RSSI_Max', 'RSSI_Mean'
             ])
 
     def log_detection(self, detection):
@@ -43,13 +52,35 @@ class Logger:
                 detection.get('latitude', ''),
                 detection.get('longitude', ''),
                 detection.get('altitude', ''),
-                detection.get('description', '')
+                detection.get('description', ''),
+                detection.get('first_seen', ''),
+                detection.get('sighting_count', ''),
+                detection.get('rssi_max', ''),
+                detection.get('rssi_mean', '')
             ])
 
+    def log_raw_sample(self, detection):
+        """Log every matching packet before aggregation (only with raw_samples)."""
+        if self.raw_handle is None:
+            return
+        self.raw_writer.writerow([
+            detection.get('timestamp'),
+            detection.get('protocol'),
+            detection.get('type'),
+            detection.get('mac'),
+            detection.get('name', ''),
+            detection.get('rssi'),
+            detection.get('latitude', ''),
+            detection.get('longitude', '')
+        ])
+
     def close(self):
         """
         Called on shutdown. Generates the KML file from the CSV data.
         """
+        if self.raw_handle is not None:
+            self.raw_handle.close()
+            self.raw_handle = None
         try:
             print(f"[Logger] Generating KML file: {self.kml_file}")
             self._generate_kml_from_csv()
@@ -13,7 +13,10 @@ from .feedback import FeedbackSystem
 from .audio import AudioSystem
 from .scanner_ble import BLEScanner
 from .scanner_wifi import WiFiScanner
-from .web_server import start_server, update_detection, update_gps_status
+from .aggregator import SightingAggregator
+from .pipeline import Pipeline
+from .channels import ChannelHopper, IwController, CHANNELS_24, CHANNELS_5
+from .web_server import start_server, update_detection, update_gps_status, update_channel_stats, update_pipeline_stats
 
 # Initialize colorama
 init(autoreset=True)
@@ -25,13 +28,32 @@ class FlockDriveApp:
 
         # Components
         self.gps = GPSManager(port=args.gps_port)
-        self.logger = Logger(log_dir=args.log_dir)
+        self.logger = Logger(log_dir=args.log_dir, raw_samples=args.raw_log)
         self.feedback = FeedbackSystem(buzzer_pin=args.buzzer_pin, led_pin=args.led_pin)
         self.audio = AudioSystem()
 
+        # Repeat sightings of a MAC are summarised instead of alerting on every packet
+        self.aggregator = None
+        if args.aggregate_window > 0:
+            self.aggregator = SightingAggregator(window=args.aggregate_window, rssi_delta=args.rssi_delta)
+
+        # Scanner callbacks only queue the match; everything slow happens in these stages
+        self.pipeline = Pipeline()
+        self.pipeline.add_stage('enrich', self.enrich_detection, maxsize=512, overflow='drop_oldest')
+        self.pipeline.add_stage('log', self.log_detection, maxsize=256, overflow='block', blocking=True)
+        self.pipeline.add_stage('alert', self.alert_detection, maxsize=32, overflow='skip')
+        self.pipeline.add_stage('publish', self.publish_detection, maxsize=128, overflow='drop_oldest', blocking=True)
+
         # Scanners
         self.ble_scanner = BLEScanner(callback=self.handle_detection)
-        self.wifi_scanner = WiFiScanner(interface=args.wifi_interface, callback=self.handle_detection)
+        self.wifi_scanner = WiFiScanner(interface=args.wifi_interface, callback=self.handle_detection,
+                                        capture=args.wifi_capture)
+        self.channel_hopper = None
+        if args.channel_hop:
+            channels = {'2.4': CHANNELS_24, '5': CHANNELS_5, 'both': CHANNELS_24 + CHANNELS_5}[args.channel_hop]
+            self.channel_hopper = ChannelHopper(IwController(args.wifi_interface), channels,
+                                                min_dwell=args.min_dwell, max_dwell=args.max_dwell)
+            self.wifi_scanner.hopper = self.channel_hopper
 
         # State
         self.last_detection_time = 0
@@ -39,22 +61,41 @@ class FlockDriveApp:
         self.detection_count = 0
 
     def handle_detection(self, detection):
-        # Add timestamp and GPS
+        # Runs on the BLE event loop or the WiFi capture thread: stamp and queue only
         detection['timestamp'] = datetime.now().isoformat()
+        self.pipeline.submit(detection)
 
+    def enrich_detection(self, detection):
         loc = self.gps.get_location()
         if loc:
             detection['latitude'] = loc['latitude']
             detection['longitude'] = loc['longitude']
             detection['altitude'] = loc['altitude']
 
-        # Log it
-        self.logger.log_detection(detection)
-
-        # Alerts (GPIO + Audio)
+        summary = self.aggregator.add(detection) if self.aggregator else detection
+        if summary is None and not self.args.raw_log:
+            return None
+        return detection, summary
+
+    def log_detection(self, item):
+        detection, summary = item
+        if detection is not None:
+            self.logger.log_raw_sample(detection)
+        if summary is None:
+            return None
+        self.logger.log_detection(summary)
+        return summary
+
+    def alert_detection(self, detection):
+        # A final summary closes out a device already alerted on
+        if detection.get('final'):
+            return detection
+        # Alerts (GPIO + Audio); both hand off to their own players
         self.feedback.detection_alert(detection['threat_score'])
         self.audio.detection_alert(detection['threat_score'])
+        return detection
 
+    def publish_detection(self, detection):
         # Update Web UI
         update_detection(detection)
 
@@ -71,8 +112,13 @@ class FlockDriveApp:
         elif d['threat_score'] >= 70: color = Fore.YELLOW + Style.BRIGHT
         else: color = Fore.GREEN
 
-        print(f"{color}[!] DETECTED: {d['description']}")
+        if d.get('final'):
+            print(f"{color}[-] OUT OF RANGE: {d['description']}")
+        else:
+            print(f"{color}[!] DETECTED: {d['description']}")
         print(f"    MAC: {d['mac']} | RSSI: {d['rssi']} | Name: {d['name']}")
+        if d.get('sighting_count', 1) > 1:
+            print(f"    Seen {d['sighting_count']}x since {d['first_seen']} | RSSI max {d['rssi_max']}, mean {d['rssi_mean']}")
         if 'latitude' in d:
             print(f"    GPS: {d['latitude']:.5f}, {d['longitude']:.5f}")
         print(Style.RESET_ALL)
@@ -90,6 +136,7 @@ class FlockDriveApp:
         self.feedback.boot_sequence()
         self.audio.boot_sequence()
         self.gps.start()
+        await self.pipeline.start()
 
         # Start Scanners
         if not self.args.no_ble:
@@ -97,15 +144,27 @@ class FlockDriveApp:
 
         if not self.args.no_wifi:
             self.wifi_scanner.start()
+            if self.channel_hopper and self.wifi_scanner.running:
+                self.channel_hopper.start()
 
         print(Fore.GREEN + "System Active. Hunting for signals...")
         print(Fore.GREEN + f"Dashboard available at http://localhost:{self.args.web_port}")
         print(Fore.GREEN + "Press Ctrl+C to stop.")
 
+        last_stats_update = 0
         try:
             while self.running:
+                # Channel and pipeline stats for the dashboard every 2s
+                if time.time() - last_stats_update > 2:
+                    if self.channel_hopper:
+                        update_channel_stats(self.channel_hopper.snapshot())
+                    update_pipeline_stats(self.pipeline.stats())
+                    last_stats_update = time.time()
+
                 # Heartbeat every 10s
                 if time.time() - self.start_time > 10:
+                    if self.aggregator:
+                        self.submit_final_summaries(self.aggregator.expire())
                     self.feedback.heartbeat()
                     self.audio.heartbeat() # Play heartbeat sound
                     self.start_time = time.time()
@@ -129,10 +188,20 @@ class FlockDriveApp:
         finally:
             await self.shutdown()
 
+    def submit_final_summaries(self, summaries):
+        # Final summaries skip enrichment and aggregation; they go straight to the log
+        for summary in summaries:
+            self.pipeline.submit((None, summary), stage='log')
+
     async def shutdown(self):
         print(f"\n{Fore.YELLOW}Shutting down...")
         await self.ble_scanner.stop()
         self.wifi_scanner.stop()
+        if self.channel_hopper:
+            self.channel_hopper.stop()
+        if self.aggregator:
+            self.submit_final_summaries(self.aggregator.expire(everything=True))
+        await self.pipeline.stop()
         self.gps.stop()
         self.feedback.cleanup()
         self.logger.close()
@@ -146,12 +215,23 @@ def main():
     parser.add_argument('--led-pin', type=int, default=23, help='GPIO pin for LED (default: 23)')
     parser.add_argument('--gps-port', type=str, help='Serial port for GPS (auto-detect if empty)')
     parser.add_argument('--wifi-interface', type=str, default='wlan1', help='WiFi interface in monitor mode (default: wlan1)')
+    parser.add_argument('--wifi-capture', choices=['auto', 'raw', 'scapy'], default='auto',
+                        help='WiFi capture method: kernel-filtered raw socket, scapy, or auto (raw, falling back to scapy)')
+    parser.add_argument('--channel-hop', choices=['2.4', '5', 'both'],
+                        help='Hop the WiFi interface across 2.4 GHz, 5 GHz or both bands (default: stay on the current channel)')
+    parser.add_argument('--min-dwell', type=float, default=0.2, help='Seconds on each channel when hopping (default: 0.2)')
+    parser.add_argument('--max-dwell', type=float, default=2.0, help='Longest stay on a channel with recent detections (default: 2.0)')
     parser.add_argument('--web-port', type=int, default=5000, help='Port for Web Dashboard')
 
     # Feature flags
     parser.add_argument('--no-ble', action='store_true', help='Disable BLE scanning')
     parser.add_argument('--no-wifi', action='store_true', help='Disable WiFi scanning')
     parser.add_argument('--log-dir', type=str, default='logs', help='Directory for logs')
+    parser.add_argument('--aggregate-window', type=float, default=30,
+                        help='Seconds over which repeat sightings of a MAC are summarised, 0 to report every packet (default: 30)')
+    parser.add_argument('--rssi-delta', type=int, default=10,
+                        help='RSSI change in dB that reports a device again within the window (default: 10)')
+    parser.add_argument('--raw-log', action='store_true', help='Also log every matching packet to a *_raw.csv file')
 
     args = parser.parse_args()
 
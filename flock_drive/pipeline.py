@@ -0,0 +1,157 @@
+import asyncio
+import threading
+import time
+
+OVERFLOW_POLICIES = ('block', 'drop_oldest', 'drop_newest', 'skip')
+
+class Stage:
+    """One step of the detection pipeline: a bounded queue and a worker.
+
+    handler(item) returns the item to hand to the next stage, or None to
+    stop it here. Blocking handlers (file or network I/O) run on the default
+    executor so the event loop, which also runs the BLE scanner, never waits
+    on them.
+
+    What happens when the queue is full depends on overflow:
+      block        the upstream stage waits for room (back-pressure)
+      drop_oldest  the oldest queued item is discarded to make room
+      drop_newest  the incoming item is discarded
+      skip         the incoming item bypasses this stage's handler
+    """
+
+    def __init__(self, name, handler, maxsize=256, overflow='drop_oldest', blocking=False):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"unknown overflow policy: {overflow}")
+        self.name = name
+        self.handler = handler
+        self.maxsize = maxsize
+        self.overflow = overflow
+        self.blocking = blocking
+        self.queue = None
+        self.next = None
+        self.task = None
+
+        self.processed = 0
+        self.dropped = 0
+        self.skipped = 0
+        self.errors = 0
+        self.queue_peak = 0
+        self.wait_total = 0.0     # Seconds items spent queued
+        self.handle_total = 0.0   # Seconds spent in the handler
+        self.latency_max = 0.0    # Longest queued + handled time
+
+    def offer(self, item):
+        """Queue an item without waiting; applies the overflow policy when full"""
+        if self.queue.full():
+            if self.overflow == 'skip':
+                self.skipped += 1
+                if self.next is not None:
+                    self.next.offer(item)
+                return
+            self.dropped += 1
+            # block is only honoured between stages; the capture side never waits
+            if self.overflow != 'drop_oldest':
+                return
+            self.queue.get_nowait()
+            self.queue.task_done()
+        self.queue.put_nowait((time.monotonic(), item))
+        self.queue_peak = max(self.queue_peak, self.queue.qsize())
+
+    async def put(self, item):
+        if self.overflow == 'block':
+            await self.queue.put((time.monotonic(), item))
+            self.queue_peak = max(self.queue_peak, self.queue.qsize())
+        else:
+            self.offer(item)
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            queued_at, item = await self.queue.get()
+            started = time.monotonic()
+            try:
+                if self.blocking:
+                    result = await loop.run_in_executor(None, self.handler, item)
+                else:
+                    result = self.handler(item)
+            except Exception as e:
+                self.errors += 1
+                print(f"[Pipeline] {self.name} stage error: {e}")
+                result = None
+            finally:
+                self.queue.task_done()
+
+            done = time.monotonic()
+            self.processed += 1
+            self.wait_total += started - queued_at
+            self.handle_total += done - started
+            self.latency_max = max(self.latency_max, done - queued_at)
+
+            if result is not None and self.next is not None:
+                await self.next.put(result)
+
+    def stats(self):
+        processed = self.processed or 1
+        return {
+            'stage': self.name,
+            'overflow': self.overflow,
+            'queued': self.queue.qsize() if self.queue else 0,
+            'queue_peak': self.queue_peak,
+            'capacity': self.maxsize,
+            'processed': self.processed,
+            'dropped': self.dropped,
+            'skipped': self.skipped,
+            'errors': self.errors,
+            'wait_ms_avg': round(self.wait_total / processed * 1000, 2),
+            'handle_ms_avg': round(self.handle_total / processed * 1000, 2),
+            'latency_ms_max': round(self.latency_max * 1000, 2)
+        }
+
+class Pipeline:
+    """Chain of stages fed by the scanners; submit() is safe from any thread."""
+
+    def __init__(self):
+        self.stages = []
+        self.loop = None
+        self.loop_thread = None
+
+    def add_stage(self, name, handler, **options):
+        stage = Stage(name, handler, **options)
+        if self.stages:
+            self.stages[-1].next = stage
+        self.stages.append(stage)
+        return stage
+
+    async def start(self):
+        self.loop = asyncio.get_running_loop()
+        self.loop_thread = threading.get_ident()
+        for stage in self.stages:
+            stage.queue = asyncio.Queue(stage.maxsize)
+            stage.task = asyncio.create_task(stage.run())
+
+    def submit(self, item, stage=None):
+        """Hand an item to the first stage (or the stage named) without blocking the caller"""
+        if self.loop is None:
+            return
+        target = self.stages[0] if stage is None else next(s for s in self.stages if s.name == stage)
+        if threading.get_ident() == self.loop_thread:
+            target.offer(item)
+        else:
+            try:
+                self.loop.call_soon_threadsafe(target.offer, item)
+            except RuntimeError:
+                pass  # Loop already closed during shutdown
+
+    async def stop(self, timeout=2.0):
+        """Let queued items finish (up to timeout), then cancel the workers"""
+        for stage in self.stages:
+            try:
+                await asyncio.wait_for(stage.queue.join(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        for stage in self.stages:
+            stage.task.cancel()
+        self.loop = None
+
+    def stats(self):
+        return [stage.stats() for stage in self.stages]
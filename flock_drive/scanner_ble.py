@@ -1,6 +1,6 @@
 import asyncio
 from bleak import BleakScanner
-from .signatures import MAC_PREFIXES, DEVICE_NAME_PATTERNS, RAVEN_SERVICE_UUIDS, get_raven_service_description, estimate_raven_firmware_version
+from .signatures import MATCHER, get_raven_service_description, estimate_raven_firmware_version
 
 class BLEScanner:
     def __init__(self, callback):
@@ -23,33 +23,15 @@ class BLEScanner:
     def _handle_device(self, device, advertisement_data):
         # 1. Check MAC Prefix
         mac = device.address.upper()
-        mac_clean = mac.replace(':', '').replace('-', '')
-        is_mac_match = False
-
-        # MAC_PREFIXES are like "58:8e:81", we need to normalize check
-        for prefix in MAC_PREFIXES:
-            clean_prefix = prefix.upper().replace(':', '')
-            if mac_clean.startswith(clean_prefix):
-                is_mac_match = True
-                break
+        is_mac_match = MATCHER.mac_match(mac)
 
         # 2. Check Device Name
         name = device.name or advertisement_data.local_name or ""
-        is_name_match = False
-        if name:
-            for pattern in DEVICE_NAME_PATTERNS:
-                if pattern.lower() in name.lower():
-                    is_name_match = True
-                    break
+        is_name_match = MATCHER.name_match(name)
 
         # 3. Check Service UUIDs (Raven)
-        is_raven = False
-        raven_services = []
-        if advertisement_data.service_uuids:
-            for uuid in advertisement_data.service_uuids:
-                if uuid.lower() in [u.lower() for u in RAVEN_SERVICE_UUIDS]:
-                    is_raven = True
-                    raven_services.append(uuid)
+        raven_services = MATCHER.raven_services(advertisement_data.service_uuids)
+        is_raven = bool(raven_services)
 
         # 4. Construct Detection Object if matched
         if is_mac_match or is_name_match or is_raven:
@@ -1,14 +1,23 @@
-from scapy.all import sniff, Dot11, Dot11Beacon, Dot11ProbeReq, Dot11Elt
 import threading
 import time
-from .signatures import WIFI_SSID_PATTERNS, MAC_PREFIXES
+from .capture import open_capture_socket, capture_loop
+from .signatures import MATCHER
+
+try:
+    from scapy.all import sniff, Dot11, Dot11Beacon, Dot11ProbeReq, Dot11Elt
+    SCAPY_AVAILABLE = True
+except ImportError:
+    SCAPY_AVAILABLE = False
 
 class WiFiScanner:
-    def __init__(self, interface, callback):
+    def __init__(self, interface, callback, capture='auto'):
         self.interface = interface
         self.callback = callback
+        self.capture = capture  # 'raw' (kernel-filtered socket), 'scapy', or 'auto' to try raw first
         self.running = False
         self.thread = None
+        self.sock = None
+        self.hopper = None  # ChannelHopper crediting frames and hits to the tuned channel
 
     def start(self):
         if not self.interface:
@@ -17,7 +26,27 @@ class WiFiScanner:
 
         print(f"[WiFi] Starting sniffer on {self.interface} (Monitor Mode required)...")
         self.running = True
-        self.thread = threading.Thread(target=self._sniff_loop, daemon=True)
+
+        target = self._sniff_loop
+        if self.capture in ('auto', 'raw'):
+            try:
+                self.sock = open_capture_socket(self.interface)
+                target = self._raw_loop
+                print("[WiFi] Using raw capture with kernel filter for beacons/probe requests.")
+            except (OSError, AttributeError) as e:
+                # AttributeError: no AF_PACKET outside Linux
+                if self.capture == 'raw':
+                    print(f"[WiFi] Raw capture unavailable: {e}")
+                    self.running = False
+                    return
+                print(f"[WiFi] Raw capture unavailable ({e}), falling back to scapy.")
+
+        if target == self._sniff_loop and not SCAPY_AVAILABLE:
+            print("[WiFi] scapy not installed. WiFi scanning disabled.")
+            self.running = False
+            return
+
+        self.thread = threading.Thread(target=target, daemon=True)
         self.thread.start()
 
     def stop(self):
@@ -26,6 +55,15 @@ class WiFiScanner:
         # but since it's in a daemon thread, main exit will kill it.
         # We can also use stop_filter in newer scapy.
 
+    def _raw_loop(self):
+        try:
+            capture_loop(self.sock, self._check_and_report, lambda: self.running)
+        except Exception as e:
+            print(f"[WiFi] Capture error: {e}")
+            self.running = False
+        finally:
+            self.sock.close()
+
     def _sniff_loop(self):
         try:
             sniff(iface=self.interface, prn=self._handle_packet, store=0,
@@ -76,21 +114,13 @@ class WiFiScanner:
 
     def _check_and_report(self, mac, ssid, rssi, subtype):
         # 1. Check SSID
-        is_ssid_match = False
-        if ssid:
-            for pattern in WIFI_SSID_PATTERNS:
-                if pattern.lower() in ssid.lower():
-                    is_ssid_match = True
-                    break
+        is_ssid_match = MATCHER.ssid_match(ssid)
 
         # 2. Check MAC Prefix
-        mac_clean = mac.upper().replace(':', '')
-        is_mac_match = False
-        for prefix in MAC_PREFIXES:
-            clean_prefix = prefix.upper().replace(':', '')
-            if mac_clean.startswith(clean_prefix):
-                is_mac_match = True
-                break
+        is_mac_match = MATCHER.mac_match(mac)
+
+        if self.hopper:
+            self.hopper.record_frame(is_ssid_match or is_mac_match)
 
         if is_ssid_match or is_mac_match:
             threat_score = 0
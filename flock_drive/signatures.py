@@ -1,3 +1,5 @@
+import re
+
 # WiFi SSID patterns to detect (case-insensitive)
 WIFI_SSID_PATTERNS = [
     "flock",        # Standard Flock Safety naming
@@ -63,31 +65,66 @@ RAVEN_SERVICE_UUIDS = [
     RAVEN_OLD_LOCATION_SERVICE
 ]
 
+RAVEN_SERVICE_DESCRIPTIONS = {
+    RAVEN_DEVICE_INFO_SERVICE: "Device Information (Serial, Model, Firmware)",
+    RAVEN_GPS_SERVICE: "GPS Location Service (Lat/Lon/Alt)",
+    RAVEN_POWER_SERVICE: "Power Management (Battery/Solar)",
+    RAVEN_NETWORK_SERVICE: "Network Status (LTE/WiFi)",
+    RAVEN_UPLOAD_SERVICE: "Upload Statistics Service",
+    RAVEN_ERROR_SERVICE: "Error/Failure Tracking Service",
+    RAVEN_OLD_HEALTH_SERVICE: "Health/Temperature Service (Legacy)",
+    RAVEN_OLD_LOCATION_SERVICE: "Location Service (Legacy)"
+}
+
+def _pattern_regex(patterns):
+    # One alternation for all patterns; duplicates that differ only in case are dropped
+    unique = sorted({p.lower() for p in patterns}, key=len, reverse=True)
+    return re.compile("|".join(re.escape(p) for p in unique), re.IGNORECASE)
+
+class SignatureMatcher:
+    """Signature lists compiled once so per-packet checks don't depend on how many there are."""
+
+    def __init__(self, mac_prefixes=MAC_PREFIXES, name_patterns=DEVICE_NAME_PATTERNS,
+                 ssid_patterns=WIFI_SSID_PATTERNS, raven_uuids=RAVEN_SERVICE_UUIDS):
+        # OUI prefixes as 24-bit integers
+        self.mac_prefixes = frozenset(int(p.replace(':', '').replace('-', ''), 16) for p in mac_prefixes)
+        self.name_regex = _pattern_regex(name_patterns)
+        self.ssid_regex = _pattern_regex(ssid_patterns)
+        self.raven_uuids = frozenset(u.lower() for u in raven_uuids)
+
+    def mac_match(self, mac):
+        try:
+            if len(mac) >= 8 and mac[2] in ':-':
+                oui = int(mac[0:2] + mac[3:5] + mac[6:8], 16)
+            else:
+                oui = int(mac[:6], 16)
+        except ValueError:
+            return False
+        return oui in self.mac_prefixes
+
+    def name_match(self, name):
+        return bool(name) and self.name_regex.search(name) is not None
+
+    def ssid_match(self, ssid):
+        return bool(ssid) and self.ssid_regex.search(ssid) is not None
+
+    def raven_services(self, service_uuids):
+        """The advertised UUIDs that are Raven services, in advertisement order"""
+        if not service_uuids:
+            return []
+        return [uuid for uuid in service_uuids if uuid.lower() in self.raven_uuids]
+
+# Built once at import and shared by the BLE and WiFi scanners
+MATCHER = SignatureMatcher()
+
 def get_raven_service_description(uuid):
-    uuid_lower = uuid.lower()
-    if uuid_lower == RAVEN_DEVICE_INFO_SERVICE:
-        return "Device Information (Serial, Model, Firmware)"
-    if uuid_lower == RAVEN_GPS_SERVICE:
-        return "GPS Location Service (Lat/Lon/Alt)"
-    if uuid_lower == RAVEN_POWER_SERVICE:
-        return "Power Management (Battery/Solar)"
-    if uuid_lower == RAVEN_NETWORK_SERVICE:
-        return "Network Status (LTE/WiFi)"
-    if uuid_lower == RAVEN_UPLOAD_SERVICE:
-        return "Upload Statistics Service"
-    if uuid_lower == RAVEN_ERROR_SERVICE:
-        return "Error/Failure Tracking Service"
-    if uuid_lower == RAVEN_OLD_HEALTH_SERVICE:
-        return "Health/Temperature Service (Legacy)"
-    if uuid_lower == RAVEN_OLD_LOCATION_SERVICE:
-        return "Location Service (Legacy)"
-    return "Unknown Raven Service"
+    return RAVEN_SERVICE_DESCRIPTIONS.get(uuid.lower(), "Unknown Raven Service")
 
 def estimate_raven_firmware_version(service_uuids):
     if not service_uuids:
         return "Unknown"
 
-    uuids_lower = [u.lower() for u in service_uuids]
+    uuids_lower = {u.lower() for u in service_uuids}
 
     has_new_gps = RAVEN_GPS_SERVICE.lower() in uuids_lower
     has_old_location = RAVEN_OLD_LOCATION_SERVICE.lower() in uuids_lower
@@ -9,6 +9,7 @@ document.addEventListener('DOMContentLoaded', () => {
     const elDetectionCount = document.getElementById('detection-count');
     const elGpsStatus = document.getElementById('gps-status');
     const elUptime = document.getElementById('uptime');
+    const channelList = document.getElementById('channel-list');
 
     let startTime = Date.now();
     let highestThreat = 0;
@@ -31,6 +32,10 @@ document.addEventListener('DOMContentLoaded', () => {
         elGpsStatus.style.color = 'var(--primary)';
     });
 
+    socket.on('channel_stats', (data) => {
+        renderChannels(data);
+    });
+
     socket.on('new_detection', (data) => {
         addFeedItem(data);
         addRadarBlip(data);
@@ -61,6 +66,23 @@ document.addEventListener('DOMContentLoaded', () => {
         }
     }
 
+    function renderChannels(data) {
+        if (!data.channels || data.channels.length === 0) return;
+
+        channelList.innerHTML = '';
+        data.channels.forEach(ch => {
+            const cell = document.createElement('div');
+            cell.className = 'channel-cell';
+            if (ch.disabled) cell.classList.add('disabled');
+            else if (ch.channel === data.current) cell.classList.add('current');
+            else if (ch.hits > 0) cell.classList.add('hit');
+
+            cell.title = `CH ${ch.channel} (${ch.band} GHz): ${ch.hits} hits / ${ch.frames} frames, ${ch.dwell_time}s`;
+            cell.innerHTML = `${ch.channel}<br><small>${ch.hits}</small>`;
+            channelList.appendChild(cell);
+        });
+    }
+
     function addRadarBlip(data) {
         const blip = document.createElement('div');
         blip.className = 'blip';
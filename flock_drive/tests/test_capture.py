@@ -0,0 +1,56 @@
+import socket
+import struct
+
+from flock_drive.capture import parse_mgmt_frame
+from flock_drive.scanner_wifi import WiFiScanner
+
+MAC = bytes.fromhex('a1b2c3d4e5f6')
+
+
+def radiotap_beacon(ssid, rssi=-52):
+    # Radiotap: version, pad, length 9, present = dBm antenna signal only
+    radiotap = struct.pack('<BBHIb', 0, 0, 9, 0x20, rssi)
+    header = bytes([0x80, 0]) + b'\x00\x00' + b'\xff' * 6 + MAC + MAC + b'\x00\x00'
+    fixed = b'\x00' * 12  # timestamp, beacon interval, capabilities
+    ssid = ssid.encode()
+    return radiotap + header + fixed + bytes([0, len(ssid)]) + ssid
+
+
+def test_parse_mgmt_frame_beacon():
+    assert parse_mgmt_frame(radiotap_beacon('Flock-A1B2C3')) == ('a1:b2:c3:d4:e5:f6', 'Flock-A1B2C3', -52, 8)
+
+
+def test_parse_mgmt_frame_rejects_truncated_radiotap():
+    frame = radiotap_beacon('Flock-A1B2C3')
+    assert parse_mgmt_frame(frame[:6]) is None
+    # Header claims more bytes than the frame has
+    assert parse_mgmt_frame(frame[:2] + struct.pack('<H', 200) + frame[4:12]) is None
+    # Antenna signal announced but the header ends before it
+    assert parse_mgmt_frame(struct.pack('<BBHI', 0, 0, 8, 0x20)) is None
+
+
+def test_raw_capture_reaches_scanner_handler():
+    detections = []
+
+    def report(detection):
+        detections.append(detection)
+        scanner.running = False
+
+    scanner = WiFiScanner(interface='mon0', callback=report, capture='raw')
+    scanner.sock, sender = socket.socketpair(socket.AF_UNIX, socket.SOCK_DGRAM)
+    scanner.sock.setblocking(False)
+    scanner.running = True
+    try:
+        # A malformed frame ahead of the beacon must be skipped, not end the capture
+        sender.send(b'\x00\x00\xff\x00\x20\x00\x00\x00')
+        sender.send(radiotap_beacon('Flock-A1B2C3'))
+        scanner._raw_loop()
+    finally:
+        sender.close()
+
+    assert len(detections) == 1
+    detection = detections[0]
+    assert detection['mac'] == 'a1:b2:c3:d4:e5:f6'
+    assert detection['name'] == 'Flock-A1B2C3'
+    assert detection['rssi'] == -52
+    assert detection['type'] == 'Beacon'
@@ -20,6 +20,8 @@ server_stats = {
     'detection_count': 0,
     'gps_status': 'Waiting...'
 }
+channel_stats = {'current': None, 'channels': []}
+pipeline_stats = []
 
 @app.route('/')
 def index():
@@ -29,10 +31,19 @@ def index():
 def get_stats():
     return jsonify(server_stats)
 
+@app.route('/api/channels')
+def get_channels():
+    return jsonify(channel_stats)
+
+@app.route('/api/pipeline')
+def get_pipeline():
+    return jsonify(pipeline_stats)
+
 @socketio.on('connect')
 def handle_connect():
     emit('status_update', server_stats)
     emit('history_update', latest_detections)
+    emit('channel_stats', channel_stats)
 
 def update_detection(detection):
     """Called by main loop to push data to frontend."""
@@ -54,6 +65,16 @@ def update_gps_status(status, lat, lon):
     server_stats['gps_status'] = status
     socketio.emit('gps_update', {'status': status, 'lat': lat, 'lon': lon})
 
+def update_channel_stats(stats):
+    global channel_stats
+    channel_stats = stats
+    socketio.emit('channel_stats', stats)
+
+def update_pipeline_stats(stats):
+    global pipeline_stats
+    pipeline_stats = stats
+    socketio.emit('pipeline_stats', stats)
+
 def start_server(host='0.0.0.0', port=5000):
     print(f"[Web] Starting Dashboard at http://{host}:{port}")
     # Using threading mode via socketio.run
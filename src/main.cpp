@@ -36,6 +36,16 @@
 #define BLE_SCAN_INTERVAL 5000 // Milliseconds between scans
 static unsigned long last_ble_scan = 0;
 
+// Serial Output Configuration
+// 0 = one JSON line per detection (default)
+// 1 = compact binary frames: 0xFE | uint16 LE length | MessagePack | CRC-16/CCITT-FALSE (uint16 LE)
+// The host (api/framing.py) accepts both on the same port
+#ifndef SERIAL_BINARY_OUTPUT
+#define SERIAL_BINARY_OUTPUT 0
+#endif
+#define FRAME_MAGIC 0xFE
+#define MAX_FRAME_PAYLOAD 1024
+
 // Detection Pattern Limits
 #define MAX_SSID_PATTERNS 10
 #define MAX_MAC_PATTERNS 50
@@ -184,6 +194,60 @@ void heartbeat_pulse()
 // JSON OUTPUT FUNCTIONS
 // ============================================================================
 
+#if SERIAL_BINARY_OUTPUT
+// Descriptive fields the host discards; left out of binary frames to save link time
+static const char* binary_omitted_fields[] = {
+    "timestamp", "detection_time", "alert_level", "device_category",
+    "ssid_length", "mac_prefix", "vendor_oui",
+    "matched_ssid_pattern", "ssid_match_confidence",
+    "matched_mac_pattern", "mac_match_confidence",
+    "matched_name_pattern", "name_match_confidence",
+    "device_name_length", "has_device_name", "detection_criteria",
+    "frame_type", "frame_description",
+    "advertisement_type", "advertisement_description",
+    "primary_indicator", "detection_reason",
+    "manufacturer", "threat_level"
+};
+
+uint16_t crc16_ccitt(const uint8_t* data, size_t len)
+{
+    uint16_t crc = 0xFFFF;
+    for (size_t i = 0; i < len; i++) {
+        crc ^= (uint16_t)data[i] << 8;
+        for (int bit = 0; bit < 8; bit++) {
+            crc = (crc & 0x8000) ? (crc << 1) ^ 0x1021 : crc << 1;
+        }
+    }
+    return crc;
+}
+#endif
+
+void output_detection(JsonDocument& doc)
+{
+#if SERIAL_BINARY_OUTPUT
+    for (int i = 0; i < sizeof(binary_omitted_fields)/sizeof(binary_omitted_fields[0]); i++) {
+        doc.remove(binary_omitted_fields[i]);
+    }
+    
+    if (measureMsgPack(doc) <= MAX_FRAME_PAYLOAD) {
+        uint8_t frame[3 + MAX_FRAME_PAYLOAD + 2];
+        size_t len = serializeMsgPack(doc, frame + 3, MAX_FRAME_PAYLOAD);
+        uint16_t crc = crc16_ccitt(frame + 3, len);
+        frame[0] = FRAME_MAGIC;
+        frame[1] = len & 0xFF;
+        frame[2] = (len >> 8) & 0xFF;
+        frame[3 + len] = crc & 0xFF;
+        frame[4 + len] = (crc >> 8) & 0xFF;
+        Serial.write(frame, len + 5);
+        return;
+    }
+    // Too large for a frame: fall back to a JSON line
+#endif
+    String json_output;
+    serializeJson(doc, json_output);
+    Serial.println(json_output);
+}
+
 void output_wifi_detection_json(const char* ssid, const uint8_t* mac, int rssi, const char* detection_type)
 {
     DynamicJsonDocument doc(2048);
@@ -249,9 +313,7 @@ void output_wifi_detection_json(const char* ssid, const uint8_t* mac, int rssi,
         doc["frame_description"] = "Device advertising its network";
     }
     
-    String json_output;
-    serializeJson(doc, json_output);
-    Serial.println(json_output);
+    output_detection(doc);
 }
 
 void output_ble_detection_json(const char* mac, const char* name, int rssi, const char* detection_method)
@@ -334,9 +396,7 @@ void output_ble_detection_json(const char* mac, const char* name, int rssi, cons
         doc["detection_reason"] = "Device name matches Flock Safety pattern";
     }
     
-    String json_output;
-    serializeJson(doc, json_output);
-    Serial.println(json_output);
+    output_detection(doc);
 }
 
 // ============================================================================
@@ -633,8 +693,7 @@ class AdvertisedDeviceCallbacks: public NimBLEAdvertisedDeviceCallbacks {
             }
             
             // Output the detection
-            serializeJson(doc, Serial);
-            Serial.println();
+            output_detection(doc);
             
             if (!triggered) {
                 triggered = true;